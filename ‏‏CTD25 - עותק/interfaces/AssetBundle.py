@@ -0,0 +1,189 @@
+
+import hashlib
+import json
+import pathlib
+import struct
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+from .BoardLayout import read_board
+from .Moves import Moves
+from .SpriteAtlas import LoadTimings, SpriteAtlas
+
+MAGIC = b"CTDB"
+VERSION = 1
+HEADER = struct.Struct("<4sIQ")  # magic, version, manifest length
+ALIGN = 64
+BUNDLE_NAME = "assets.bundle"
+
+
+def source_files(pieces_root: pathlib.Path) -> List[pathlib.Path]:
+    """Every file the bundle is compiled from, in a stable order."""
+    files = []
+    for piece_dir in sorted(p for p in pieces_root.iterdir() if p.is_dir()):
+        files.append(piece_dir / "moves.txt")
+        for state_dir in sorted(p for p in (piece_dir / "states").iterdir() if p.is_dir()):
+            files.append(state_dir / "config.json")
+            files.extend(sorted((state_dir / "sprites").glob("*.png")))
+    board_csv = pieces_root / "board.csv"
+    if board_csv.exists():
+        files.append(board_csv)
+    return files
+
+
+def fingerprint(pieces_root: pathlib.Path, cell_size: Tuple[int, int]) -> str:
+    """Hash of source paths, sizes and mtimes – no file contents are read."""
+    h = hashlib.sha1(f"{VERSION}:{cell_size[0]}x{cell_size[1]}".encode())
+    for f in source_files(pieces_root):
+        st = f.stat()
+        h.update(f"{f.relative_to(pieces_root).as_posix()}:{st.st_size}:{st.st_mtime_ns}\n".encode())
+    return h.hexdigest()
+
+
+def compile_assets(pieces_root: pathlib.Path,
+                   cell_size: Tuple[int, int],
+                   out_path: Optional[pathlib.Path] = None,
+                   workers: Optional[int] = None,
+                   timings: Optional[LoadTimings] = None) -> pathlib.Path:
+    """
+    Decode, resize and parse everything under `pieces_root` into one file:
+    a small JSON manifest (configs, move rules, board layout, frame layout)
+    followed by the raw BGRA frames, ready for `numpy.memmap`.
+    Sprites are decoded on a thread pool of `workers` threads.
+    """
+    pieces_root = pathlib.Path(pieces_root)
+    out_path = pathlib.Path(out_path or pieces_root / BUNDLE_NAME)
+
+    pieces: Dict[str, dict] = {}
+    folders: List[pathlib.Path] = []
+    for piece_dir in sorted(p for p in pieces_root.iterdir() if p.is_dir()):
+        states = {}
+        for state_dir in sorted(p for p in (piece_dir / "states").iterdir() if p.is_dir()):
+            with open(state_dir / "config.json", "r") as f:
+                states[state_dir.name] = {"config": json.load(f)}
+            folders.append(state_dir / "sprites")
+        pieces[piece_dir.name] = {
+            "moves": [list(rule) for rule in Moves.parse(piece_dir / "moves.txt")],
+            "states": states,
+        }
+
+    decoded = iter(SpriteAtlas.decode_folders(folders, cell_size, workers, timings))
+    frames: List[np.ndarray] = []
+    for piece in pieces.values():
+        for state in piece["states"].values():
+            state_frames = next(decoded)
+            state["first"], state["count"] = len(frames), len(state_frames)
+            frames.extend(state_frames)
+
+    board = None
+    if (pieces_root / "board.csv").exists():
+        board = [[piece_id, list(cell)] for piece_id, cell in read_board(pieces_root / "board.csv")]
+
+    pixels = np.stack(frames) if frames else np.zeros((0, cell_size[1], cell_size[0], 4), np.uint8)
+    manifest = json.dumps({
+        "fingerprint": fingerprint(pieces_root, cell_size),
+        "cell_size": list(cell_size),
+        "shape": list(pixels.shape),
+        "pieces": pieces,
+        "board": board,
+    }).encode()
+
+    data_offset = -(-(HEADER.size + len(manifest)) // ALIGN) * ALIGN
+    tmp_path = out_path.with_suffix(out_path.suffix + ".tmp")
+    with open(tmp_path, "wb") as f:
+        f.write(HEADER.pack(MAGIC, VERSION, len(manifest)))
+        f.write(manifest)
+        f.write(b"\0" * (data_offset - HEADER.size - len(manifest)))
+        f.write(np.ascontiguousarray(pixels).tobytes())
+    tmp_path.replace(out_path)  # readers never see a half-written bundle
+    return out_path
+
+
+class AssetBundle:
+    """A compiled asset bundle opened with its frames memory-mapped."""
+
+    def __init__(self, path: pathlib.Path, manifest: dict, pixels: np.ndarray):
+        self.path = path
+        self.manifest = manifest
+        self.pixels = pixels
+        self.cell_size: Tuple[int, int] = tuple(manifest["cell_size"])
+
+    @classmethod
+    def load(cls, path: pathlib.Path) -> "AssetBundle":
+        path = pathlib.Path(path)
+        with open(path, "rb") as f:
+            magic, version, length = HEADER.unpack(f.read(HEADER.size))
+            if magic != MAGIC or version != VERSION:
+                raise ValueError(f"Not a compatible asset bundle: {path}")
+            manifest = json.loads(f.read(length))
+        data_offset = -(-(HEADER.size + length) // ALIGN) * ALIGN
+        shape = tuple(manifest["shape"])
+        if shape[0] == 0:
+            pixels = np.zeros(shape, np.uint8)
+        else:
+            pixels = np.memmap(path, dtype=np.uint8, mode="r", offset=data_offset, shape=shape)
+        return cls(path, manifest, pixels)
+
+    @classmethod
+    def open(cls, pieces_root: pathlib.Path,
+             cell_size: Tuple[int, int],
+             path: Optional[pathlib.Path] = None,
+             workers: Optional[int] = None,
+             timings: Optional[LoadTimings] = None) -> "AssetBundle":
+        """Load the bundle for `pieces_root`, recompiling it first if it is
+        missing, built for another cell size, or older than its sources."""
+        pieces_root = pathlib.Path(pieces_root)
+        path = pathlib.Path(path or pieces_root / BUNDLE_NAME)
+        if path.exists():
+            try:
+                bundle = cls.load(path)
+                if bundle.is_fresh(pieces_root, cell_size):
+                    return bundle
+            except (ValueError, KeyError, struct.error, json.JSONDecodeError):
+                pass  # bundle פגום – נבנה מחדש
+        compile_assets(pieces_root, cell_size, path, workers, timings)
+        return cls.load(path)
+
+    def is_fresh(self, pieces_root: pathlib.Path, cell_size: Tuple[int, int]) -> bool:
+        return (self.cell_size == tuple(cell_size)
+                and self.manifest["fingerprint"] == fingerprint(pathlib.Path(pieces_root), cell_size))
+
+    @property
+    def board(self) -> Optional[List[Tuple[str, Tuple[int, int]]]]:
+        if self.manifest["board"] is None:
+            return None
+        return [(piece_id, tuple(cell)) for piece_id, cell in self.manifest["board"]]
+
+    def piece_types(self) -> List[str]:
+        return list(self.manifest["pieces"])
+
+    def state_configs(self, p_type: str) -> Dict[str, dict]:
+        return {name: s["config"] for name, s in self.manifest["pieces"][p_type]["states"].items()}
+
+    def moves(self, p_type: str, dims: Tuple[int, int]) -> Moves:
+        return Moves.from_rules([tuple(r) for r in self.manifest["pieces"][p_type]["moves"]], dims)
+
+    def install(self, atlas: SpriteAtlas, pieces_root: pathlib.Path):
+        """Expose the mapped frames through `atlas` under the source folder keys."""
+        pieces_root = pathlib.Path(pieces_root)
+        layout = []
+        for p_type, piece in self.manifest["pieces"].items():
+            for state_name, state in piece["states"].items():
+                folder = pieces_root / p_type / "states" / state_name / "sprites"
+                layout.append((atlas.key(folder, self.cell_size), state["first"], state["count"]))
+        missing = [entry for entry in layout if entry[0] not in atlas]
+        if len(missing) == len(layout) and layout:
+            atlas.add_page(self.pixels, [(key, count) for key, _, count in layout])
+            return
+        for key, first, count in missing:  # חלק כבר נטען מהדיסק – משלימים רק את החסר
+            atlas.add_page(self.pixels[first:first + count], [(key, count)])
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Compile piece assets into a memory-mappable bundle.")
+    parser.add_argument("pieces_root", type=pathlib.Path)
+    parser.add_argument("--cell", type=int, default=64, help="cell size in pixels")
+    parser.add_argument("-o", "--out", type=pathlib.Path, default=None)
+    args = parser.parse_args()
+    print(compile_assets(args.pieces_root, (args.cell, args.cell), args.out))
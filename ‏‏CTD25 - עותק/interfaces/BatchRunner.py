@@ -0,0 +1,251 @@
+
+import pathlib
+import random
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+from .AssetBundle import BUNDLE_NAME, AssetBundle
+from .Bitboard import iter_bits, piece_kind
+from .Command import Command
+
+
+@dataclass
+class GameJob:
+    """One independent game: a board layout plus a command script and/or a bot policy."""
+    board_csv: pathlib.Path
+    root: pathlib.Path
+    commands: List[Command] = field(default_factory=list)
+    policy: Optional[str] = None     # name in POLICIES
+    seed: int = 0
+    until_ms: Optional[int] = None
+    tick_hz: float = 50.0
+    cell_size: int = 64
+    bundle_path: Optional[pathlib.Path] = None   # default: assets.bundle inside root
+
+
+class RandomPolicy:
+    """
+    A bot for self-play: every `think_ms` the side to move (white and
+    black alternate) sends one of its idle pieces to a random legal
+    destination, taking a capture with probability `capture_bias` when
+    one is available.  The same seed plays the same game.
+    """
+
+    def __init__(self, seed: int = 0, think_ms: int = 250, capture_bias: float = 0.7):
+        self.rng = random.Random(seed)
+        self.think_ms = think_ms
+        self.capture_bias = capture_bias
+        self._next = 0
+        self._turn = 0
+
+    def __call__(self, game, now_ms: int) -> List[Command]:
+        if now_ms < self._next:
+            return []
+        self._next = now_ms + self.think_ms
+        color = "WB"[self._turn % 2]
+        self._turn += 1
+
+        pos = game.position
+        quiet_moves, captures = [], []
+        for sq in sorted(pos.pieces):
+            piece = pos.pieces[sq]
+            if piece_kind(piece)[1] != color or piece._state.name != "idle":
+                continue
+            cell = pos.cell(sq)
+            quiet, caps = game.move_cache.legal_moves(cell)
+            captures.extend((piece, cell, t) for t in iter_bits(caps))
+            quiet_moves.extend((piece, cell, t) for t in iter_bits(quiet))
+        if captures and (not quiet_moves or self.rng.random() < self.capture_bias):
+            options = captures
+        else:
+            options = quiet_moves
+        if not options:
+            return []
+        piece, (r, c), target = self.rng.choice(options)
+        tr, tc = pos.cell(target)
+        return [Command(now_ms, piece.piece_id, "move", [(c, r), (tc, tr)])]
+
+
+POLICIES = {"random": RandomPolicy}
+
+
+@dataclass
+class GameResult:
+    job: int
+    end_ms: int
+    length_ms: int                  # time of the last accepted command or capture
+    commands: int
+    rejected: int
+    captures: Dict[str, int]        # capturing piece type -> count
+    lost: Dict[str, int]            # captured piece type -> count
+    busy: Dict[str, int]            # piece type -> samples spent out of "idle"
+    alive: Dict[str, int]           # piece type -> samples on the board
+    position_hash: int
+    cpu_s: float
+
+
+@dataclass
+class BatchStats:
+    """Running totals over the games finished so far."""
+    games: int = 0
+    total_length_ms: int = 0
+    max_length_ms: int = 0
+    commands: int = 0
+    rejected: int = 0
+    captures: Counter = field(default_factory=Counter)
+    lost: Counter = field(default_factory=Counter)
+    busy: Counter = field(default_factory=Counter)
+    alive: Counter = field(default_factory=Counter)
+    cpu_s: float = 0.0
+    elapsed: float = 0.0
+
+    def add(self, result: GameResult):
+        self.games += 1
+        self.total_length_ms += result.length_ms
+        self.max_length_ms = max(self.max_length_ms, result.length_ms)
+        self.commands += result.commands
+        self.rejected += result.rejected
+        self.captures.update(result.captures)
+        self.lost.update(result.lost)
+        self.busy.update(result.busy)
+        self.alive.update(result.alive)
+        self.cpu_s += result.cpu_s
+
+    @property
+    def mean_length_ms(self) -> float:
+        return self.total_length_ms / self.games if self.games else 0.0
+
+    @property
+    def games_per_s(self) -> float:
+        return self.games / self.elapsed if self.elapsed > 0 else 0.0
+
+    def utilization(self) -> Dict[str, float]:
+        """Share of its time on the board each piece type spent moving or resting."""
+        return {t: self.busy[t] / n for t, n in sorted(self.alive.items()) if n}
+
+    def report(self) -> str:
+        util = ", ".join(f"{t} {u:.0%}" for t, u in self.utilization().items())
+        caps = ", ".join(f"{t} {n}" for t, n in sorted(self.captures.items()))
+        return (f"{self.games} games in {self.elapsed:.1f} s ({self.games_per_s:.1f}/s) | "
+                f"length mean {self.mean_length_ms / 1000:.1f} s, max {self.max_length_ms / 1000:.1f} s | "
+                f"{self.commands} moves, {self.rejected} rejected | captures by type: {caps or '-'} | "
+                f"utilization: {util or '-'}")
+
+
+class _Sampler:
+    """Counts, every `sample_ms`, which piece types are on the board and which are busy."""
+
+    def __init__(self, policy, sample_ms: int = 100):
+        self.policy = policy
+        self.sample_ms = sample_ms
+        self.busy: Counter = Counter()
+        self.alive: Counter = Counter()
+        self._next = 0
+
+    def __call__(self, game, now_ms: int) -> Iterable[Command]:
+        if now_ms >= self._next:
+            self._next = now_ms + self.sample_ms
+            for p in game.pieces:
+                kind = p.piece_id[0]
+                self.alive[kind] += 1
+                if p._state.name != "idle":
+                    self.busy[kind] += 1
+        return self.policy(game, now_ms) if self.policy is not None else ()
+
+
+def _bundle_of(job: GameJob) -> pathlib.Path:
+    return pathlib.Path(job.bundle_path or pathlib.Path(job.root) / BUNDLE_NAME).resolve()
+
+
+def _init_worker(roots: List[Tuple[pathlib.Path, int, pathlib.Path]]):
+    """Map the asset bundles once per worker; the atlas then serves every game it plays."""
+    from .SpriteAtlas import SpriteAtlas
+    for root, _, bundle in roots:
+        AssetBundle.load(bundle).install(SpriteAtlas.shared(), root)
+
+
+def play_game(index: int, job: GameJob) -> GameResult:
+    from .main import create_game
+    t0 = time.process_time()
+    game = create_game(job.board_csv, job.root, cell_size=job.cell_size, headless=True,
+                       bundle_path=job.bundle_path)
+    policy = POLICIES[job.policy](job.seed) if job.policy else None
+    sampler = _Sampler(policy)
+    until = job.until_ms
+    if until is None and not job.commands:
+        until = 60_000
+    result = game.run_script(job.commands, until_ms=until, tick_hz=job.tick_hz, policy=sampler)
+
+    played = [e for e in result.events if e.kind in ("command", "capture")]
+    caps = [e for e in result.events if e.kind == "capture"]
+    return GameResult(
+        job=index, end_ms=result.end_ms,
+        length_ms=max((e.time_ms for e in played), default=0),
+        commands=sum(e.kind == "command" for e in result.events),
+        rejected=sum(e.kind == "rejected" for e in result.events),
+        captures=dict(Counter(e.piece_id[0] for e in caps)),
+        lost=dict(Counter(e.data[0][0] for e in caps)),
+        busy=dict(sampler.busy), alive=dict(sampler.alive),
+        position_hash=result.position_hash,
+        cpu_s=time.process_time() - t0)
+
+
+def run_batch(jobs: Iterable[GameJob], workers: Optional[int] = None) -> Iterator[Tuple[GameResult, BatchStats]]:
+    """
+    Play `jobs` on a pool of `workers` processes (default: one per core)
+    and yield each result as it finishes, with the aggregate so far.
+
+    The asset bundles are compiled (if stale) once, here, before the pool
+    starts; every worker memory-maps the same files, so the sprite pixels
+    are shared through the page cache instead of being decoded per
+    process.  With `workers=1` the games run in this process.
+    """
+    jobs = list(jobs)
+    roots = sorted({(pathlib.Path(j.root).resolve(), j.cell_size, _bundle_of(j)) for j in jobs})
+    for root, cell, bundle in roots:
+        AssetBundle.open(root, (cell, cell), path=bundle)
+    stats = BatchStats()
+    start = time.perf_counter()
+
+    if workers == 1:
+        _init_worker(roots)
+        for i, job in enumerate(jobs):
+            result = play_game(i, job)
+            stats.add(result)
+            stats.elapsed = time.perf_counter() - start
+            yield result, stats
+        return
+
+    with ProcessPoolExecutor(workers, initializer=_init_worker, initargs=(roots,)) as pool:
+        futures = [pool.submit(play_game, i, job) for i, job in enumerate(jobs)]
+        for future in as_completed(futures):
+            result = future.result()
+            stats.add(result)
+            stats.elapsed = time.perf_counter() - start
+            yield result, stats
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Play many headless self-play games and aggregate statistics.")
+    parser.add_argument("pieces_root", type=pathlib.Path)
+    parser.add_argument("--board", type=pathlib.Path, default=None, help="board CSV (default: <root>/board.csv)")
+    parser.add_argument("--games", type=int, default=100)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--policy", choices=sorted(POLICIES), default="random")
+    parser.add_argument("--seconds", type=float, default=60.0, help="game time per game")
+    parser.add_argument("--tick-hz", type=float, default=50.0)
+    parser.add_argument("--every", type=int, default=50, help="print the aggregate every N games")
+    args = parser.parse_args()
+
+    board = args.board or args.pieces_root / "board.csv"
+    jobs = [GameJob(board, args.pieces_root, policy=args.policy, seed=i,
+                    until_ms=int(args.seconds * 1000), tick_hz=args.tick_hz) for i in range(args.games)]
+    stats = BatchStats()
+    for _, stats in run_batch(jobs, args.workers):
+        if stats.games % args.every == 0:
+            print(stats.report(), flush=True)
+    print(stats.report())
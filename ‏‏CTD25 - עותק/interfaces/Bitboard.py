@@ -0,0 +1,190 @@
+
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+from .Zobrist import ZobristKeys
+
+Square = Tuple[int, int]  # row, col
+
+
+def iter_bits(mask: int) -> Iterator[int]:
+    """Indices of the set bits of `mask`, lowest first."""
+    while mask:
+        low = mask & -mask
+        yield low.bit_length() - 1
+        mask ^= low
+
+
+def piece_kind(piece) -> Tuple[str, str]:
+    """(type, color) of a piece from its id, e.g. "QW" -> ("Q", "W")."""
+    piece_id = piece.piece_id
+    return piece_id[0], piece_id[1]
+
+
+class BitboardPosition:
+    """
+    Board occupancy as bit masks.
+
+    Square (r, c) is bit r * cols + c.  One mask is kept per color and one
+    per piece type, plus `occupied` and a square -> piece index, so
+    "is this square taken / by whom" is a couple of bit operations.
+    Masks are Python ints, so boards bigger than 8x8 simply use more
+    words – nothing changes in the code.
+
+    `unmoved` marks pieces still on the square they were placed on, for
+    the ":1st" rules in moves.txt.
+
+    `hash` is a Zobrist hash of piece ids, their states and squares and
+    the unmoved flags, updated with a few XORs on every change.
+
+    Every function in `listeners` is called with the square index each
+    time a piece is placed on or removed from a square.
+    """
+
+    _keys: Dict[int, ZobristKeys] = {}
+
+    def __init__(self, rows: int = 8, cols: int = 8):
+        self.rows, self.cols = rows, cols
+        self.occupied = 0
+        self.by_color: Dict[str, int] = {}
+        self.by_type: Dict[str, int] = {}
+        self.pieces: Dict[int, object] = {}
+        self.states: Dict[int, str] = {}
+        self.unmoved = 0
+        self.hash = 0
+        self._square_of: Dict[int, int] = {}  # id(piece) -> square
+        self.listeners: List[Callable[[int], None]] = []
+        keys = BitboardPosition._keys.get(rows * cols)
+        if keys is None:
+            keys = BitboardPosition._keys[rows * cols] = ZobristKeys(rows * cols)
+        self.zobrist = keys
+
+    def square(self, cell: Square) -> int:
+        r, c = cell
+        if not (0 <= r < self.rows and 0 <= c < self.cols):
+            raise ValueError(f"Square {cell} is outside the {self.rows}x{self.cols} board")
+        return r * self.cols + c
+
+    def cell(self, sq: int) -> Square:
+        return divmod(sq, self.cols)
+
+    def bit(self, cell: Square) -> int:
+        return 1 << self.square(cell)
+
+    def place(self, piece, cell: Square, state: str = "idle", unmoved: bool = True):
+        sq = self.square(cell)
+        if sq in self.pieces:
+            raise ValueError(f"Square {cell} is already occupied")
+        p_type, color = piece_kind(piece)
+        b = 1 << sq
+        self.occupied |= b
+        self.by_color[color] = self.by_color.get(color, 0) | b
+        self.by_type[p_type] = self.by_type.get(p_type, 0) | b
+        self.pieces[sq] = piece
+        self.states[sq] = state
+        self._square_of[id(piece)] = sq
+        self.hash ^= self.zobrist.piece(piece.piece_id, state, sq)
+        if unmoved:
+            self.unmoved |= b
+            self.hash ^= self.zobrist.unmoved[sq]
+        for listener in self.listeners:
+            listener(sq)
+
+    def remove(self, cell: Square):
+        """Take the piece off `cell` and return it (None if the square is empty)."""
+        sq = self.square(cell)
+        piece = self.pieces.pop(sq, None)
+        if piece is None:
+            return None
+        p_type, color = piece_kind(piece)
+        state = self.states.pop(sq)
+        del self._square_of[id(piece)]
+        self.hash ^= self.zobrist.piece(piece.piece_id, state, sq)
+        if self.unmoved >> sq & 1:
+            self.hash ^= self.zobrist.unmoved[sq]
+        clear = ~(1 << sq)
+        self.occupied &= clear
+        self.by_color[color] &= clear
+        self.by_type[p_type] &= clear
+        self.unmoved &= clear
+        for listener in self.listeners:
+            listener(sq)
+        return piece
+
+    def move(self, src: Square, dst: Square):
+        """Move the piece on `src` to `dst`; returns the piece captured on `dst`, if any."""
+        sq = self.square(src)
+        if sq not in self.pieces:
+            raise ValueError(f"No piece on {src}")
+        state = self.states[sq]
+        piece = self.remove(src)
+        captured = self.remove(dst)
+        self.place(piece, dst, state, unmoved=False)
+        return captured
+
+    def set_state(self, cell: Square, state: str):
+        """Record that the piece on `cell` switched to `state` (e.g. "move" -> "long_rest")."""
+        sq = self.square(cell)
+        old = self.states[sq]
+        if old == state:
+            return
+        piece_id = self.pieces[sq].piece_id
+        self.hash ^= self.zobrist.piece(piece_id, old, sq) ^ self.zobrist.piece(piece_id, state, sq)
+        self.states[sq] = state
+
+    def cell_of(self, piece) -> Optional[Square]:
+        sq = self._square_of.get(id(piece))
+        return None if sq is None else self.cell(sq)
+
+    def compute_hash(self) -> int:
+        """The hash recomputed from scratch (for checking the incremental one)."""
+        h = 0
+        for sq, piece in self.pieces.items():
+            h ^= self.zobrist.piece(piece.piece_id, self.states[sq], sq)
+        for sq in iter_bits(self.unmoved):
+            h ^= self.zobrist.unmoved[sq]
+        return h
+
+    def piece_at(self, cell: Square):
+        return self.pieces.get(self.square(cell))
+
+    def is_occupied(self, cell: Square) -> bool:
+        return bool(self.occupied >> self.square(cell) & 1)
+
+    def color_at(self, cell: Square) -> Optional[str]:
+        b = self.bit(cell)
+        for color, mask in self.by_color.items():
+            if mask & b:
+                return color
+        return None
+
+    def color_mask(self, color: str) -> int:
+        return self.by_color.get(color, 0)
+
+    def type_mask(self, p_type: str, color: Optional[str] = None) -> int:
+        mask = self.by_type.get(p_type, 0)
+        return mask if color is None else mask & self.color_mask(color)
+
+    def legal_moves(self, cell: Square) -> Tuple[int, int]:
+        """(quiet moves, captures) of the piece on `cell` as bit masks,
+        with sliding pieces stopped by the first piece in their way."""
+        sq = self.square(cell)
+        piece = self.pieces.get(sq)
+        if piece is None:
+            return 0, 0
+        _, color = piece_kind(piece)
+        enemy = self.occupied & ~self.color_mask(color)
+        return piece._state.moves.table.destinations(
+            sq, self.occupied, enemy, bool(self.unmoved >> sq & 1))
+
+    def is_legal(self, src: Square, dst: Square) -> bool:
+        quiet, captures = self.legal_moves(src)
+        return bool((quiet | captures) & self.bit(dst))
+
+    def attacks(self, color: str) -> int:
+        """Squares attacked by the pieces of `color`, blockers included."""
+        mask = 0
+        for sq in iter_bits(self.color_mask(color)):
+            mask |= self.pieces[sq]._state.moves.table.attacks(sq, self.occupied)
+        return mask
+
+    def is_attacked(self, cell: Square, by_color: str) -> bool:
+        return bool(self.attacks(by_color) & self.bit(cell))
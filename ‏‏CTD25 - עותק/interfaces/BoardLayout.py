@@ -0,0 +1,14 @@
+import pathlib
+
+
+def read_board(path: pathlib.Path) -> list[tuple[str, tuple[int, int]]]:
+    """Pieces of a board CSV as (piece id, (col, row)), row by row."""
+    with open(path) as f:
+        lines = [line.strip().split(",") for line in f if line.strip()]
+
+    board_data = []
+    for row_idx, row in enumerate(lines):
+        for col_idx, cell in enumerate(row):
+            if cell:
+                board_data.append((cell.strip(), (col_idx, row_idx)))
+    return board_data
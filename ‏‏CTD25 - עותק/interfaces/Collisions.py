@@ -0,0 +1,268 @@
+
+import heapq
+import math
+from typing import Dict, List, Optional, Set, Tuple
+from .Board import Board
+from .Bitboard import piece_kind
+from .Physics import IdlePhysics
+
+
+class SpatialHash:
+    """Uniform grid of buckets; each item is stored in every grid cell its box touches."""
+
+    def __init__(self, cell_w: float, cell_h: float):
+        self.cell_w, self.cell_h = cell_w, cell_h
+        self.buckets: Dict[Tuple[int, int], List[int]] = {}
+
+    def clear(self):
+        self.buckets.clear()
+
+    def insert(self, item: int, x0: float, y0: float, x1: float, y1: float):
+        for gy in range(math.floor(y0 / self.cell_h), math.ceil(y1 / self.cell_h)):
+            for gx in range(math.floor(x0 / self.cell_w), math.ceil(x1 / self.cell_w)):
+                self.buckets.setdefault((gx, gy), []).append(item)
+
+    def pairs(self) -> List[Tuple[int, int]]:
+        """Every pair of items sharing at least one bucket, as (low, high), sorted."""
+        found: Set[Tuple[int, int]] = set()
+        for items in self.buckets.values():
+            for a in range(len(items)):
+                for b in range(a + 1, len(items)):
+                    i, j = items[a], items[b]
+                    found.add((i, j) if i < j else (j, i))
+        return sorted(found)
+
+
+class CollisionDetector:
+    """
+    Finds captures between pieces from their positions in metres.
+
+    Given `now_ms`, a piece's position is taken from its trajectory (start
+    cell, target cell, start time and speed) at that time, not from
+    `Physics.pos_m`, which is truncated to whole metres and would put a
+    diagonal mover on cells it only passes next to.  Without `now_ms` the
+    stored `pos_m` is used as is.
+
+    Every piece is a box of one board cell at its position, hashed into a
+    grid of board cells, so only pieces sharing (or straddling into) a
+    cell are compared.  Two pieces collide when their positions are less
+    than `overlap` of a cell apart on both axes.
+
+    For a colliding pair of different colors, the piece that can capture
+    takes the one that can be captured.  If both could, the one that
+    started its movement first wins (an idle piece never captures).
+    Pairs are handled in piece-list order and a piece is captured at most
+    once, so the result does not depend on hashing order.
+    """
+
+    def __init__(self, board: Board, overlap: float = 0.5):
+        self.board = board
+        self.overlap = overlap
+        self.grid = SpatialHash(board.cell_W_m, board.cell_H_m)
+        self.last_pairs_tested = 0
+
+    def find_captures(self, pieces: List, now_ms: Optional[float] = None) -> List[Tuple[object, object]]:
+        """(capturer, captured) pairs for the positions at `now_ms`, in the order to apply them."""
+        w, h = self.board.cell_W_m, self.board.cell_H_m
+        self.grid.clear()
+        positions = []
+        for i, p in enumerate(pieces):
+            ph = p._state._physics
+            x, y = ph.pos_m if now_ms is None else trajectory(ph, self.board, now_ms).at(now_ms)
+            positions.append((x, y))
+            self.grid.insert(i, x, y, x + w, y + h)
+
+        pairs = self.grid.pairs()
+        self.last_pairs_tested = len(pairs)
+        captured: Set[int] = set()
+        result = []
+        for i, j in pairs:
+            if i in captured or j in captured:
+                continue
+            (xi, yi), (xj, yj) = positions[i], positions[j]
+            if abs(xi - xj) >= w * self.overlap or abs(yi - yj) >= h * self.overlap:
+                continue
+            outcome = self._capture(pieces[i], pieces[j])
+            if outcome is None:
+                continue
+            capturer, victim = outcome
+            captured.add(i if victim is pieces[i] else j)
+            result.append((capturer, victim))
+        return result
+
+    @staticmethod
+    def _capture(a, b) -> Optional[Tuple[object, object]]:
+        if piece_kind(a)[1] == piece_kind(b)[1]:
+            return None  # כלים מאותו צבע לא אוכלים זה את זה
+        pa, pb = a._state._physics, b._state._physics
+        a_wins = pa.can_capture() and pb.can_be_captured()
+        b_wins = pb.can_capture() and pa.can_be_captured()
+        if a_wins and b_wins:
+            ta = pa.start_time if pa.start_time is not None else math.inf
+            tb = pb.start_time if pb.start_time is not None else math.inf
+            b_wins = tb < ta
+            a_wins = not b_wins
+        if a_wins:
+            return a, b
+        if b_wins:
+            return b, a
+        return None
+
+
+class Motion:
+    """Straight-line movement in metres: from (x0, y0) at t0 with velocity
+    (vx, vy) per ms until t1, then standing still at the end point."""
+
+    def __init__(self, x0: float, y0: float, vx: float, vy: float, t0: float, t1: float):
+        self.x0, self.y0, self.vx, self.vy, self.t0, self.t1 = x0, y0, vx, vy, t0, t1
+        x1, y1 = self.at(t1)
+        self.bounds = (min(x0, x1), max(x0, x1), min(y0, y1), max(y0, y1))  # x min/max, y min/max
+
+    def at(self, t: float) -> Tuple[float, float]:
+        dt = min(max(t, self.t0), self.t1) - self.t0
+        return self.x0 + self.vx * dt, self.y0 + self.vy * dt
+
+    def velocity(self, t: float) -> Tuple[float, float]:
+        return (self.vx, self.vy) if self.t0 <= t < self.t1 else (0.0, 0.0)
+
+    def moving_at(self, t: float) -> bool:
+        return self.t0 <= t <= self.t1 and self.t1 > self.t0
+
+
+def trajectory(ph, board: Board, now_ms: float) -> Motion:
+    """The exact (unrounded) movement of a Physics; a piece that has not
+    started yet starts at `now_ms`."""
+    w, h = board.cell_W_m, board.cell_H_m
+    (cx, cy), (tx, ty) = ph.cell, ph.target_cell
+    x0, y0, x1, y1 = cx * w, cy * h, tx * w, ty * h
+    dist = math.hypot(x1 - x0, y1 - y0)
+    if dist == 0 or ph.speed_m_s <= 0 or isinstance(ph, IdlePhysics):
+        x, y = ph.pos_m
+        return Motion(x, y, 0.0, 0.0, now_ms, now_ms)
+    t0 = ph.start_time if ph.start_time is not None else now_ms
+    duration = dist / ph.speed_m_s * 1000.0
+    return Motion(x0, y0, (x1 - x0) / duration, (y1 - y0) / duration, t0, t0 + duration)
+
+
+def _axis_window(d: float, v: float, thr: float, lo: float, hi: float) -> Optional[Tuple[float, float]]:
+    """Times in [lo, hi] with |d + v * (t - lo)| < thr, as (start, end), or None."""
+    if v == 0:
+        return (lo, hi) if abs(d) < thr else None
+    a, b = (-thr - d) / v, (thr - d) / v
+    if a > b:
+        a, b = b, a
+    start, end = max(lo, lo + a), min(hi, lo + b)
+    return (start, end) if start < end else None
+
+
+class CollisionPredictor:
+    """
+    Predicts captures analytically instead of sampling positions per frame.
+
+    Every piece is tracked as a Motion.  When a piece starts moving,
+    `track` solves, against every other tracked piece, for the first time
+    their boxes come within `overlap` of a cell on both axes (the same
+    test as CollisionDetector), piecewise over the spans where both move
+    linearly.  The capturer is decided for that instant as in
+    CollisionDetector – a moving piece that can capture takes one that can
+    be captured, of two such movers the earlier starter wins – and the
+    event goes on a time-ordered heap.  A new movement or a capture
+    invalidates the pending events of its pieces through a version
+    number, so `pop_due` only returns events that still hold; it also
+    drops an event whose victim can no longer be captured in its current
+    state.
+    """
+
+    def __init__(self, board: Board, overlap: float = 0.5):
+        self.board = board
+        self.overlap = overlap
+        self._motions: Dict[int, Tuple[object, Motion]] = {}
+        self._version: Dict[int, int] = {}
+        self._heap: List[tuple] = []
+        self._seq = 0
+
+    def motion_of(self, piece, now_ms: float) -> Motion:
+        return trajectory(piece._state._physics, self.board, now_ms)
+
+    def track(self, piece, now_ms: float, predict: bool = True):
+        """(Re)load the movement of `piece` and, with `predict`, queue its future captures."""
+        key = id(piece)
+        self._version[key] = self._version.get(key, 0) + 1
+        motion = self.motion_of(piece, now_ms)
+        self._motions[key] = (piece, motion)
+        if not predict:
+            return
+        color = piece_kind(piece)[1]
+        thr_x = self.board.cell_W_m * self.overlap
+        thr_y = self.board.cell_H_m * self.overlap
+        ax0, ax1, ay0, ay1 = motion.bounds
+        for other_key, (other, other_motion) in self._motions.items():
+            if other_key == key or piece_kind(other)[1] == color:
+                continue
+            bx0, bx1, by0, by1 = other_motion.bounds
+            if bx0 - ax1 >= thr_x or ax0 - bx1 >= thr_x or by0 - ay1 >= thr_y or ay0 - by1 >= thr_y:
+                continue  # המסלולים רחוקים מדי
+            hit = self._first_contact(motion, other_motion, now_ms)
+            if hit is None:
+                continue
+            outcome = self._capturer(piece, motion, other, other_motion, hit)
+            if outcome is not None:
+                capturer, victim = outcome
+                self._seq += 1
+                heapq.heappush(self._heap, (hit, self._seq, capturer, victim,
+                                            self._version[id(capturer)], self._version[id(victim)]))
+
+    def forget(self, piece):
+        key = id(piece)
+        self._motions.pop(key, None)
+        self._version[key] = self._version.get(key, 0) + 1
+
+    def pop_due(self, now_ms: float) -> List[Tuple[float, object, object]]:
+        """(time, capturer, captured) of the still valid events up to `now_ms`, in time order."""
+        due = []
+        dead = set()
+        while self._heap and self._heap[0][0] <= now_ms:
+            t, _, capturer, victim, v_cap, v_vic = heapq.heappop(self._heap)
+            a, b = id(capturer), id(victim)
+            if a in dead or b in dead or a not in self._motions or b not in self._motions:
+                continue
+            if self._version[a] != v_cap or self._version[b] != v_vic:
+                continue  # אחד הכלים שינה תנועה מאז החיזוי
+            if not victim._state._physics.can_be_captured():
+                continue
+            dead.add(b)
+            due.append((t, capturer, victim))
+        return due
+
+    def _first_contact(self, m1: Motion, m2: Motion, now_ms: float) -> Optional[float]:
+        thr_x = self.board.cell_W_m * self.overlap
+        thr_y = self.board.cell_H_m * self.overlap
+        end = max(m1.t1, m2.t1, now_ms)
+        cuts = sorted({now_ms, end} | {t for t in (m1.t1, m2.t1) if now_ms < t < end})
+        spans = list(zip(cuts, cuts[1:])) or [(now_ms, now_ms)]
+        for lo, hi in spans:
+            (x1, y1), (x2, y2) = m1.at(lo), m2.at(lo)
+            mid = (lo + hi) / 2
+            (vx1, vy1), (vx2, vy2) = m1.velocity(mid), m2.velocity(mid)
+            hi_open = hi if hi > lo else lo + 1e-9
+            wx = _axis_window(x1 - x2, vx1 - vx2, thr_x, lo, hi_open)
+            wy = _axis_window(y1 - y2, vy1 - vy2, thr_y, lo, hi_open)
+            if wx is None or wy is None:
+                continue
+            start, stop = max(wx[0], wy[0]), min(wx[1], wy[1])
+            if start < stop:
+                return start
+        return None
+
+    @staticmethod
+    def _capturer(a, ma: Motion, b, mb: Motion, t: float) -> Optional[Tuple[object, object]]:
+        pa, pb = a._state._physics, b._state._physics
+        a_wins = ma.moving_at(t) and pa.can_capture() and pb.can_be_captured()
+        b_wins = mb.moving_at(t) and pb.can_capture() and pa.can_be_captured()
+        if a_wins and b_wins:
+            return (a, b) if ma.t0 <= mb.t0 else (b, a)
+        if a_wins:
+            return a, b
+        if b_wins:
+            return b, a
+        return None
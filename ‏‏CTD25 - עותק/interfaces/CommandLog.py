@@ -0,0 +1,472 @@
+
+import bisect
+import mmap
+import pathlib
+import struct
+from dataclasses import dataclass, field
+from typing import BinaryIO, Dict, List, Optional, Tuple
+from .Command import Command
+from .Game import ScriptResult
+from .GameLoop import ScaledClock, VirtualClock
+from .Rollback import StateHistory
+from .Snapshot import decode as decode_snapshot, encode as encode_snapshot
+
+MAGIC = b"CTDL"
+VERSION = 1
+HEADER = struct.Struct("<4sId")          # magic, version, tick rate (Hz)
+
+# every record starts with a kind byte
+CMD = 1
+PIECE_NAME = 2
+TYPE_NAME = 3
+FRAME = 4
+END = 5
+KEYFRAME = 6
+INDEX = 7
+FOOTER = 8
+ROLLBACK = 9
+
+CMD_REC = struct.Struct("<BIHBBbbbb")    # kind, t, piece idx, type idx, n cells, x0, y0, x1, y1
+NAME_REC = struct.Struct("<BHB")         # kind, idx, utf-8 length (bytes follow)
+FRAME_REC = struct.Struct("<BIQ")        # kind, t, position hash
+END_REC = struct.Struct("<BI")           # kind, t
+ROLLBACK_REC = struct.Struct("<BI")      # kind, t of the tick after which it ran; a CMD record follows
+KEY_REC = struct.Struct("<BIQI")         # kind, t, position hash, payload length (bytes follow)
+INDEX_REC = struct.Struct("<BHHI")       # kind, piece names, type names, keyframes
+INDEX_KEY = struct.Struct("<IQ")         # t, byte offset of the keyframe record
+FOOTER_REC = struct.Struct("<BQ")        # kind, byte offset of the index record – always last
+KIND = struct.Struct("<B")
+_FIXED = {CMD: CMD_REC, FRAME: FRAME_REC, END: END_REC, ROLLBACK: ROLLBACK_REC}
+
+
+def _record_end(data, off: int, path=None) -> Optional[int]:
+    """Offset just past the record at `off`; None if the record runs past the
+    end of `data` (a log cut off mid-record by a crash)."""
+    kind = data[off]
+    rec = _FIXED.get(kind)
+    if rec is not None:
+        end = off + rec.size
+    elif kind in (PIECE_NAME, TYPE_NAME, KEYFRAME):
+        head = NAME_REC if kind != KEYFRAME else KEY_REC
+        if off + head.size > len(data):
+            return None
+        end = off + head.size + head.unpack_from(data, off)[-1]
+    else:
+        raise ValueError(f"Corrupt command log {path or ''} at byte {off}")
+    return end if end <= len(data) else None
+
+
+class CommandRecorder:
+    """
+    Writes every command a Game processes to an append-only binary log.
+
+    Commands are fixed-width 13-byte records: time (ms since the game
+    loop started), interned piece id and command type, and up to two
+    cells as signed bytes.  An id or type is spelled out once, in a name
+    record written just before its first use.  After every tick whose
+    position hash changed a frame record (time, hash) is written, and
+    `close` ends the log with the time of the last tick, so a replay
+    knows how long to run and can check it reached the same positions.
+    A late command the game rolled back in (`Game.rollback`) is written
+    as a rollback record – the time of the tick after which it ran –
+    followed by the command at the tick it was applied on; the frames
+    logged before it stay as they were then.
+
+    With `keyframe_ms`, a keyframe – a full `Game.snapshot` – is written
+    after the first tick and then every `keyframe_ms` of game time.
+    `close` appends an index (all interned names, time -> byte offset of
+    every keyframe) and a fixed-size footer pointing at it, so ReplayReader
+    can seek without reading the log from the start.
+
+    Attach it with `game.recorder = recorder` before `run`/`run_script`.
+    """
+
+    def __init__(self, path: pathlib.Path, keyframe_ms: Optional[int] = None):
+        self.path = pathlib.Path(path)
+        self.keyframe_ms = keyframe_ms
+        self._f: Optional[BinaryIO] = None
+        self._game = None
+        self._pieces: Dict[str, int] = {}
+        self._types: Dict[str, int] = {}
+        self._keyframes: List[Tuple[int, int]] = []
+        self._next_key = 0
+        self._start_ms = 0
+        self._last_hash: Optional[int] = None
+        self._last_ms = 0
+
+    def start(self, game, start_ms: int, tick_hz: float):
+        self._f = open(self.path, "wb")
+        self._f.write(HEADER.pack(MAGIC, VERSION, tick_hz))
+        self._game = game
+        self._pieces.clear()
+        self._types.clear()
+        self._keyframes.clear()
+        self._next_key = 0
+        self._start_ms = start_ms
+        self._last_hash = None
+
+    def _intern(self, table: Dict[str, int], kind: int, name: str) -> int:
+        idx = table.get(name)
+        if idx is None:
+            idx = table[name] = len(table)
+            raw = name.encode()
+            self._f.write(NAME_REC.pack(kind, idx, len(raw)) + raw)
+        return idx
+
+    def command(self, cmd: Command, now_ms: int):
+        piece = self._intern(self._pieces, PIECE_NAME, cmd.piece_id)
+        kind = self._intern(self._types, TYPE_NAME, cmd.type)
+        cells = [tuple(c) for c in cmd.params[:2]]
+        coords = [v for c in cells for v in c] + [0] * (4 - 2 * len(cells))
+        self._f.write(CMD_REC.pack(CMD, now_ms - self._start_ms, piece, kind, len(cells), *coords))
+
+    def rollback(self, cmd: Command, now_ms: int):
+        """`cmd` was rolled back in at its timestamp after the tick at `now_ms`."""
+        self._f.write(ROLLBACK_REC.pack(ROLLBACK, now_ms - self._start_ms))
+        self.command(cmd, cmd.timestamp)
+
+    def frame(self, now_ms: int, pos_hash: int):
+        self._last_ms = now_ms - self._start_ms
+        if pos_hash != self._last_hash:
+            self._last_hash = pos_hash
+            self._f.write(FRAME_REC.pack(FRAME, self._last_ms, pos_hash))
+        if self.keyframe_ms and self._last_ms >= self._next_key:
+            self._next_key = self._last_ms + self.keyframe_ms
+            payload = encode_snapshot(self._game.snapshot(self._start_ms))
+            self._keyframes.append((self._last_ms, self._f.tell()))
+            self._f.write(KEY_REC.pack(KEYFRAME, self._last_ms, pos_hash, len(payload)) + payload)
+
+    def close(self):
+        if self._f is None:
+            return
+        f = self._f
+        f.write(END_REC.pack(END, self._last_ms))
+        index_at = f.tell()
+        f.write(INDEX_REC.pack(INDEX, len(self._pieces), len(self._types), len(self._keyframes)))
+        for table in (self._pieces, self._types):
+            for name in table:  # לפי סדר האינדקסים
+                raw = name.encode()
+                f.write(bytes([len(raw)]) + raw)
+        for t, offset in self._keyframes:
+            f.write(INDEX_KEY.pack(t, offset))
+        f.write(FOOTER_REC.pack(FOOTER, index_at))
+        f.close()
+        self._f = None
+
+    def __enter__(self) -> "CommandRecorder":
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+@dataclass
+class GameLog:
+    tick_hz: float
+    commands: List[Command] = field(default_factory=list)
+    frames: List[Tuple[int, int]] = field(default_factory=list)   # (time, position hash)
+    rollbacks: List[Tuple[int, Command]] = field(default_factory=list)  # (time it ran after, command)
+    end_ms: int = 0
+
+
+def read_log(path: pathlib.Path) -> GameLog:
+    data = pathlib.Path(path).read_bytes()
+    magic, version, tick_hz = HEADER.unpack_from(data)
+    if magic != MAGIC or version != VERSION:
+        raise ValueError(f"{path} is not a version {VERSION} command log")
+    log = GameLog(tick_hz)
+    names: Dict[int, Dict[int, str]] = {PIECE_NAME: {}, TYPE_NAME: {}}
+    off, end, rolled_at = HEADER.size, None, None
+    while off < len(data):
+        kind, = KIND.unpack_from(data, off)
+        if kind in (INDEX, FOOTER):
+            break  # האינדקס והסיומת נמצאים אחרי רשומת הסיום
+        if _record_end(data, off, path) is None:
+            break  # נחתך באמצע רשומה – עד הרשומה השלמה האחרונה
+        if kind == CMD:
+            _, t, piece, ctype, n, *coords = CMD_REC.unpack_from(data, off)
+            cells = [(coords[2 * i], coords[2 * i + 1]) for i in range(n)]
+            cmd = Command(t, names[PIECE_NAME][piece], names[TYPE_NAME][ctype], cells)
+            if rolled_at is None:
+                log.commands.append(cmd)
+            else:
+                log.rollbacks.append((rolled_at, cmd))
+                rolled_at = None
+            off += CMD_REC.size
+        elif kind == ROLLBACK:
+            _, rolled_at = ROLLBACK_REC.unpack_from(data, off)
+            off += ROLLBACK_REC.size
+        elif kind in (PIECE_NAME, TYPE_NAME):
+            _, idx, length = NAME_REC.unpack_from(data, off)
+            off += NAME_REC.size
+            names[kind][idx] = data[off:off + length].decode()
+            off += length
+        elif kind == FRAME:
+            _, t, pos_hash = FRAME_REC.unpack_from(data, off)
+            log.frames.append((t, pos_hash))
+            off += FRAME_REC.size
+        elif kind == END:
+            _, end = END_REC.unpack_from(data, off)
+            off += END_REC.size
+        elif kind == KEYFRAME:
+            off += KEY_REC.size + KEY_REC.unpack_from(data, off)[3]
+    # בלי רשומת סיום (המשחק קרס) – עד האירוע האחרון שנרשם
+    last = max([t for t, _ in log.frames] + [c.timestamp for c in log.commands]
+               + [t for t, _ in log.rollbacks] + [0])
+    log.end_ms = last if end is None else end
+    return log
+
+
+class _FrameCheck:
+    """Stands in for the recorder during a replay and compares position hashes."""
+
+    def __init__(self, frames: List[Tuple[int, int]]):
+        self.expected = dict(frames)
+        self.mismatches: List[Tuple[int, Optional[int], int]] = []   # (time, logged, replayed)
+        self.checked = 0
+        self._last_hash: Optional[int] = None
+
+    def start(self, game, start_ms: int, tick_hz: float):
+        self._last_hash = None
+
+    def command(self, cmd: Command, now_ms: int):
+        pass
+
+    def rollback(self, cmd: Command, now_ms: int):
+        pass
+
+    def frame(self, now_ms: int, pos_hash: int):
+        logged = self.expected.get(now_ms)
+        if logged is not None:
+            self.checked += 1
+        if pos_hash != self._last_hash or logged is not None:
+            if logged != pos_hash:
+                self.mismatches.append((now_ms, logged, pos_hash))
+        self._last_hash = pos_hash
+
+
+@dataclass
+class ReplayResult:
+    result: ScriptResult
+    frames_checked: int
+    mismatches: List[Tuple[int, Optional[int], int]]
+
+    @property
+    def ok(self) -> bool:
+        return not self.mismatches
+
+
+class _RollbackPlayer:
+    """run_script policy that rolls the logged late commands back in, each
+    right after the tick it originally ran after."""
+
+    def __init__(self, rollbacks: List[Tuple[int, Command]]):
+        self.pending = sorted(rollbacks, key=lambda r: r[0])
+
+    def __call__(self, game, now: int) -> List[Command]:
+        while self.pending and self.pending[0][0] < now:
+            game.rollback(self.pending.pop(0)[1])
+        return []
+
+
+def _history_for(game, rollbacks: List[Tuple[int, Command]], tick_hz: float):
+    """A fresh StateHistory deep enough for every rollback in the log."""
+    deepest = max(at - cmd.timestamp for at, cmd in rollbacks)
+    game.history = StateHistory(max(game.history.depth if game.history else 0,
+                                    int(deepest * tick_hz / 1000) + 2))
+
+
+def replay(game, path: pathlib.Path, speed: Optional[float] = None) -> ReplayResult:
+    """
+    Feed a recorded log back into a fresh `game` (same board and pieces as
+    the recorded one) and check every tick's position hash against the
+    log.  With `speed=None` it runs as fast as the CPU allows on a
+    VirtualClock; otherwise `speed` game seconds pass per wall second.
+    Logged rollbacks are rolled back in again, on a StateHistory the
+    game is given for it.
+    """
+    log = read_log(path)
+    check = _FrameCheck(log.frames)
+    policy = None
+    if log.rollbacks:
+        _history_for(game, log.rollbacks, log.tick_hz)
+        policy = _RollbackPlayer(log.rollbacks)
+    game.recorder = check
+    try:
+        clock = VirtualClock() if speed is None else ScaledClock(speed)
+        result = game.run_script(log.commands, until_ms=log.end_ms, tick_hz=log.tick_hz, clock=clock,
+                                 policy=policy)
+    finally:
+        game.recorder = None
+    return ReplayResult(result, check.checked, check.mismatches)
+
+
+class ReplayReader:
+    """
+    Random access to a recorded log through a read-only memory map.
+
+    The footer leads to the index: the interned names and the keyframe
+    offsets.  `seek_keyframe` finds the last keyframe at or before a time
+    by bisection, and `commands` (and `rollbacks`) decode only the records
+    between two offsets.  A log without an index (the game did not close it) is
+    scanned once to rebuild it.
+    """
+
+    def __init__(self, path: pathlib.Path):
+        self.path = pathlib.Path(path)
+        self._file = open(self.path, "rb")
+        self.data = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, self.tick_hz = HEADER.unpack_from(self.data)
+        if magic != MAGIC or version != VERSION:
+            self.close()
+            raise ValueError(f"{path} is not a version {VERSION} command log")
+        self.names: Dict[int, List[str]] = {PIECE_NAME: [], TYPE_NAME: []}
+        self.keyframes: List[Tuple[int, int]] = []
+        self.end_ms = 0
+        if not self._read_index():
+            self._scan()
+        self._times = [t for t, _ in self.keyframes]
+
+    def _read_index(self) -> bool:
+        data = self.data
+        if len(data) < HEADER.size + FOOTER_REC.size:
+            return False
+        footer_at = len(data) - FOOTER_REC.size
+        kind, index_at = FOOTER_REC.unpack_from(data, footer_at)
+        if (kind != FOOTER or not HEADER.size + END_REC.size <= index_at <= footer_at - INDEX_REC.size
+                or data[index_at] != INDEX or data[index_at - END_REC.size] != END):
+            return False  # סיומת לא אמיתית (למשל בייט 8 בסוף לוג שנחתך)
+        _, end_ms = END_REC.unpack_from(data, index_at - END_REC.size)
+        _, n_pieces, n_types, n_keys = INDEX_REC.unpack_from(data, index_at)
+        names: Dict[int, List[str]] = {PIECE_NAME: [], TYPE_NAME: []}
+        off = index_at + INDEX_REC.size
+        try:
+            for kind, count in ((PIECE_NAME, n_pieces), (TYPE_NAME, n_types)):
+                for _ in range(count):
+                    length = data[off]
+                    if off + 1 + length > footer_at:
+                        return False
+                    names[kind].append(data[off + 1:off + 1 + length].decode())
+                    off += 1 + length
+        except (IndexError, UnicodeDecodeError):
+            return False
+        if off + n_keys * INDEX_KEY.size != footer_at:
+            return False
+        self.names, self.end_ms = names, end_ms
+        self.keyframes = [INDEX_KEY.unpack_from(data, off + i * INDEX_KEY.size) for i in range(n_keys)]
+        return True
+
+    def _scan(self):
+        log = read_log(self.path)
+        self.end_ms = log.end_ms
+        for c in log.commands:
+            for kind, name in ((PIECE_NAME, c.piece_id), (TYPE_NAME, c.type)):
+                if name not in self.names[kind]:
+                    self.names[kind].append(name)
+        data, off = self.data, HEADER.size
+        while off < len(data) and data[off] not in (INDEX, FOOTER):
+            nxt = _record_end(data, off, self.path)
+            if nxt is None:
+                break  # רשומה חלקית בסוף
+            if data[off] == KEYFRAME:
+                self.keyframes.append((KEY_REC.unpack_from(data, off)[1], off))
+            off = nxt
+
+    def seek_keyframe(self, t_ms: int) -> Optional[Tuple[int, int]]:
+        """(time, offset) of the last keyframe at or before `t_ms`, or None."""
+        i = bisect.bisect_right(self._times, t_ms)
+        return self.keyframes[i - 1] if i else None
+
+    def keyframe(self, offset: int) -> Tuple[int, int, dict]:
+        """(time, position hash, snapshot) of the keyframe record at `offset`."""
+        _, t, pos_hash, length = KEY_REC.unpack_from(self.data, offset)
+        start = offset + KEY_REC.size
+        return t, pos_hash, decode_snapshot(self.data[start:start + length])
+
+    def commands(self, start: int = HEADER.size, until_ms: Optional[int] = None) -> List[Command]:
+        """Commands recorded from byte `start` on, up to time `until_ms`."""
+        return self._decode(start, until_ms)[0]
+
+    def rollbacks(self, start: int = HEADER.size, until_ms: Optional[int] = None) -> List[Tuple[int, Command]]:
+        """(time it ran after, command) of the rollbacks recorded from byte `start` on, up to `until_ms`."""
+        return self._decode(start, until_ms)[1]
+
+    def _decode(self, start: int, until_ms: Optional[int]) -> Tuple[List[Command], List[Tuple[int, Command]]]:
+        data, off, out, rolled = self.data, start, [], []
+        pieces, types = self.names[PIECE_NAME], self.names[TYPE_NAME]
+        rolled_at = None
+        while off < len(data):
+            kind = data[off]
+            if kind in (END, INDEX, FOOTER) or _record_end(data, off, self.path) is None:
+                break
+            if kind == CMD:
+                _, t, piece, ctype, n, *coords = CMD_REC.unpack_from(data, off)
+                cmd = Command(t, pieces[piece], types[ctype],
+                              [(coords[2 * i], coords[2 * i + 1]) for i in range(n)])
+                if rolled_at is not None:
+                    rolled.append((rolled_at, cmd))  # t הוא הטיק שעליו הוחלה – מוקדם מהזמן הנוכחי
+                    rolled_at = None
+                elif until_ms is not None and t > until_ms:
+                    break
+                else:
+                    out.append(cmd)
+                off += CMD_REC.size
+            elif kind == ROLLBACK:
+                _, rolled_at = ROLLBACK_REC.unpack_from(data, off)
+                if until_ms is not None and rolled_at > until_ms:
+                    break
+                off += ROLLBACK_REC.size
+            elif kind == KEYFRAME:
+                off += KEY_REC.size + KEY_REC.unpack_from(data, off)[3]
+            elif kind in (PIECE_NAME, TYPE_NAME):
+                off += NAME_REC.size + NAME_REC.unpack_from(data, off)[2]
+            elif kind == FRAME:
+                if until_ms is not None and FRAME_REC.unpack_from(data, off)[1] > until_ms:
+                    break
+                off += FRAME_REC.size
+        return out, rolled
+
+    def close(self):
+        self.data.close()
+        self._file.close()
+
+    def __enter__(self) -> "ReplayReader":
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def seek(game, path: pathlib.Path, t_ms: int) -> ScriptResult:
+    """
+    Bring a fresh `game` (same board as the recorded one) to time `t_ms`
+    of the log: restore the last keyframe at or before it and play only
+    the commands recorded after that keyframe.  A logged rollback that
+    reaches back to the keyframe or before it starts from an earlier one.
+    """
+    with ReplayReader(path) as reader:
+        tick_hz = reader.tick_hz
+        rollbacks = reader.rollbacks(until_ms=t_ms)
+        key = reader.seek_keyframe(t_ms)
+        while key is not None:
+            early = [cmd.timestamp for at, cmd in rollbacks
+                     if at >= key[0] and cmd.timestamp < key[0] + 2000 / tick_hz]
+            if not early:
+                break
+            key = reader.seek_keyframe(min(early) - 2000 / tick_hz)
+        if key is None:
+            commands, snap, key_ms = reader.commands(until_ms=t_ms), None, 0
+        else:
+            key_ms, offset = key
+            _, _, snap = reader.keyframe(offset)
+            commands = reader.commands(offset, until_ms=t_ms)
+            rollbacks = [r for r in rollbacks if r[0] >= key_ms]  # קודמים לזה כבר בתוך ה-keyframe
+    policy = None
+    if rollbacks:
+        _history_for(game, rollbacks, tick_hz)
+        policy = _RollbackPlayer(rollbacks)
+    if snap is None:
+        return game.run_script(commands, until_ms=t_ms, tick_hz=tick_hz, clock=VirtualClock(), policy=policy)
+    game.restore(snap)
+    return game.run_script(commands, until_ms=t_ms, tick_hz=tick_hz, clock=VirtualClock(key_ms / 1000),
+                           resume=True, policy=policy)
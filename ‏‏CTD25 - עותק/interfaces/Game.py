@@ -104,34 +104,118 @@ import inspect
 import pathlib
 import queue, threading, time, cv2, math
 import numpy as np
-from typing import List, Dict, Tuple, Optional
+from dataclasses import dataclass, field
+from typing import Callable, Iterable, List, Dict, Tuple, Optional
 from .Board   import Board
 from .Command import Command
 from .Piece   import Piece
+from .Physics import IdlePhysics
+from .State   import State
 from .img     import Img
+from .Renderer import DirtyRectRenderer
+from .Bitboard import BitboardPosition
+from .Collisions import CollisionPredictor
+from .GameLoop import FixedStepLoop, LoopStats, ScaledClock, VirtualClock
+from .PhysicsBatch import PhysicsBatch
+from .Rollback import RollbackReport
+from .Scheduler import Scheduler
+from .MoveCache import MoveCache
+from .MoveGen import LegalMoves, MoveGen
+from .Zobrist import TranspositionCache
 
 class InvalidBoard(Exception): ...
 
+
+@dataclass
+class GameEvent:
+    time_ms: int
+    kind: str               # "command" | "rejected" | "capture"
+    piece_id: str
+    data: Tuple = ()        # command: (from, to) | capture: (victim id, victim cell)
+
+
+@dataclass
+class ScriptResult:
+    """Outcome of `Game.run_script`: the final position and what happened on the way."""
+    end_ms: int
+    position: Dict[Tuple[int, int], str]   # (row, col) -> piece id
+    position_hash: int
+    events: List[GameEvent] = field(default_factory=list)
+    stats: Optional[LoopStats] = None
+
+
+def _find_state(state: State, name: str) -> State:
+    """The state called `name` in the state machine `state` belongs to."""
+    seen, pending = set(), [state]
+    while pending:
+        s = pending.pop()
+        if s.name == name:
+            return s
+        if id(s) not in seen:
+            seen.add(id(s))
+            pending.extend(s.transitions.values())
+    raise KeyError(f"No state {name!r} reachable from {state.name!r}")
+
+
 class Game:
-    def __init__(self, pieces: List[Piece], board: Board):
+    def __init__(self, pieces: List[Piece], board: Board, batch_physics: bool = False,
+                 headless: bool = False, clock: Optional[Callable[[], float]] = None):
+        """With `batch_physics` all pieces' physics is advanced in one
+        vectorized PhysicsBatch step per tick instead of piece by piece.
+        A `headless` game never draws or opens a window.  `clock` (seconds,
+        default `time.monotonic`) is the source of game time – pass a
+        VirtualClock to run faster than real time."""
         self.pieces = pieces
+        self._slots = list(pieces)  # הסדר המקורי – מזהה יציב לכל כלי
         self.board = board
+        self.headless = headless
+        self.clock = clock or time.monotonic
+        self.events: List[GameEvent] = []
+        self.recorder = None  # CommandRecorder – מקליט את הפקודות והמיקומים
+        self.history = None   # StateHistory – מאפשר rollback לפקודות שהגיעו באיחור
         self.user_input_queue = queue.Queue()
-        self._start_time = time.monotonic()
+        self._start_time = self.clock()
         self._input_thread = None
-        self.board_state = [[None for _ in range(8)] for _ in range(8)]  # לוח 8x8 מאוחסן ב-None
+        self._renderer = DirtyRectRenderer(board)
+        self.position = BitboardPosition(board.H_cells, board.W_cells)
+        self.tt = TranspositionCache()  # נתונים נגזרים לפי hash של העמדה
+        self.move_cache = MoveCache(self.position)
+        self._predictor = CollisionPredictor(board)
+        self._now = 0  # זמן הטיק האחרון
+        self._physics_batch = PhysicsBatch(board) if batch_physics else None
+        self._scheduler = Scheduler()  # מי צריך עדכון ומתי
+        self._move_gen = MoveGen()
 
         # אתחול הלוח עם הכלים
         self.initialize_board()
 
     def initialize_board(self):
         for piece in self.pieces:
-            x, y = piece._state._physics.get_pos()  # נניח שיש למלך מיקום (x, y)
-            print(x, y )
-            self.board_state[y][x] = piece  # שמירה של הכלי במיקום המתאים בלוח
+            x, y = piece._state._physics.cell  # תא הכלי (x, y)
+            self.position.place(piece, (y, x), piece._state.name)
+            self._scheduler.schedule(piece, 0)
+            self._predictor.track(piece, 0, predict=False)
+
+    def _sync_states(self, pieces: Optional[List[Piece]] = None):
+        """Fold state switches (move -> long_rest -> idle ...) into the position hash."""
+        for p in self.pieces if pieces is None else pieces:
+            cell = self.position.cell_of(p)
+            if cell is not None:
+                self.position.set_state(cell, p._state.name)
+
+    def legal_moves(self) -> LegalMoves:
+        """Legal moves of every piece, memoized per position hash.
+        Rows follow the position's squares, not piece identity."""
+        return self.tt.get_or_compute(self.position.hash, "legal_moves",
+                                      lambda: self._move_gen.generate(self.position))
+
+    def attack_map(self, color: str) -> int:
+        """Squares attacked by `color`, as a bit mask, memoized per position hash."""
+        return self.tt.get_or_compute(self.position.hash, ("attacks", color),
+                                      lambda: self.position.attacks(color))
 
     def game_time_ms(self) -> int:
-        return int((time.monotonic() - self._start_time) * 1000)
+        return int((self.clock() - self._start_time) * 1000)
 
     def clone_board(self) -> Board:
         return self.board.clone()
@@ -144,61 +228,335 @@ class Game:
         self._input_thread = threading.Thread(target=run, daemon=True)
         self._input_thread.start()
 
-    def run(self):
-        """Main game loop."""
-        self.start_user_input_thread()  # QWe2e5
+    def run(self, tick_hz: float = 100.0, render_hz: float = 60.0, report: bool = False):
+        """Main game loop: the simulation advances in fixed ticks of
+        1000 / `tick_hz` ms, drawing is capped at `render_hz` frames a
+        second.  `report` prints the achieved rates at the end."""
+        if not self.headless:
+            self.start_user_input_thread()  # QWe2e5
 
         start_ms = self.game_time_ms()
-        for p in self.pieces:
-            p.reset(start_ms)
+        self._reset_pieces(start_ms)
+        if self.recorder is not None:
+            self.recorder.start(self, start_ms, tick_hz)
+        if self.history is not None:
+            self.history.clear()
 
         # ─────── main loop ──────────────────────────────────────────────────
-        while not self._is_win():
-            now = self.game_time_ms()  # monotonic time ! not computer time.
-
-            # (1) update physics & animations
-            for p in self.pieces:
-                p.update(now)
-
-            # (2) handle queued Commands from mouse thread
-            while not self.user_input_queue.empty():  # QWe2e5
-                cmd: Command = self.user_input_queue.get()
-                self._process_input(cmd)
-
-            # (3) draw current position
-            self._draw()
-            if not self._show():  # returns False if user closed window
-                break
-
-            # (4) detect captures
-            self._resolve_collisions()
+        self.loop = self._make_loop(tick_hz, render_hz)
+        stats = self.loop.run(start_ms, self._tick, self._render, done=self._is_win)
+        if report:
+            print(stats.report())
 
         self._announce_win()
-        cv2.destroyAllWindows()
+        if not self.headless:
+            cv2.destroyAllWindows()
+
+    def run_script(self, commands: Iterable[Command], until_ms: Optional[int] = None,
+                   settle_ms: int = 5000, tick_hz: float = 100.0,
+                   policy: Optional[Callable[["Game", int], Iterable[Command]]] = None,
+                   clock: Optional[Callable[[], float]] = None, resume: bool = False) -> ScriptResult:
+        """
+        Play timed `commands` headless on a virtual clock, as fast as the
+        CPU allows, and return the final position and the event log.
+
+        Each command is handed to the game on the first tick at or after
+        its timestamp (ms since the start of the script).  The game runs
+        until `until_ms`, by default `settle_ms` after the last command.
+        A `policy` (a bot) is asked every tick for more commands to play.
+        `clock` replaces the game clock (default: a VirtualClock).  With
+        `resume` the game continues from its current time (after `restore`)
+        instead of starting over from 0.
+        """
+        script = sorted(commands, key=lambda c: c.timestamp)
+        if until_ms is None:
+            until_ms = (script[-1].timestamp if script else 0) + settle_ms
+        self.headless = True
+        if clock is not None or not isinstance(self.clock, VirtualClock):
+            self.clock = clock or VirtualClock()
+            self._start_time = self.clock()
+        first_tick = 0
+        if resume:
+            first_tick = round(self._now * tick_hz / 1000) + 1
+        else:
+            self.events = []
+            self._reset_pieces(0)
+            if self.recorder is not None:
+                self.recorder.start(self, 0, tick_hz)
+            if self.history is not None:
+                self.history.clear()
+        pending = iter(script)
+        nxt = next(pending, None)
+
+        def step(now: int):
+            nonlocal nxt
+            while nxt is not None and nxt.timestamp <= now:
+                self.user_input_queue.put(nxt)
+                nxt = next(pending, None)
+            if policy is not None:
+                for cmd in policy(self, now):
+                    self.user_input_queue.put(cmd)
+            self._tick(now)
+
+        ticks = max(0, int(until_ms * tick_hz / 1000) + 1 - first_tick)
+        stats = self._make_loop(tick_hz, tick_hz).run(0, step, self._render, done=self._is_win,
+                                                       max_ticks=ticks, first_tick=first_tick)
+        position = {self.position.cell(sq): p.piece_id
+                    for sq, p in sorted(self.position.pieces.items())}
+        return ScriptResult(self._now, position, self.position.hash, list(self.events), stats)
+
+    def snapshot(self, offset_ms: int = 0) -> dict:
+        """
+        Full state of the game at the last tick, as plain data: every
+        piece's current State, its Physics progress and Graphics frame
+        timing, and the position (which square each piece holds there,
+        the unmoved flags).  Pieces are identified by their index in the
+        list the game was created with.  Times are given relative to
+        `offset_ms`.  A position resting on its cell and the cells of the
+        command being carried out (always cell -> target) are left out.
+        See Snapshot.encode for the packed form.
+        """
+        w, h = self.board.cell_W_m, self.board.cell_H_m
+        slots = {id(p): i for i, p in enumerate(self._slots)}
+        entries = []
+        for p in self.pieces:
+            state, ph, gr = p._state, p._state._physics, p._state._graphics
+            sq = self.position._square_of.get(id(p))
+            start = getattr(gr, "_start_time", None)
+            entries.append({
+                "slot": slots[id(p)],
+                "state": state.name,
+                "square": sq,
+                "cell": list(ph.cell), "target": list(ph.target_cell),
+                "start": None if ph.start_time is None else ph.start_time - offset_ms,
+                "pos": None if ph.pos_m == (int(ph.cell[0] * w), int(ph.cell[1] * h)) else list(ph.pos_m),
+                "cmd": None if ph.cmd is None else ph.cmd.type,
+                "frame_start": None if start is None else start - offset_ms,
+                "frame": gr._frame_index,
+            })
+        return {"now": self._now - offset_ms, "unmoved": self.position.unmoved,
+                "hash": self.position.hash, "pieces": entries}
+
+    def restore(self, snap: dict, offset_ms: int = 0):
+        """Put the game back into a `snapshot` taken from a game created
+        from the same board (times shifted by `offset_ms`)."""
+        pieces = []
+        for e in snap["pieces"]:
+            piece = self._slots[e["slot"]]
+            state = _find_state(piece._state, e["state"])
+            ph, gr = state._physics, state._graphics
+            ph.cell, ph.target_cell = tuple(e["cell"]), tuple(e["target"])
+            ph.start_time = None if e["start"] is None else e["start"] + offset_ms
+            if e["pos"] is None:
+                ph.pos_m = (int(ph.cell[0] * self.board.cell_W_m), int(ph.cell[1] * self.board.cell_H_m))
+            else:
+                ph.pos_m = tuple(e["pos"])
+            ph.cmd = None
+            if e["cmd"] is not None:
+                ph.cmd = Command(snap["now"] + offset_ms, piece.piece_id, e["cmd"], [ph.cell, ph.target_cell])
+            state._cmd = ph.cmd
+            if gr.total_frames == 0:
+                gr.load_sprites()
+            if e["frame_start"] is None:
+                gr.__dict__.pop("_start_time", None)
+            else:
+                gr._start_time = e["frame_start"] + offset_ms
+            gr._frame_index = e["frame"]
+            gr.current_frame = Img() if e["frame"] is None else gr.sprites[e["frame"]]
+            piece._state = state
+            pieces.append(piece)
+
+        position = self.position
+        for sq in list(position.pieces):
+            position.remove(position.cell(sq))
+        for e, piece in zip(snap["pieces"], pieces):
+            if e["square"] is not None:
+                position.place(piece, position.cell(e["square"]), e["state"])
+        position.unmoved = snap["unmoved"]
+        position.hash = position.compute_hash()
+        self.move_cache.clear()
 
-    def _process_input(self, cmd: Command):
+        self.pieces = pieces
+        self._now = now = snap["now"] + offset_ms
+        self._scheduler = Scheduler()
+        self._predictor = CollisionPredictor(self.board)
+        for p in pieces:
+            self._scheduler.schedule(p, Scheduler.next_due(p, now))
+            self._predictor.track(p, now, predict=False)
+        for p in pieces:
+            ph = p._state._physics
+            if not isinstance(ph, IdlePhysics) and ph.cell != ph.target_cell:
+                self._predictor.track(p, now)  # רק כלים בדרך יכולים לאכול
+
+    def _reset_pieces(self, start_ms: int):
         for p in self.pieces:
-            if p.piece_id == cmd.piece_id:
-                b=p.on_command(cmd)
-                if b==True:# עדכון הלוח לאחר ביצוע הפקודה
-                    self.update_board_state(p, cmd)
+            p.reset(start_ms)
+            self._scheduler.schedule(p, start_ms)
+
+    def _make_loop(self, tick_hz: float, render_hz: float) -> FixedStepLoop:
+        if isinstance(self.clock, (VirtualClock, ScaledClock)):
+            return FixedStepLoop(tick_hz, render_hz, clock=self.clock, sleep=self.clock.sleep, spin_s=0)
+        return FixedStepLoop(tick_hz, render_hz)
+
+    def _tick(self, now: int):
+        """One simulation step at game time `now` (ms)."""
+        events = len(self.events)
+        # (1) update physics & animations
+        self._update_pieces(now)
+
+        # (2) handle queued Commands from mouse thread
+        inputs = []
+        while not self.user_input_queue.empty():  # QWe2e5
+            cmd: Command = self.user_input_queue.get()
+            inputs.append(cmd)
+            self._process_input(cmd, now)
+
+        # (3) detect captures
+        self._resolve_collisions(now)
+
+        if self.recorder is not None:
+            self.recorder.frame(now, self.position.hash)
+        if self.history is not None:
+            self.history.record(self, now, inputs, events)
+
+    def rollback(self, cmd: Command) -> RollbackReport:
+        """
+        Apply `cmd` at its own timestamp although the game is already past
+        it (a command that arrived late over the network): rewind to the
+        first tick at or after the timestamp, hand the command in there and
+        re-simulate every tick since with the inputs each originally had.
+        Events from those ticks are replaced by the re-simulated ones.
+        Needs `history` (a StateHistory); a command older than the history
+        is applied on its oldest tick.  A command not yet due is just
+        queued.  The recorder does not see the re-simulated ticks; it gets
+        the command as a rollback applied on its tick, which a replay
+        rolls in at the same point.  The returned report (also added to `history.stats`) has the depth and
+        the cost in ms, next to the history's frame budget.
+        """
+        history = self.history
+        start = time.perf_counter()
+        ticks = history.ticks_since(cmd.timestamp)
+        if not ticks:
+            self.user_input_queue.put(cmd)
+            report = RollbackReport(cmd, self._now, self._now, 0, 0.0, 0.0, history.budget_ms)
+            history.stats.add(report)
+            return report
+
+        clamped = len(ticks) == len(history) and cmd.timestamp < ticks[0].now
+        self.restore(history.rewind(len(ticks)))
+        del self.events[ticks[0].events:]
+        rewound = time.perf_counter()
+
+        # הפקודות שכבר בתור שייכות לטיק הבא – לא לטיקים שמשוחזרים
+        waiting, self.user_input_queue = self.user_input_queue, queue.Queue()
+        recorder, self.recorder = self.recorder, None
+        try:
+            ticks[0].inputs.insert(0, cmd)
+            for t in ticks:
+                for c in t.inputs:
+                    self.user_input_queue.put(c)
+                self._tick(t.now)
+        finally:
+            self.user_input_queue, self.recorder = waiting, recorder
+        end = time.perf_counter()
+        if recorder is not None:
+            applied = Command(ticks[0].now, cmd.piece_id, cmd.type, cmd.params)
+            recorder.rollback(applied, self._now)
+
+        report = RollbackReport(cmd, ticks[0].now, ticks[-1].now, len(ticks),
+                                (rewound - start) * 1000, (end - rewound) * 1000,
+                                history.budget_ms, clamped)
+        history.stats.add(report)
+        return report
+
+    def _render(self) -> bool:
+        """Draw the current position; False if the user closed the window."""
+        if self.headless:
+            return True
+        self._draw()
+        return self._show()
+
+    def _process_input(self, cmd: Command, now: Optional[int] = None):
+        if now is None:
+            now = self.game_time_ms()
+        if self.recorder is not None:
+            self.recorder.command(cmd, now)
+        if len(cmd.params) < 2:  # בלי תא יעד – אין מה לבצע
+            self._log(now, "rejected", cmd.piece_id, tuple(tuple(c) for c in cmd.params))
+            return
+        (sx, sy), (tx, ty) = cmd.params[0], cmd.params[1]
+        p = self.position.piece_at((sy, sx))  # הכלי שעומד בתא המקור
+        move = (tuple(cmd.params[0]), tuple(cmd.params[1]))
+        if p is None or p.piece_id != cmd.piece_id:
+            self._log(now, "rejected", cmd.piece_id, move)
+            return
+        if (sx, sy) != (tx, ty) and not self.move_cache.is_legal((sy, sx), (ty, tx)):
+            # חסום / תופס כלי של אותו צבע / לא לפי moves.txt
+            self._log(now, "rejected", cmd.piece_id, move)
+            return
+        if p.on_command(cmd, now):  # עדכון הלוח לאחר ביצוע הפקודה
+            if self._physics_batch is not None:
+                self._physics_batch.mark(p)
+            self._scheduler.schedule(p, now)
+            self._predictor.track(p, now)
+            self.update_board_state(p, cmd)
+            self._log(now, "command", cmd.piece_id, move)
+        else:
+            self._log(now, "rejected", cmd.piece_id, move)  # הכלי עדיין בתנועה / במנוחה
+
+    def _log(self, time_ms: float, kind: str, piece_id: str, data: Tuple = ()):
+        self.events.append(GameEvent(int(time_ms), kind, piece_id, data))
 
     def update_board_state(self, piece: Piece, cmd: Command):
-        # עדכון הלוח לאחר ביצוע פקודה
-        start_x, start_y = piece._state._physics.get_pos()
-        end_x = cmd.params[0] 
-        end_y = cmd.params[1] # נניח שיש לך את המיקום הסופי בפקודה
-
-        # עדכון הלוח
-        self.board_state[start_y][start_x] = None  # המיקום ההתחלתי מתעדכן ל-None
-        self.board_state[end_y][end_x] = piece  # המיקום הסופי מתעדכן לכלי
+        """Move `piece` from the command's source cell to its target cell in
+        `position`.  An enemy standing on the target leaves the position
+        now but stays on screen until the mover reaches it and
+        `_resolve_collisions` takes it."""
+        (start_x, start_y), (end_x, end_y) = cmd.params[0], cmd.params[1]
+        if (start_x, start_y) == (end_x, end_y):
+            return
+        self.position.move((start_y, start_x), (end_y, end_x))
+        self.position.set_state((end_y, end_x), piece._state.name)
 
     def _draw(self):
-        frame: Board = self.board.clone()  # עותק מלא של הלוח
-        now = self.game_time_ms()
-        for p in self.pieces:
-            p.draw_on_board(frame, now)
-        self._last_frame = frame
+        now = self._now
+        if not isinstance(getattr(self.board.img, "img", None), np.ndarray):
+            # לוח בלי פיקסלים (MockImg) – ציור מלא כמו קודם
+            frame: Board = self.board.clone()
+            for p in self.pieces:
+                p.draw_on_board(frame, now)
+            self._last_frame = frame
+            return
+
+        # only the tiles that changed since the last frame are repainted
+        self._last_frame = self._renderer.render(self.pieces)
+
+    def _update_pieces(self, now: int):
+        """Advance physics and animations of all pieces to `now`.  Only the
+        pieces the scheduler has due are touched."""
+        self._now = now
+        batch = self._physics_batch
+        if batch is None:
+            due = self._scheduler.pop_due(now)
+            for p in due:
+                state = p._state
+                p.update(now)
+                # סטייט חדש עוד לא עודכן אף פעם – מגיע לו עדכון בטיק הבא
+                nxt = now + 1 if p._state is not state else Scheduler.next_due(p, now)
+                self._scheduler.schedule(p, nxt)
+            self._sync_states(due)
+            return
+
+        if batch.pieces is not self.pieces or batch.size != len(self.pieces):
+            batch.bind(self.pieces)  # כלים נאכלו / רשימה חדשה
+        finished = set(batch.step(now).tolist())
+        for i, p in enumerate(self.pieces):
+            if i in finished:
+                p.update(now)  # the scalar path fires the state transition
+                batch.mark(p)
+            else:
+                p._state._graphics.update(now)
+        self._sync_states()
 
     def _show(self) -> bool:
         img = self._last_frame.img.img  # assuming board holds `get_img`
@@ -206,8 +564,33 @@ class Game:
         key = cv2.waitKey(1)
         return key != 27  # ESC
 
-    def _resolve_collisions(self):
-        pass  # to be implemented
+    def _resolve_collisions(self, now: Optional[int] = None):
+        """Apply the captures predicted up to `now` (default: the last tick) at
+        their exact time.  Every piece is tracked by the predictor, so there
+        is no per-frame check on top: it would make captures depend on the
+        tick rate again."""
+        now = self._now if now is None else now
+        for t, capturer, captured in self._predictor.pop_due(now):
+            if capturer in self.pieces and captured in self.pieces:
+                self._remove_piece(captured, capturer, t)
+
+    def _remove_piece(self, captured: Piece, capturer: Piece, time_ms: float):
+        """Take `captured` off the board.  A capturer that lost its square in
+        `position` to a later mover heading for the same cell (the one it
+        has just taken) gets its target square back."""
+        self._log(time_ms, "capture", capturer.piece_id,
+                  (captured.piece_id, tuple(captured._state._physics.cell)))
+        cell = self.position.cell_of(captured)
+        if cell is not None:
+            self.position.remove(cell)
+        self.pieces.remove(captured)
+        self._scheduler.remove(captured)
+        self._predictor.forget(captured)
+        if self.position.cell_of(capturer) is None:
+            # מי שנכנס אחריו לאותו תא דרס אותו בעמדה – הוא חוזר לתא היעד שלו
+            tx, ty = capturer._state._physics.target_cell
+            if not self.position.is_occupied((ty, tx)):
+                self.position.place(capturer, (ty, tx), capturer._state.name, unmoved=False)
 
     def _is_win(self) -> bool:
         return False  # for now no win condition
@@ -0,0 +1,467 @@
+
+import asyncio
+import bisect
+import pathlib
+import struct
+import time
+from collections import deque
+from dataclasses import dataclass, field, replace
+from typing import Callable, Deque, Dict, List, Optional, Set, Tuple
+from .Command import Command
+from .Snapshot import encode as encode_snapshot
+
+# ── wire format ─────────────────────────────────────────────────────────────
+# every message: body length (uint16), type (uint8), body
+FRAME = struct.Struct("<HB")
+
+JOIN = 1        # c→s  match id (0xFFFF: open a new one)
+WELCOME = 2     # s→c  match id, tick rate, match time, then the piece ids in slot order
+CMD = 3         # c→s  timestamp, slot, command type, from x, y, to x, y
+STATE = 4       # s→c  match id, match time, then a packed Snapshot
+STATS = 5       # c→s  (empty) / s→c  host header, then one record per match
+ERROR = 6       # s→c  utf-8 text
+
+NEW_MATCH = 0xFFFF
+COMMAND_TYPES = ("move", "jump")
+
+JOIN_BODY = struct.Struct("<H")
+WELCOME_HEAD = struct.Struct("<HHI")
+CMD_BODY = struct.Struct("<IHBBBBB")
+STATE_HEAD = struct.Struct("<HI")
+STATS_HEAD = struct.Struct("<HHIIf")     # matches, clients, ticks, ticks late, load
+STATS_MATCH = struct.Struct("<HIIIIB")   # id, match time, ticks, mean µs, p99 µs, clients
+
+
+def pack(kind: int, body: bytes = b"") -> bytes:
+    return FRAME.pack(len(body), kind) + body
+
+
+async def read_message(reader: asyncio.StreamReader) -> Tuple[int, bytes]:
+    """The next (type, body) from `reader`; IncompleteReadError at end of stream."""
+    length, kind = FRAME.unpack(await reader.readexactly(FRAME.size))
+    return kind, await reader.readexactly(length)
+
+
+def pack_command(cmd: Command, slot: int) -> bytes:
+    (fx, fy), (tx, ty) = cmd.params[0], cmd.params[1]
+    return pack(CMD, CMD_BODY.pack(cmd.timestamp, slot, COMMAND_TYPES.index(cmd.type), fx, fy, tx, ty))
+
+
+@dataclass
+class TickLatency:
+    """How long one match's ticks take: mean and max over all of them, p99 over the last 1000."""
+    ticks: int = 0
+    total_s: float = 0.0
+    max_s: float = 0.0
+    recent: Deque[float] = field(default_factory=lambda: deque(maxlen=1000))
+
+    def add(self, seconds: float):
+        self.ticks += 1
+        self.total_s += seconds
+        self.max_s = max(self.max_s, seconds)
+        self.recent.append(seconds)
+
+    @property
+    def mean_us(self) -> float:
+        return self.total_s / self.ticks * 1e6 if self.ticks else 0.0
+
+    @property
+    def p99_us(self) -> float:
+        if not self.recent:
+            return 0.0
+        ordered = sorted(self.recent)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * 0.99))] * 1e6
+
+
+class Match:
+    """One game on the host: its clients, its commands not yet due (or
+    already late) and its tick timing."""
+
+    def __init__(self, match_id: int, game, until_ms: Optional[int] = None, max_rollback_ms: int = 200):
+        self.id = match_id
+        self.game = game
+        self.until_ms = until_ms
+        self.max_rollback_ms = max_rollback_ms
+        self.late: Deque[Command] = deque()     # waiting for `apply_late`
+        self.capped = 0                         # late commands moved up to `max_rollback_ms`
+        self.tick = 0
+        self.now = 0
+        self.clients: Set[asyncio.StreamWriter] = set()
+        self.latency = TickLatency()
+        self._pending: List[Tuple[int, int, Command]] = []   # (timestamp, seq, cmd)
+        self._seq = 0
+        self.ids = [p.piece_id for p in game._slots]
+        game.headless = True
+        game.events = []
+        game._reset_pieces(0)
+        if game.history is not None:
+            game.history.clear()
+
+    @property
+    def finished(self) -> bool:
+        return self.until_ms is not None and self.now >= self.until_ms
+
+    def submit(self, cmd: Command):
+        """Hand `cmd` to the game on the first tick at or after its timestamp.
+        One whose tick has already run waits in `late` to be rolled back in
+        by `apply_late` when the game keeps a `history`, otherwise it is
+        played on the next tick.  Never runs the game itself, since it is
+        called from the socket handlers."""
+        if self.tick and cmd.timestamp <= self.now:
+            if self.game.history is not None:
+                self.late.append(cmd)
+            else:
+                self.game.user_input_queue.put(cmd)
+            return
+        bisect.insort(self._pending, (cmd.timestamp, self._seq, cmd))
+        self._seq += 1
+
+    def apply_late(self) -> bool:
+        """Roll the oldest waiting late command in; False if there was none.
+        The timestamp comes from the client, so one more than
+        `max_rollback_ms` behind the current tick is moved up to that."""
+        if not self.late:
+            return False
+        cmd = self.late.popleft()
+        oldest = max(0, self.now - self.max_rollback_ms)
+        if cmd.timestamp < oldest:
+            cmd = replace(cmd, timestamp=oldest)
+            self.capped += 1
+        self.game.rollback(cmd)
+        return True
+
+    def step(self, now: int):
+        start = time.perf_counter()
+        pending = self._pending
+        while pending and pending[0][0] <= now:
+            self.game.user_input_queue.put(pending.pop(0)[2])
+        self.game._tick(now)
+        self.now = now
+        self.tick += 1
+        self.latency.add(time.perf_counter() - start)
+
+    def state_message(self) -> bytes:
+        return pack(STATE, STATE_HEAD.pack(self.id, self.now) + encode_snapshot(self.game.snapshot()))
+
+
+@dataclass
+class HostStats:
+    """The host's tick scheduler, over its whole run."""
+    ticks: int = 0
+    late_ticks: int = 0          # ticks started more than one tick interval late
+    dropped_ticks: int = 0
+    busy_s: float = 0.0          # time spent ticking matches and rolling late commands in
+    rollbacks: int = 0
+    deferred_rollbacks: int = 0  # late commands left for a later tick when the budget ran out
+    elapsed_s: float = 0.0
+    broadcasts: int = 0
+    skipped_sends: int = 0       # state updates not sent to clients that were not keeping up
+
+    @property
+    def load(self) -> float:
+        """Share of the wall time spent ticking."""
+        return self.busy_s / self.elapsed_s if self.elapsed_s > 0 else 0.0
+
+
+class GameHost:
+    """
+    Runs many headless matches in one process on a single asyncio event
+    loop, and serves them over TCP.
+
+    There is one tick scheduler for all matches.  Every 1000 / `tick_hz`
+    ms it steps each match once: commands due by then go into the game's
+    input queue, then `Game._tick` runs, exactly as in `Game.run_script`.
+    Socket I/O is handled between ticks and never runs a game: a late
+    command only waits in its match, and `step_all` rolls waiting ones in
+    before the ticks, round-robin over the matches, for at most
+    `rollback_share` of a tick interval (at least one per host tick, so
+    the queue drains).  A client can make a rollback at most
+    `max_rollback_ms` deep.  Like FixedStepLoop, a scheduler that falls
+    more than `max_catch_up` ticks behind drops the backlog.  Every
+    `tick_hz / broadcast_hz` ticks each match's state (a packed Snapshot)
+    goes to its clients.  A client whose send buffer is still over
+    `max_buffer` bytes is skipped for that round instead of queueing more.
+
+    `factory()` makes a new Game.  For matches opened over the wire it
+    runs in the loop's default executor (`open_match`), since building a
+    game takes tens of ms.  Per-match tick latency and the number of
+    matches the tick budget can hold are available from `report()`, or
+    from a STATS message over the wire.
+    """
+
+    def __init__(self, factory: Callable[[], object], tick_hz: float = 50.0, broadcast_hz: float = 10.0,
+                 max_catch_up: int = 5, max_buffer: int = 64 * 1024, match_ms: Optional[int] = None,
+                 max_rollback_ms: int = 200, rollback_share: float = 0.5):
+        self.factory = factory
+        self.tick_hz = tick_hz
+        self.max_rollback_ms = max_rollback_ms
+        self.rollback_share = rollback_share
+        self.broadcast_every = max(1, round(tick_hz / broadcast_hz))
+        self.max_catch_up = max_catch_up
+        self.max_buffer = max_buffer
+        self.match_ms = match_ms
+        self.matches: Dict[int, Match] = {}
+        self.stats = HostStats()
+        self._next_id = 0
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._ticker: Optional[asyncio.Task] = None
+        self._clients: Set[asyncio.StreamWriter] = set()
+
+    @property
+    def tick_ms(self) -> float:
+        return 1000.0 / self.tick_hz
+
+    def new_match(self, until_ms: Optional[int] = None) -> Match:
+        """Open a match, building its game on this thread (before ticking starts)."""
+        return self._add_match(self.factory(), until_ms)
+
+    async def open_match(self, until_ms: Optional[int] = None) -> Match:
+        """Open a match with its game built in the default executor, so the
+        other matches keep ticking meanwhile."""
+        game = await asyncio.get_running_loop().run_in_executor(None, self.factory)
+        return self._add_match(game, until_ms)
+
+    def _add_match(self, game, until_ms: Optional[int]) -> Match:
+        match_id = self._next_id
+        self._next_id = (self._next_id + 1) % NEW_MATCH
+        match = Match(match_id, game, until_ms if until_ms is not None else self.match_ms,
+                      self.max_rollback_ms)
+        self.matches[match_id] = match
+        return match
+
+    def close_match(self, match_id: int):
+        match = self.matches.pop(match_id)
+        for writer in match.clients:
+            writer.close()
+
+    # ── scheduling ──────────────────────────────────────────────────────────
+    def step_all(self):
+        """One host tick: roll late commands in while the budget lasts, step
+        every match on its own time grid, then broadcast when due."""
+        stats = self.stats
+        start = time.perf_counter()
+        self._apply_late(start + self.rollback_share / self.tick_hz)
+        for match in list(self.matches.values()):
+            match.step(int(match.tick * self.tick_ms))
+        stats.busy_s += time.perf_counter() - start
+        stats.ticks += 1
+        if stats.ticks % self.broadcast_every == 0:
+            self.broadcast()
+        for match in [m for m in self.matches.values() if m.finished]:
+            self.close_match(match.id)
+
+    def _apply_late(self, deadline: float):
+        waiting = [m for m in self.matches.values() if m.late]
+        if waiting:
+            turn = self.stats.ticks % len(waiting)
+            waiting = waiting[turn:] + waiting[:turn]   # סבב – לא תמיד אותו משחק ראשון
+        ran = 0
+        while waiting and (ran == 0 or time.perf_counter() < deadline):
+            for match in waiting:
+                if ran and time.perf_counter() >= deadline:
+                    break
+                match.apply_late()
+                ran += 1
+            waiting = [m for m in waiting if m.late]
+        self.stats.rollbacks += ran
+        self.stats.deferred_rollbacks += sum(len(m.late) for m in waiting)
+
+    async def run_ticks(self, max_ticks: Optional[int] = None):
+        """The tick scheduler: `step_all` on a fixed grid until cancelled (or `max_ticks`)."""
+        loop = asyncio.get_running_loop()
+        tick_s = 1.0 / self.tick_hz
+        started = next_tick = loop.time()
+        ran = 0
+        try:
+            while max_ticks is None or ran < max_ticks:
+                behind = loop.time() - next_tick
+                if behind > tick_s:
+                    self.stats.late_ticks += 1
+                if behind > self.max_catch_up * tick_s:
+                    dropped = int(behind / tick_s)
+                    self.stats.dropped_ticks += dropped
+                    next_tick += dropped * tick_s  # מוותרים על הפיגור במקום לרדוף אחריו
+                self.step_all()
+                ran += 1
+                next_tick += tick_s
+                await asyncio.sleep(max(0.0, next_tick - loop.time()))
+        finally:
+            self.stats.elapsed_s += loop.time() - started
+
+    def broadcast(self):
+        self.stats.broadcasts += 1
+        for match in self.matches.values():
+            if not match.clients:
+                continue
+            message = match.state_message()
+            for writer in match.clients:
+                if writer.transport.get_write_buffer_size() > self.max_buffer:
+                    self.stats.skipped_sends += 1  # לקוח איטי – מדלגים על העדכון הזה
+                    continue
+                writer.write(message)
+
+    # ── networking ──────────────────────────────────────────────────────────
+    async def start(self, host: str = "127.0.0.1", port: int = 0) -> int:
+        """Listen on `host:port` (0: any free port) and start ticking; returns the port."""
+        self._server = await asyncio.start_server(self._serve, host, port)
+        self._ticker = asyncio.create_task(self.run_ticks())
+        return self._server.sockets[0].getsockname()[1]
+
+    async def stop(self):
+        if self._ticker is not None:
+            self._ticker.cancel()
+            try:
+                await self._ticker
+            except asyncio.CancelledError:
+                pass
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+        for writer in list(self._clients):
+            writer.close()
+
+    async def _serve(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self._clients.add(writer)
+        match: Optional[Match] = None
+        try:
+            while True:
+                kind, body = await read_message(reader)
+                if kind == JOIN:
+                    match_id, = JOIN_BODY.unpack(body)
+                    if match_id == NEW_MATCH:
+                        match = await self.open_match()
+                    elif match_id in self.matches:
+                        match = self.matches[match_id]
+                    else:
+                        writer.write(pack(ERROR, f"no match {match_id}".encode()))
+                        continue
+                    match.clients.add(writer)
+                    ids = "\0".join(match.ids).encode()
+                    writer.write(pack(WELCOME, WELCOME_HEAD.pack(match.id, int(self.tick_hz), match.now) + ids))
+                elif kind == CMD:
+                    if match is None or match.id not in self.matches:
+                        writer.write(pack(ERROR, b"not in a match"))
+                        continue
+                    t, slot, ctype, fx, fy, tx, ty = CMD_BODY.unpack(body)
+                    if slot >= len(match.ids) or ctype >= len(COMMAND_TYPES):
+                        writer.write(pack(ERROR, b"bad command"))
+                        continue
+                    match.submit(Command(t, match.ids[slot], COMMAND_TYPES[ctype], [(fx, fy), (tx, ty)]))
+                elif kind == STATS:
+                    writer.write(pack(STATS, self.stats_body()))
+                else:
+                    writer.write(pack(ERROR, f"unknown message {kind}".encode()))
+        except (asyncio.IncompleteReadError, ConnectionError, struct.error):
+            pass
+        finally:
+            self._clients.discard(writer)
+            if match is not None:
+                match.clients.discard(writer)
+            writer.close()
+
+    # ── metrics ─────────────────────────────────────────────────────────────
+    def capacity(self) -> int:
+        """Matches one tick interval could hold at the mean per-match tick cost so far."""
+        ticked = [m.latency for m in self.matches.values() if m.latency.ticks]
+        if not ticked:
+            return 0
+        mean_s = sum(t.total_s for t in ticked) / sum(t.ticks for t in ticked)
+        return int(1.0 / self.tick_hz / mean_s) if mean_s > 0 else 0
+
+    def stats_body(self) -> bytes:
+        s = self.stats
+        out = [STATS_HEAD.pack(len(self.matches), len(self._clients), s.ticks, s.late_ticks, s.load)]
+        for m in self.matches.values():
+            out.append(STATS_MATCH.pack(m.id, m.now, m.latency.ticks, int(m.latency.mean_us),
+                                        int(m.latency.p99_us), min(len(m.clients), 255)))
+        return b"".join(out)
+
+    def report(self) -> str:
+        s = self.stats
+        lat = [m.latency for m in self.matches.values() if m.latency.ticks]
+        mean = sum(t.mean_us for t in lat) / len(lat) if lat else 0.0
+        worst = max((t.p99_us for t in lat), default=0.0)
+        rate = s.ticks / s.elapsed_s if s.elapsed_s > 0 else 0.0
+        return (f"host: {len(self.matches)} matches, {len(self._clients)} clients | "
+                f"{rate:.1f} ticks/s of {self.tick_hz:g}, {s.late_ticks} late, {s.dropped_ticks} dropped, "
+                f"{s.rollbacks} rollbacks ({s.deferred_rollbacks} deferred), "
+                f"load {s.load:.0%} | match tick mean {mean:.0f} µs, worst p99 {worst:.0f} µs | "
+                f"capacity ~{self.capacity()} matches at {self.tick_hz:g} Hz")
+
+
+class GameClient:
+    """Minimal client for the host's protocol (tests, bots, load generators)."""
+
+    def __init__(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.reader, self.writer = reader, writer
+        self.match_id: Optional[int] = None
+        self.ids: List[str] = []
+
+    @classmethod
+    async def connect(cls, host: str, port: int) -> "GameClient":
+        return cls(*await asyncio.open_connection(host, port))
+
+    async def join(self, match_id: int = NEW_MATCH) -> int:
+        self.writer.write(pack(JOIN, JOIN_BODY.pack(match_id)))
+        kind, body = await self.expect(WELCOME)
+        self.match_id, _, _ = WELCOME_HEAD.unpack_from(body)
+        self.ids = body[WELCOME_HEAD.size:].decode().split("\0")
+        return self.match_id
+
+    def send(self, cmd: Command, slot: int):
+        """`slot`: the piece's index in the WELCOME list (ids repeat, e.g. "PW")."""
+        self.writer.write(pack_command(cmd, slot))
+
+    async def stats(self) -> bytes:
+        self.writer.write(pack(STATS))
+        return (await self.expect(STATS))[1]
+
+    async def expect(self, kind: int) -> Tuple[int, bytes]:
+        """Read messages until one of type `kind` (state updates in between are skipped)."""
+        while True:
+            got, body = await read_message(self.reader)
+            if got == kind:
+                return got, body
+            if got == ERROR:
+                raise RuntimeError(body.decode())
+
+    async def close(self):
+        self.writer.close()
+        await self.writer.wait_closed()
+
+
+async def _main(args):
+    from .main import create_game
+
+    root = pathlib.Path(args.pieces_root)
+    board = args.board or root / "board.csv"
+    host = GameHost(lambda: create_game(board, root, headless=True), tick_hz=args.tick_hz,
+                    broadcast_hz=args.broadcast_hz)
+    for _ in range(args.matches):
+        host.new_match()
+    port = await host.start(args.host, args.port)
+    print(f"serving {args.matches} matches on {args.host}:{port}", flush=True)
+    try:
+        while True:
+            await asyncio.sleep(args.every)
+            print(host.report(), flush=True)
+    finally:
+        await host.stop()
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Host many headless matches over TCP.")
+    parser.add_argument("pieces_root", type=pathlib.Path)
+    parser.add_argument("--board", type=pathlib.Path, default=None, help="board CSV (default: <root>/board.csv)")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--matches", type=int, default=100, help="matches opened at startup")
+    parser.add_argument("--tick-hz", type=float, default=50.0)
+    parser.add_argument("--broadcast-hz", type=float, default=10.0)
+    parser.add_argument("--every", type=float, default=5.0, help="print the report every N seconds")
+    try:
+        asyncio.run(_main(parser.parse_args()))
+    except KeyboardInterrupt:
+        pass
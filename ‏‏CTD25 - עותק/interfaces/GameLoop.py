@@ -0,0 +1,152 @@
+
+import math
+import time
+from dataclasses import dataclass
+from typing import Callable, Optional
+
+
+class VirtualClock:
+    """
+    A clock that only moves when told to.  Used in place of
+    `time.perf_counter` / `time.sleep`: `sleep` advances it instantly, so
+    a loop driven by it runs as fast as the CPU allows while seeing the
+    same time steps as in real time.
+    """
+
+    def __init__(self, start_s: float = 0.0):
+        self.t = start_s
+
+    def __call__(self) -> float:
+        return self.t
+
+    def sleep(self, seconds: float):
+        if seconds > 0:
+            self.t += seconds
+
+    def advance_ms(self, ms: float):
+        self.sleep(ms / 1000.0)
+
+
+class ScaledClock:
+    """Wall-clock time sped up (or slowed down): `speed` seconds pass per real second."""
+
+    def __init__(self, speed: float):
+        self.speed = speed
+        self._t0 = time.perf_counter()
+
+    def __call__(self) -> float:
+        return (time.perf_counter() - self._t0) * self.speed
+
+    def sleep(self, seconds: float):
+        if seconds > 0:
+            time.sleep(seconds / self.speed)
+
+
+@dataclass
+class LoopStats:
+    """What a FixedStepLoop achieved, over `elapsed` seconds of wall time."""
+    ticks: int = 0
+    frames: int = 0
+    dropped_ticks: int = 0  # ticks skipped because the loop fell too far behind
+    slept: float = 0.0
+    elapsed: float = 0.0
+
+    @property
+    def tick_rate(self) -> float:
+        return self.ticks / self.elapsed if self.elapsed > 0 else 0.0
+
+    @property
+    def frame_rate(self) -> float:
+        return self.frames / self.elapsed if self.elapsed > 0 else 0.0
+
+    def report(self) -> str:
+        idle = self.slept / self.elapsed * 100 if self.elapsed > 0 else 0.0
+        return (f"loop: {self.tick_rate:.1f} ticks/s, {self.frame_rate:.1f} frames/s, "
+                f"{self.dropped_ticks} ticks dropped, {idle:.0f}% asleep")
+
+
+class FixedStepLoop:
+    """
+    Runs the simulation at a fixed tick rate and rendering at a capped
+    frame rate, independently of each other.
+
+    Every tick advances simulation time by exactly `1000 / tick_hz` ms
+    (integer ms, remainders carried), so the result of a game does not
+    depend on how fast it is drawn.  When the loop falls behind it runs
+    several ticks back to back before drawing again, at most
+    `max_catch_up` of them; beyond that the backlog is dropped instead of
+    spiralling.  Frames are drawn at most `render_hz` times a second.
+    Between the two deadlines the loop sleeps: `time.sleep` for the bulk
+    of the wait, then a short spin for the last `spin_s` seconds, since
+    the OS sleep can overshoot by a millisecond or more (`spin_s=0`
+    turns the spin off).
+
+    `clock` and `sleep` can be replaced (a virtual clock for headless runs).
+    """
+
+    def __init__(self, tick_hz: float = 100.0, render_hz: float = 60.0, max_catch_up: int = 10,
+                 clock: Callable[[], float] = time.perf_counter,
+                 sleep: Callable[[float], None] = time.sleep, spin_s: float = 0.001):
+        self.tick_hz = tick_hz
+        self.render_hz = render_hz
+        self.max_catch_up = max_catch_up
+        self.clock = clock
+        self.sleep = sleep
+        self.spin_s = spin_s
+        self.stats = LoopStats()
+
+    @property
+    def tick_ms(self) -> float:
+        return 1000.0 / self.tick_hz
+
+    def sim_time_ms(self, tick: int) -> int:
+        """Simulation time of tick number `tick`, in whole ms."""
+        return int(tick * self.tick_ms)
+
+    def run(self, start_ms: int, step: Callable[[int], None], render: Callable[[], bool],
+            done: Callable[[], bool] = lambda: False, max_ticks: Optional[int] = None,
+            first_tick: int = 0) -> LoopStats:
+        """Call `step(now_ms)` every tick from `start_ms` and `render()` at the
+        capped frame rate until `done()`, `render()` returns False or
+        `max_ticks` ticks have run.  Tick n is at `start_ms` plus n ticks;
+        numbering starts at `first_tick` (to resume a run on the same grid)."""
+        stats = self.stats = LoopStats()
+        tick_s, frame_s = 1.0 / self.tick_hz, 1.0 / self.render_hz
+        t_start = self.clock()
+        next_tick = next_frame = t_start
+        tick = first_tick
+        last = math.inf if max_ticks is None else first_tick + max_ticks
+        while not done() and tick < last:
+            now = self.clock()
+            ran = 0
+            while now >= next_tick and ran < self.max_catch_up:
+                step(start_ms + self.sim_time_ms(tick))
+                tick += 1
+                ran += 1
+                next_tick += tick_s
+                if tick >= last:
+                    break
+            if now >= next_tick and ran == self.max_catch_up:
+                behind = int((now - next_tick) / tick_s) + 1
+                stats.dropped_ticks += behind
+                next_tick += behind * tick_s  # מוותרים על הפיגור במקום לרדוף אחריו
+            stats.ticks += ran
+
+            if now >= next_frame:
+                stats.frames += 1
+                if render() is False:
+                    break
+                next_frame = max(next_frame + frame_s, now)  # בלי פרצי ציור אחרי עיכוב
+
+            stats.slept += self._sleep_until(min(next_tick, next_frame))
+        stats.elapsed = self.clock() - t_start
+        return stats
+
+    def _sleep_until(self, deadline: float) -> float:
+        start = self.clock()
+        remaining = deadline - start
+        if remaining > self.spin_s:
+            self.sleep(remaining - self.spin_s)
+        while self.spin_s > 0 and self.clock() < deadline:
+            pass  # ספין קצר לדיוק
+        return self.clock() - start
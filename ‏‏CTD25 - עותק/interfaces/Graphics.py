@@ -1,46 +1,63 @@
 
 import pathlib
 import copy
+import cv2
+from typing import Optional, Tuple
 from .img import Img
 from .Command import Command
 from .Board import Board
+from .SpriteAtlas import SpriteAtlas
 
 class Graphics:
     def __init__(self,
                  sprites_folder: pathlib.Path,
                  board: Board,
                  loop: bool = True,
-                 fps: float = 6.0):
+                 fps: float = 6.0,
+                 atlas: Optional[SpriteAtlas] = None,
+                 lazy: bool = False,
+                 interpolation: int = cv2.INTER_AREA):
         self.sprites_folder = sprites_folder
         self.board = board
         self.loop = loop
         self.fps = fps
+        # הפריימים עצמם שמורים באטלס המשותף – כאן רק אינדקס ותזמון
+        self.atlas = atlas or SpriteAtlas.shared()
+        self.interpolation = interpolation
 
-        self.sprites = []
-        self.load_sprites()
+        # lazy: הפריימים מפוענחים רק בכניסה הראשונה לסטייט (reset/update)
+        self.total_frames = 0
+        self.current_frame = None
+        self._frame_index: Optional[int] = 0
+        if not lazy:
+            self.load_sprites()
 
-        self.current_frame = Img()
-        self.current_frame.read(sprites_folder / "1.png")
+    @property
+    def cell_size(self) -> Tuple[int, int]:
+        return (self.board.cell_W_pix, self.board.cell_H_pix)
+
+    @property
+    def sprites(self) -> Tuple[Img, ...]:
+        """Frames of this state, shared with every piece of the same type.
+        Not kept on the instance, so the atlas is free to evict them."""
+        return self.atlas.frames(self.sprites_folder, self.cell_size, self.interpolation)
 
     def load_sprites(self):
-        files = sorted(self.sprites_folder.glob("*.png"))
-        cell_size = (self.board.cell_W_pix, self.board.cell_H_pix)
-        for file in files:
-            img = Img().read(file, size=cell_size)
-            if img.img.shape[1] > cell_size[0] or img.img.shape[0] > cell_size[1]:
-                raise ValueError(f"Sprite {file.name} size {img.img.shape[1]}x{img.img.shape[0]} too big for cell {cell_size}")
-            self.sprites.append(img)
-        self.total_frames = len(self.sprites)
-        if self.total_frames == 0:
-            raise ValueError(f"No sprites found in: {self.sprites_folder}")
-            
+        sprites = self.sprites
+        self.total_frames = len(sprites)
+        if self.current_frame is None:
+            self.current_frame = sprites[0]
+
     def copy(self):
-        copied_graphics = Graphics(self.sprites_folder, self.board, self.loop, self.fps)
-        copied_graphics.sprites = copy.deepcopy(self.sprites)
+        """Cheap copy: shares the atlas frames, only the timing is per instance."""
+        copied_graphics = copy.copy(self)
+        copied_graphics.__dict__.pop("_start_time", None)
         return copied_graphics
 
     def reset(self, cmd: Command):
         self._start_time = 0
+        if self.total_frames == 0:
+            self.load_sprites()
         if cmd.type == "move":
             # מתוך params נשלוף את הכלי (נניח שהוא במיקום 2 ברשימה)
             if len(cmd.params) >= 3:
@@ -49,17 +66,21 @@ class Graphics:
                     index = int(piece.type) if piece.type.isdigit() else 0
                     if 0 <= index < len(self.sprites):
                         self.current_frame = self.sprites[index]
+                        self._frame_index = index
                     else:
                         self.current_frame = Img()
+                        self._frame_index = None
                 else:
                     self.current_frame = Img()
+                    self._frame_index = None
             else:
                 self.current_frame = Img()
+                self._frame_index = None
 
     def update(self, now_ms: int):
         """Advance animation frame based on game-loop time, not wall time."""
         if self.total_frames == 0:
-            return
+            self.load_sprites()
 
         # כמה זמן עבר בכל פריים אחד, במילישניות
         frame_duration = 1000 / self.fps
@@ -79,14 +100,21 @@ class Graphics:
             frame_index = min(frame_index, self.total_frames - 1)
 
         self.current_frame = self.sprites[frame_index]
+        self._frame_index = frame_index
 
     def get_img(self) -> Img:
+        if self.current_frame is None:
+            self.load_sprites()
+        elif self.current_frame.img is None and self._frame_index is not None:
+            self.current_frame = self.sprites[self._frame_index]  # האטלס פינה את הפריים – מביאים מחדש
         return self.current_frame
 
-    # def copy(self):
-    #     copied_graphics = Graphics(self.sprites_folder, self.board, self.loop, self.fps)
-    #     copied_graphics.sprites = [sprite.copy() for sprite in self.sprites]
-    #     copied_graphics.total_frames = self.total_frames
-    #     copied_graphics.current_frame = self.current_frame.copy()
-    #     copied_graphics._start_time = getattr(self, "_start_time", 0)
-    #     return copied_graphics
+    def get_img_at(self, cell_size: Tuple[int, int], interpolation: Optional[int] = None) -> Img:
+        """The current frame resized for another cell size (e.g. a thumbnail
+        board).  Variants come from the shared atlas and are reused."""
+        interpolation = self.interpolation if interpolation is None else interpolation
+        if tuple(cell_size) == self.cell_size and interpolation == self.interpolation:
+            return self.get_img()
+        if self._frame_index is None:
+            return Img()
+        return self.atlas.frames(self.sprites_folder, cell_size, interpolation)[self._frame_index]
@@ -9,10 +9,12 @@ class GraphicsFactory:
     def load(self,
              sprites_dir: pathlib.Path,
              cfg: dict,
-             cell_size: tuple[int, int]) -> Graphics:
+             cell_size: tuple[int, int],
+             lazy: bool = True) -> Graphics:
         """
         Load graphics object given path to sprites and configuration.
         cfg צפוי להכיל פרטים כגון: { "loop": True, "fps": 8.0 }
+        With `lazy` the sprites are decoded on the first reset/update.
         """
         board = Board(
             cell_H_pix=cell_size[1],
@@ -28,5 +30,6 @@ class GraphicsFactory:
             sprites_folder=sprites_dir,
             board=board,
             loop=cfg.get("loop", True),
-            fps=cfg.get("fps", 6.0)
+            fps=cfg.get("fps", 6.0),
+            lazy=lazy
         )
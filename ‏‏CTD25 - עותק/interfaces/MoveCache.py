@@ -0,0 +1,83 @@
+
+from typing import Dict, Set, Tuple
+from .Bitboard import BitboardPosition, Square, iter_bits
+
+
+class StaleMoveCache(Exception): ...
+
+
+class MoveCache:
+    """
+    Legal moves per occupied square, kept until something they depend on
+    changes.
+
+    Each entry registers the squares it watches (the piece's
+    `watch_masks` – all destinations and ":1st" in-between squares) in a
+    reverse index square -> watching squares.  The position reports every
+    square a piece is placed on or removed from (a move starting, a piece
+    landing, a capture); only the entry of that square and the entries
+    watching it are dropped.
+
+    With `verify` every answer is checked against a full recomputation and
+    a mismatch raises StaleMoveCache.
+    """
+
+    def __init__(self, position: BitboardPosition, verify: bool = False):
+        self.position = position
+        self.verify = verify
+        self._moves: Dict[int, Tuple[int, int]] = {}   # square -> (quiet, captures)
+        self._watching: Dict[int, int] = {}            # square -> watched squares mask
+        self._watchers: Dict[int, Set[int]] = {}       # watched square -> squares watching it
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        position.listeners.append(self._square_changed)
+
+    def __len__(self) -> int:
+        return len(self._moves)
+
+    def legal_moves(self, cell: Square) -> Tuple[int, int]:
+        """(quiet moves, captures) of the piece on `cell` as bit masks."""
+        sq = self.position.square(cell)
+        moves = self._moves.get(sq)
+        if moves is None:
+            self.misses += 1
+            moves = self.position.legal_moves(cell)
+            piece = self.position.pieces.get(sq)
+            if piece is not None:
+                self._remember(sq, moves, piece._state.moves.table.watch_masks[sq])
+        else:
+            self.hits += 1
+            if self.verify and moves != self.position.legal_moves(cell):
+                raise StaleMoveCache(f"Cached moves for {cell} are out of date")
+        return moves
+
+    def is_legal(self, src: Square, dst: Square) -> bool:
+        quiet, captures = self.legal_moves(src)
+        return bool((quiet | captures) & self.position.bit(dst))
+
+    def _remember(self, sq: int, moves: Tuple[int, int], watch: int):
+        self._moves[sq] = moves
+        self._watching[sq] = watch
+        for w in iter_bits(watch):
+            self._watchers.setdefault(w, set()).add(sq)
+
+    def _forget(self, sq: int):
+        if self._moves.pop(sq, None) is None:
+            return
+        self.invalidations += 1
+        for w in iter_bits(self._watching.pop(sq)):
+            watchers = self._watchers[w]
+            watchers.discard(sq)
+            if not watchers:
+                del self._watchers[w]
+
+    def _square_changed(self, sq: int):
+        self._forget(sq)
+        for watcher in list(self._watchers.get(sq, ())):
+            self._forget(watcher)
+
+    def clear(self):
+        self._moves.clear()
+        self._watching.clear()
+        self._watchers.clear()
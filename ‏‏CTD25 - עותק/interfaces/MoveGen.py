@@ -0,0 +1,176 @@
+
+from dataclasses import dataclass
+from typing import Dict, List, Tuple
+import numpy as np
+from .Bitboard import BitboardPosition, iter_bits, piece_kind
+from .Moves import MoveTable
+
+
+@dataclass
+class LegalMoves:
+    """Legal destinations of every piece of a position.
+
+    Row i belongs to `pieces[i]`, standing on square `squares[i]`;
+    column j is square j (r * cols + c) of the board.
+    """
+    pieces: List[object]
+    squares: np.ndarray    # (N,) int
+    quiet: np.ndarray      # (N, S) bool
+    captures: np.ndarray   # (N, S) bool
+
+    @property
+    def any(self) -> np.ndarray:
+        return self.quiet | self.captures
+
+    def row(self, piece) -> int:
+        for i, p in enumerate(self.pieces):
+            if p is piece:
+                return i
+        raise KeyError(piece)
+
+    def count(self) -> int:
+        return int(self.any.sum())
+
+
+class _TableRows:
+    """One MoveTable as NumPy arrays, per source square s:
+      leap / capture_only / quiet_only[s] – (S,) bool destination rows
+      rays[s, d, k]      – k-th square along ray d, S when off the board
+      first_target[s, i] – target of ":1st" rule i, S when none
+      first_between[s, i]– (S,) squares that must be empty for it
+    Index S is a sentinel square that counts as occupied.
+    """
+
+    def __init__(self, table: MoveTable):
+        rows, cols = table.rows, table.cols
+        S = rows * cols
+        D = max(len(table.ray_dirs), 1)
+        L = max(rows, cols)
+        K = max([len(f) for f in table.first_moves] + [1])
+
+        self.table = table
+        self.leap = _masks_to_rows(table.leap_masks, S)
+        self.capture_only = _masks_to_rows(table.capture_only, S)
+        self.quiet_only = _masks_to_rows(table.quiet_only, S)
+        self.rays = np.full((S, D, L), S, np.intp)
+        self.first_target = np.full((S, K), S, np.intp)
+        self.first_between = np.zeros((S, K, S), bool)
+
+        for s in range(S):
+            for d, (positive, masks) in enumerate(zip(table.ray_positive, table.ray_masks)):
+                squares = list(iter_bits(masks[s]))
+                if not positive:
+                    squares.reverse()  # סדר לפי מרחק מהכלי
+                self.rays[s, d, :len(squares)] = squares
+            for i, (target, between) in enumerate(table.first_moves[s]):
+                self.first_target[s, i] = target.bit_length() - 1
+                self.first_between[s, i] = _masks_to_rows([between], S)[0]
+
+
+class _Stacked:
+    """Every table seen on one board size, as _TableRows stacked along a
+    leading table axis (rays and ":1st" rules padded to the widest
+    table), so the rows of all pieces of a position are gathered with one
+    index per array.  A table is added once, the first time it is seen."""
+
+    def __init__(self):
+        self.index: Dict[int, int] = {}      # id(MoveTable) -> its block
+        self.tables: List[_TableRows] = []   # keeps each table (and its id) alive
+
+    def index_of(self, table: MoveTable) -> int:
+        i = self.index.get(id(table))
+        if i is None:
+            i = self.index[id(table)] = len(self.tables)
+            self.tables.append(_TableRows(table))
+            self._build()
+        return i
+
+    def _build(self):
+        tables = self.tables
+        S, _, L = tables[0].rays.shape
+        D = max(t.rays.shape[1] for t in tables)
+        K = max(t.first_target.shape[1] for t in tables)
+        T = len(tables)
+        self.leap = np.stack([t.leap for t in tables])
+        self.capture_only = np.stack([t.capture_only for t in tables])
+        self.quiet_only = np.stack([t.quiet_only for t in tables])
+        self.rays = np.full((T, S, D, L), S, np.intp)
+        self.first_target = np.full((T, S, K), S, np.intp)
+        self.first_between = np.zeros((T, S, K, S), bool)
+        for i, t in enumerate(tables):
+            d, k = t.rays.shape[1], t.first_target.shape[1]
+            self.rays[i, :, :d] = t.rays
+            self.first_target[i, :, :k] = t.first_target
+            self.first_between[i, :, :k] = t.first_between
+
+
+def _masks_to_rows(masks: List[int], size: int) -> np.ndarray:
+    """Bit masks as a (len(masks), size) bool array, bit i -> column i."""
+    nbytes = (size + 7) // 8
+    raw = np.frombuffer(b"".join(m.to_bytes(nbytes, "little") for m in masks), np.uint8)
+    bits = np.unpackbits(raw.reshape(len(masks), nbytes), axis=1, bitorder="little")
+    return bits[:, :size].astype(bool)
+
+
+class MoveGen:
+    """
+    Legal moves of all pieces of a BitboardPosition in one NumPy pass.
+
+    Each MoveTable is turned into NumPy rows once and added to a stack
+    shared by every position on that board size.  Tables are shared by
+    every piece of a type (Moves._tables), so a stack holds one block per
+    distinct table whatever the layout.  A call gathers each piece's rows
+    by (table, square), walks all rays of all pieces together – a ray
+    square is reachable if no square before it on the ray is occupied –
+    and masks the result with the empty / enemy squares.  The result
+    matches `BitboardPosition.legal_moves` piece by piece.
+    """
+
+    _stacks: Dict[Tuple[int, int], _Stacked] = {}  # (rows, cols) -> stack
+
+    def generate(self, position: BitboardPosition) -> LegalMoves:
+        S = position.rows * position.cols
+        squares = sorted(position.pieces)
+        pieces = [position.pieces[sq] for sq in squares]
+        if not pieces:
+            empty = np.zeros((0, S), bool)
+            return LegalMoves([], np.zeros(0, np.intp), empty, empty.copy())
+
+        n = len(pieces)
+        sq = np.array(squares, np.intp)
+        stack = MoveGen._stacks.get((position.rows, position.cols))
+        if stack is None:
+            stack = MoveGen._stacks[(position.rows, position.cols)] = _Stacked()
+        t = np.array([stack.index_of(p._state.moves.table) for p in pieces], np.intp)
+        ray_sq = stack.rays[t, sq]                          # (N, D, L)
+        target = stack.first_target[t, sq]                  # (N, K)
+        between = stack.first_between[t, sq]                # (N, K, S)
+        colors = sorted({piece_kind(p)[1] for p in pieces})
+        color = np.array([colors.index(piece_kind(p)[1]) for p in pieces], np.intp)
+
+        occ = np.zeros(S + 1, bool)
+        occ[sq] = True
+        occ[S] = True
+        square_color = np.full(S, -1, np.intp)
+        square_color[sq] = color
+        empty = ~occ[:S]
+        enemy = (square_color[None, :] >= 0) & (square_color[None, :] != color[:, None])
+        unmoved = np.array([position.unmoved >> int(s) & 1 for s in squares], bool)
+
+        # קרניים: משבצת נגישה אם אין כלי לפניה על הקרן
+        hit = occ[ray_sq]
+        blocked_before = (np.cumsum(hit, axis=2) - hit) > 0
+        reach_ray = (ray_sq != S) & ~blocked_before
+        reach = np.zeros((n, S + 1), bool)
+        rows = np.broadcast_to(np.arange(n)[:, None, None], ray_sq.shape)
+        reach[rows[reach_ray], ray_sq[reach_ray]] = True
+        reach = reach[:, :S] | stack.leap[t, sq]
+
+        quiet = (reach | stack.quiet_only[t, sq]) & empty
+        captures = (reach | stack.capture_only[t, sq]) & enemy
+
+        ok = (unmoved[:, None] & (target != S) & ~occ[target]
+              & ~(between & occ[None, None, :S]).any(axis=2))
+        quiet[np.broadcast_to(np.arange(n)[:, None], target.shape)[ok], target[ok]] = True
+
+        return LegalMoves(pieces, sq, quiet, captures)
@@ -1,34 +1,215 @@
 
 import pathlib
-from typing import List, Tuple
+from typing import Dict, List, Tuple
+
+Rule = Tuple[int, int, str]            # dr, dc, tag ("" | "capture" | "non_capture" | "1st")
+Cell = Tuple[int, int]
+
+
+class MoveTable:
+    """Destinations of one rule set on one board size, compiled per square.
+
+    `moves`/`tagged`/`masks` hold every destination on an empty board
+    (masks as bits, square r * cols + c); `capture_masks` only those that
+    may capture.
+
+    For blocking, untagged rules that run 1, 2, ... n steps along one
+    direction (rook, bishop, queen lines) are compiled as a ray per
+    direction and square.  The first blocker on a ray is one bit scan of
+    `ray & occupied` (lowest bit for directions that go up in square
+    index, highest for the others), and the squares behind it are the
+    blocker's own ray, so a slide costs a couple of int operations per
+    direction.  All other rules are leaps, split by tag.
+
+    `watch_masks[sq]` are the squares whose occupancy can change the moves
+    from `sq` – every destination plus the squares a ":1st" move passes.
+    """
+
+    def __init__(self, rules: Tuple[Rule, ...], rows: int, cols: int):
+        self.rules = rules
+        self.rows, self.cols = rows, cols
+        self.moves: List[Tuple[Cell, ...]] = []
+        self.tagged: List[Tuple[Tuple[Cell, str], ...]] = []
+        self.masks: List[int] = []
+        self.capture_masks: List[int] = []
+
+        rays, leaps = _split_rays(rules)
+        self.ray_dirs: List[Tuple[int, int]] = [d for d, _ in rays]
+        self.ray_positive: List[bool] = [dr * cols + dc > 0 for dr, dc in self.ray_dirs]
+        self.ray_masks: List[List[int]] = [[] for _ in rays]
+        self.leap_masks: List[int] = []      # untagged: quiet move or capture
+        self.capture_only: List[int] = []    # ":capture"
+        self.quiet_only: List[int] = []      # ":non_capture"
+        self.first_moves: List[Tuple[Tuple[int, int], ...]] = []  # ":1st" – (target bit, squares between)
+        self.watch_masks: List[int] = []
+
+        for r in range(rows):
+            for c in range(cols):
+                tagged = tuple(((r + dr, c + dc), tag) for dr, dc, tag in rules
+                               if self._inside(r + dr, c + dc))
+                self.tagged.append(tagged)
+                self.moves.append(tuple(cell for cell, _ in tagged))
+                mask = capture = 0
+                for (r2, c2), tag in tagged:
+                    mask |= 1 << (r2 * cols + c2)
+                    if tag in ("", "capture"):
+                        capture |= 1 << (r2 * cols + c2)
+                self.masks.append(mask)
+                self.capture_masks.append(capture)
+
+                for i, ((dr, dc), n) in enumerate(rays):
+                    self.ray_masks[i].append(self._line(r, c, dr, dc, 1, n))
+
+                leap = capture_only = quiet_only = 0
+                first = []
+                for dr, dc, tag in leaps:
+                    if not self._inside(r + dr, c + dc):
+                        continue
+                    b = 1 << ((r + dr) * cols + c + dc)
+                    if tag == "capture":
+                        capture_only |= b
+                    elif tag == "non_capture":
+                        quiet_only |= b
+                    elif tag == "1st":
+                        first.append((b, self._between(r, c, dr, dc)))
+                    else:
+                        leap |= b
+                self.leap_masks.append(leap)
+                self.capture_only.append(capture_only)
+                self.quiet_only.append(quiet_only)
+                self.first_moves.append(tuple(first))
+                watch = mask
+                for _, between in first:
+                    watch |= between
+                self.watch_masks.append(watch)
+
+    def _inside(self, r: int, c: int) -> bool:
+        return 0 <= r < self.rows and 0 <= c < self.cols
+
+    def _line(self, r: int, c: int, dr: int, dc: int, k0: int, k1: int) -> int:
+        """Bits of the squares k0..k1 steps from (r, c) along (dr, dc), stopping at the edge."""
+        mask = 0
+        for k in range(k0, k1 + 1):
+            if not self._inside(r + k * dr, c + k * dc):
+                break
+            mask |= 1 << ((r + k * dr) * self.cols + c + k * dc)
+        return mask
+
+    def _between(self, r: int, c: int, dr: int, dc: int) -> int:
+        if dr and dc and abs(dr) != abs(dc):
+            return 0  # קפיצה (כמו פרש) – אין משבצות ביניים
+        n = max(abs(dr), abs(dc))
+        return self._line(r, c, dr // n, dc // n, 1, n - 1)
+
+    def slide_attacks(self, sq: int, occupied: int) -> int:
+        """Squares reached along the rays from `sq`, up to and including the first blocker."""
+        attacks = 0
+        for positive, rays in zip(self.ray_positive, self.ray_masks):
+            ray = rays[sq]
+            blockers = ray & occupied
+            if blockers:
+                if positive:
+                    blocker = (blockers & -blockers).bit_length() - 1
+                else:
+                    blocker = blockers.bit_length() - 1
+                ray &= ~rays[blocker]
+            attacks |= ray
+        return attacks
+
+    def attacks(self, sq: int, occupied: int) -> int:
+        """Squares a piece on `sq` could capture on, given the blockers in `occupied`."""
+        return self.slide_attacks(sq, occupied) | self.leap_masks[sq] | self.capture_only[sq]
+
+    def destinations(self, sq: int, occupied: int, enemy: int,
+                     first_move: bool = False) -> Tuple[int, int]:
+        """(quiet moves, captures) from `sq` as bit masks."""
+        empty = ~occupied
+        reach = self.slide_attacks(sq, occupied) | self.leap_masks[sq]
+        quiet = (reach | self.quiet_only[sq]) & empty
+        captures = (reach | self.capture_only[sq]) & enemy
+        if first_move:
+            for target, between in self.first_moves[sq]:
+                if not (target | between) & occupied:
+                    quiet |= target
+        return quiet, captures
+
+
+def _split_rays(rules: Tuple[Rule, ...]) -> Tuple[List[Tuple[Tuple[int, int], int]], List[Rule]]:
+    """Split rules into sliding rays ((unit dr, unit dc), length) and the remaining leaps.
+    A ray is an untagged straight or diagonal line with every step 1..n present."""
+    steps: Dict[Tuple[int, int], set] = {}
+    for dr, dc, tag in rules:
+        if tag or (dr, dc) == (0, 0) or (dr and dc and abs(dr) != abs(dc)):
+            continue
+        n = max(abs(dr), abs(dc))
+        steps.setdefault((dr // n, dc // n), set()).add(n)
+    rays = [(d, max(ks)) for d, ks in steps.items()
+            if len(ks) > 1 and ks == set(range(1, max(ks) + 1))]
+    ray_dirs = {d for d, _ in rays}
+    leaps = [(dr, dc, tag) for dr, dc, tag in rules
+             if tag or (dr, dc) == (0, 0) or (dr and dc and abs(dr) != abs(dc))
+             or (dr // max(abs(dr), abs(dc)), dc // max(abs(dr), abs(dc))) not in ray_dirs]
+    return rays, leaps
 
 
 class Moves:
+    # טבלאות מקומפלות משותפות לכל הכלים מאותו סוג ובאותו גודל לוח
+    _tables: Dict[Tuple[Tuple[Rule, ...], int, int], MoveTable] = {}
+
     def __init__(self, txt_path: pathlib.Path, dims: Tuple[int, int]):
         """Initialize moves with rules from text file and board dimensions."""
         self.rows, self.cols = dims
-        self.deltas = self._load_deltas(txt_path)
+        self._set_rules(self.parse(txt_path))
+
+    @classmethod
+    def from_rules(cls, rules: List[Rule], dims: Tuple[int, int]) -> "Moves":
+        """Build moves from rules already parsed with `parse` (e.g. from an asset bundle)."""
+        moves = cls.__new__(cls)
+        moves.rows, moves.cols = dims
+        moves._set_rules(rules)
+        return moves
 
-    def _load_deltas(self, txt_path: pathlib.Path) -> List[Tuple[int, int]]:
-        deltas = []
+    @staticmethod
+    def parse(txt_path: pathlib.Path) -> List[Rule]:
+        """Read moves.txt into (dr, dc, tag) rules; tag is "" when the line has none."""
+        rules = []
         with open(txt_path, 'r') as f:
             for line in f:
                 line = line.strip()
                 if not line:
                     continue
                 parts = line.split(',')
-                # ננקה תגיות כמו :non_capture אם קיימות
                 dr = int(parts[0].split(":")[0])
-                dc = int(parts[1].split(":")[0])
-                deltas.append((dr, dc))
-        return deltas
+                dc, _, tag = parts[1].partition(":")
+                rules.append((dr, int(dc), tag.strip()))
+        return rules
 
+    def _set_rules(self, rules: List[Rule]):
+        self.rules: Tuple[Rule, ...] = tuple((int(dr), int(dc), tag) for dr, dc, tag in rules)
+        self.deltas = [(dr, dc) for dr, dc, _ in self.rules]
+        key = (self.rules, self.rows, self.cols)
+        table = Moves._tables.get(key)
+        if table is None:
+            table = Moves._tables[key] = MoveTable(self.rules, self.rows, self.cols)
+        self.table = table
 
-    def get_moves(self, r: int, c: int) -> List[Tuple[int, int]]:
+    def get_moves(self, r: int, c: int) -> Tuple[Cell, ...]:
         """Get all legal moves from position (r, c) based on deltas and board bounds."""
-        moves = []
-        for dr, dc in self.deltas:
-            nr, nc = r + dr, c + dc
-            if 0 <= nr < self.rows and 0 <= nc < self.cols:
-                moves.append((nr, nc))
-        return moves
+        if 0 <= r < self.rows and 0 <= c < self.cols:
+            return self.table.moves[r * self.cols + c]
+        return tuple((r + dr, c + dc) for dr, dc in self.deltas
+                     if 0 <= r + dr < self.rows and 0 <= c + dc < self.cols)
+
+    def get_destinations(self, r: int, c: int, occupied: int, enemy: int,
+                         first_move: bool = False) -> Tuple[int, int]:
+        """Blocker-aware (quiet moves, captures) from (r, c) as bit masks, given the
+        occupied squares and the enemy's squares.  `first_move` enables ":1st" rules."""
+        return self.table.destinations(r * self.cols + c, occupied, enemy, first_move)
+
+    def get_tagged_moves(self, r: int, c: int) -> Tuple[Tuple[Cell, str], ...]:
+        """Like `get_moves`, with each destination's moves.txt tag
+        ("capture", "non_capture", "1st", or "" for any move)."""
+        if 0 <= r < self.rows and 0 <= c < self.cols:
+            return self.table.tagged[r * self.cols + c]
+        return tuple(((r + dr, c + dc), tag) for dr, dc, tag in self.rules
+                     if 0 <= r + dr < self.rows and 0 <= c + dc < self.cols)
@@ -87,6 +87,7 @@ class Physics:
         self.start_time = None
         self.cell = cmd.params[0]
         self.target_cell = cmd.params[1] if len(cmd.params) > 1 else self.cell
+        self.pos_m = (int(self.cell[0] * self.board.cell_W_m), int(self.cell[1] * self.board.cell_H_m))
 
 
     def update(self, now_ms: int) -> Optional[Command]:
@@ -119,11 +120,13 @@ class Physics:
     def get_pos(self) -> Tuple[int, int]:
         return self.pos_m
     
-    def get_pos_inpixels(self) -> Tuple[int, int]:
-        return (int(self.pos_m[0] / self.board.cell_W_m * self.board.cell_W_pix),
-                int(self.pos_m[1] / self.board.cell_H_m * self.board.cell_H_pix))
+    def get_pos_inpixels(self, board: Optional[Board] = None) -> Tuple[int, int]:
+        """Pixel position on this board, or on `board` if drawing at another resolution."""
+        pix = board or self.board
+        return (int(self.pos_m[0] / self.board.cell_W_m * pix.cell_W_pix),
+                int(self.pos_m[1] / self.board.cell_H_m * pix.cell_H_pix))
     def copy(self) -> "Physics":
-            copied = Physics(start_cell=self.cell, board=self.board, speed_m_s=self.speed_m_s)
+            copied = type(self)(start_cell=self.cell, board=self.board, speed_m_s=self.speed_m_s)
             copied.cmd = self.cmd
             copied.start_time = self.start_time
             copied.pos_m = self.pos_m
@@ -0,0 +1,92 @@
+
+from typing import List
+import numpy as np
+from .Board import Board
+from .Physics import IdlePhysics
+
+
+class PhysicsBatch:
+    """
+    Struct-of-arrays physics for every piece of a game.
+
+    Start cell, target cell, speed and start time of each piece's current
+    Physics live in NumPy arrays; `step` advances all of them at once with
+    the same math as `Physics.update` and returns the indices of the
+    pieces whose movement (or rest) finished this tick.  Positions are
+    written back to `pos_m` only for pieces that actually travel.
+
+    A slot is reloaded from its Physics only when marked with `mark`
+    (a new command, a state switch); `bind` reloads everything.
+    """
+
+    def __init__(self, board: Board):
+        self.board = board
+        self.pieces: List = []
+        self._slot = {}
+        self._bound: List = []
+        self._dirty = set()
+        self.bind([])
+
+    @property
+    def size(self) -> int:
+        return len(self._bound)
+
+    def bind(self, pieces: List):
+        n = len(pieces)
+        self.pieces = pieces
+        self._slot = {id(p): i for i, p in enumerate(pieces)}
+        self._bound = [None] * n
+        self._dirty.clear()
+        self.cell = np.zeros((n, 2))
+        self.target = np.zeros((n, 2))
+        self.speed = np.zeros(n)
+        self.start = np.full(n, np.nan)
+        self.active = np.zeros(n, bool)
+        self.pos = np.zeros((n, 2), np.int64)
+        for i in range(n):
+            self._load(i)
+
+    def mark(self, piece):
+        """The piece got a new command or switched state – reload its slot on the next step."""
+        i = self._slot.get(id(piece))
+        if i is not None:
+            self._dirty.add(i)
+
+    def _load(self, i: int):
+        ph = self.pieces[i]._state._physics
+        self._bound[i] = ph
+        self.cell[i] = ph.cell
+        self.target[i] = ph.target_cell
+        self.speed[i] = ph.speed_m_s
+        self.start[i] = np.nan if ph.start_time is None else ph.start_time
+        self.active[i] = not isinstance(ph, IdlePhysics)
+        self.pos[i] = ph.pos_m
+
+    def step(self, now_ms: int) -> np.ndarray:
+        for i in self._dirty:
+            self._load(i)
+        self._dirty.clear()
+        if not self.size:
+            return np.zeros(0, np.intp)
+
+        # כמו Physics.update: זמן ההתחלה נקבע בעדכון הראשון
+        starting = np.flatnonzero(self.active & np.isnan(self.start))
+        self.start[starting] = now_ms
+        for i in starting:
+            self._bound[i].start_time = now_ms
+
+        cell_m = np.array([self.board.cell_W_m, self.board.cell_H_m], float)
+        delta_m = (self.target - self.cell) * cell_m
+        dist = np.hypot(delta_m[:, 0], delta_m[:, 1])
+        elapsed = (now_ms - self.start) / 1000.0
+        with np.errstate(divide="ignore", invalid="ignore"):
+            traveled = np.where(dist > 0, np.minimum(1.0, elapsed * self.speed / dist), 1.0)
+
+        moving = np.flatnonzero(self.active & (dist > 0))
+        t = traveled[moving, None]
+        pos = ((1 - t) * self.cell[moving] * cell_m + t * self.target[moving] * cell_m).astype(np.int64)
+        self.pos[moving] = pos
+        for i, (x, y) in zip(moving, pos.tolist()):
+            self._bound[i].pos_m = (x, y)
+
+        return np.flatnonzero(self.active & (traveled >= 1.0))
@@ -1,16 +1,18 @@
 
 from .Board import Board
-from .Physics import Physics
+from .Physics import IdlePhysics, Physics
 
 class PhysicsFactory:
     def __init__(self, board: Board): 
         """Initialize physics factory with board."""
         self.board = board
 
-    def create(self, start_cell, cfg: dict) -> Physics:
+    def create(self, start_cell, cfg: dict, state_name: str = "") -> Physics:
         """Create a physics object with the given configuration.
 
-        cfg must contain: 'speed'
+        cfg must contain: 'speed'.  The "idle" state gets IdlePhysics, which
+        never finishes and cannot capture.
         """
         speed = cfg.get("speed", 1.0)  # ברירת מחדל למהירות
-        return Physics(start_cell=start_cell, board=self.board, speed_m_s=speed)
+        cls = IdlePhysics if state_name == "idle" else Physics
+        return cls(start_cell=start_cell, board=self.board, speed_m_s=speed)
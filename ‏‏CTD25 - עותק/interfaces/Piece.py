@@ -12,6 +12,14 @@ class Piece:
         self._piece_id = piece_id
         self._state = init_state
 
+    @property
+    def piece_id(self) -> str:
+        return self._piece_id
+
+    @piece_id.setter
+    def piece_id(self, value: str):
+        self._piece_id = value
+
     # def is_command_possible(self, cmd: Command) -> bool:
     #     """Check if this command is intended for this piece."""
     #     return cmd.piece_id == self._piece_id
@@ -21,12 +29,18 @@ class Piece:
         if cmd.piece_id != self._piece_id:
             return False
 
+        if not cmd.params or len(cmd.params) < 2:
+            return False  # בלי תא יעד אין מה לבדוק – לא מהלך חוקי
+
         # קבלת המיקום הנוכחי של הכלי
-        current_pos = self._state._physics.cell
-        target_pos = tuple(cmd.params)  # נניח שהפרמטרים הם (row, col)
+        x, y = self._state._physics.cell
+        tx, ty = cmd.params[-1]  # params = [from_cell, to_cell], תאים כ-(x, y)
+        target_pos = (ty, tx)
+        if (tx, ty) == (x, y):
+            return True  # פקודה במקום (קפיצה) – לא מהלך בטבלה
 
-        # קבלת התנועות החוקיות מהמיקום הנוכחי
-        legal_moves = self._state.moves.get_moves(*current_pos)
+        # קבלת התנועות החוקיות מהמיקום הנוכחי (טבלת המהלכים עובדת ב-(row, col))
+        legal_moves = self._state.moves.get_moves(y, x)
 
     # בדוק אם היעד נמצא בין התנועות החוקיות
         return target_pos in legal_moves
@@ -34,7 +48,10 @@ class Piece:
     def on_command(self, cmd: Command, now_ms: int):
         """Handle a command for this piece."""
         if self.is_command_possible(cmd):
-            self._state = self._state.process_command(cmd)
+            state = self._state.process_command(cmd, now_ms)
+            if state is self._state:
+                return False  # הסטייט הנוכחי לא מקבל את הפקודה (למשל באמצע תנועה)
+            self._state = state
             self._state.update(now_ms)
             return True
         return False
@@ -50,11 +67,21 @@ class Piece:
         """Update the piece state based on current time."""
         self._state = self._state.update(now_ms)
 
+    def get_img(self, cell_size=None):
+        """Current animation frame of the piece, optionally at another cell size."""
+        if cell_size is None:
+            return self._state._graphics.get_img()
+        return self._state._graphics.get_img_at(cell_size)
+
+    def get_pos_inpixels(self, board: Board = None):
+        """Top-left pixel of the piece on its board, or on `board`."""
+        return self._state._physics.get_pos_inpixels(board)
+
     def draw_on_board(self, board: Board, now_ms: int):
-        """Draw the piece on the board with its current image."""
-        img = self._state._graphics.get_img()
-        x, y = self._state._physics.get_pos_inpixels()
+        """Draw the piece on the board with its current image (the state is
+        advanced by the game loop, not here)."""
+        img = self.get_img()
+        x, y = self.get_pos_inpixels()
         img.draw_on(board.img, x,y)
-        self._state = self._state.update(now_ms)
     
     
@@ -138,7 +138,8 @@
 
 import pathlib
 import json
-from typing import Dict, Tuple
+import time
+from typing import Dict, Iterable, Optional, Tuple
 from .Board import Board
 from .GraphicsFactory import GraphicsFactory
 from .Moves import Moves
@@ -146,58 +147,86 @@ from .PhysicsFactory import PhysicsFactory
 from .Piece import Piece
 from .State import State
 from .Command import Command
+from .AssetBundle import AssetBundle
+from .SpriteAtlas import LoadTimings, SpriteAtlas
 
 
 class PieceFactory:
-    def __init__(self, board: Board, pieces_root: pathlib.Path):
+    def __init__(self, board: Board, pieces_root: pathlib.Path,
+                 bundle: Optional[AssetBundle] = None):
         self.board = board
         self.pieces_root = pieces_root
         self.graphics_factory = GraphicsFactory()
         self.physics_factory = PhysicsFactory(board)
+        # עם bundle מקומפל – קונפיגים, מהלכים וספרייטים נטענים ממנו ללא פענוח
+        self.bundle = bundle
+        if bundle is not None:
+            bundle.install(SpriteAtlas.shared(), pieces_root)
+        self.timings = LoadTimings()
+
+    def preload(self, p_types: Iterable[str], workers: Optional[int] = None):
+        """Decode the sprites of all states of `p_types` concurrently, so the
+        following create_piece calls only wire the state machines."""
+        folders = [state_dir / "sprites"
+                   for p_type in dict.fromkeys(p_types)
+                   for state_dir in (self.pieces_root / p_type / "states").iterdir()
+                   if state_dir.is_dir()]
+        t0 = time.perf_counter()
+        SpriteAtlas.shared().preload(folders, (self.board.cell_W_pix, self.board.cell_H_pix),
+                                     workers=workers, timings=self.timings)
+        self.timings.wall += time.perf_counter() - t0
+
+    def _read_configs(self, piece_dir: pathlib.Path) -> Dict[str, dict]:
+        if self.bundle is not None:
+            return self.bundle.state_configs(piece_dir.name)
+        configs = {}
+        for state_dir in (piece_dir / "states").iterdir():
+            if not state_dir.is_dir():
+                continue
+            with open(state_dir / "config.json", 'r') as f:
+                configs[state_dir.name] = json.load(f)
+        return configs
 
     def _build_state_machine(self, piece_dir: pathlib.Path) -> State:
-        moves_path = piece_dir / "moves.txt"
-        moves = Moves(moves_path, dims=(self.board.H_cells, self.board.W_cells))
+        dims = (self.board.H_cells, self.board.W_cells)
+        if self.bundle is not None:
+            moves = self.bundle.moves(piece_dir.name, dims)
+        else:
+            moves = Moves(piece_dir / "moves.txt", dims=dims)
 
         states_root = piece_dir / "states"
+        configs = self._read_configs(piece_dir)
         states: Dict[str, State] = {}
 
         # שלב א: צור אובייקטי סטייטים
-        for state_dir in states_root.iterdir():
-            if not state_dir.is_dir():
-                continue
-            state_name = state_dir.name
-            cfg_path = state_dir / "config.json"
-            sprites_dir = state_dir / "sprites"
-
-            with open(cfg_path, 'r') as f:
-                cfg = json.load(f)
-
+        for state_name, cfg in configs.items():
             graphics = self.graphics_factory.load(
-                sprites_dir=sprites_dir,
+                sprites_dir=states_root / state_name / "sprites",
                 cfg=cfg.get("graphics", {}),
                 cell_size=(self.board.cell_W_pix, self.board.cell_H_pix)
             )
-            physics = self.physics_factory.create((0, 0), cfg.get("physics", {}))
+            physics = self.physics_factory.create((0, 0), cfg.get("physics", {}), state_name)
 
-            states[state_name] = State(moves, graphics, physics)
+            states[state_name] = State(moves, graphics, physics, state_name)
 
         # שלב ב: הגדרת מעברים לפי config.json
         for state_name, state in states.items():
-            cfg_path = states_root / state_name / "config.json"
-            with open(cfg_path, 'r') as f:
-                cfg = json.load(f)
-            next_state = cfg.get("physics", {}).get("next_state_when_finished")
+            next_state = configs[state_name].get("physics", {}).get("next_state_when_finished")
             if next_state and next_state in states:
                 state.set_transition("finished", states[next_state])
 
         return states["idle"]
 
     def create_piece(self, p_type: str, cell: Tuple[int, int]) -> Piece:
+        t0 = time.perf_counter()
         piece_dir = self.pieces_root / p_type
         init_state = self._build_state_machine(piece_dir)
 
         init_cmd = Command(timestamp=0, piece_id=p_type, type="idle", params=[cell])
         init_state._physics.reset(init_cmd)
 
-        return Piece(piece_id=p_type, init_state=init_state)
+        piece = Piece(piece_id=p_type, init_state=init_state)
+        elapsed = time.perf_counter() - t0
+        self.timings.wiring += elapsed
+        self.timings.wall += elapsed
+        return piece
@@ -0,0 +1,134 @@
+
+from typing import Dict, List, Optional, Set, Tuple
+import numpy as np
+from .Board import Board
+from .img import Img
+from .SpriteAtlas import SpriteAtlas
+
+Rect = Tuple[int, int, int, int]  # x0, y0, x1, y1 in pixels
+
+
+class DirtyRectRenderer:
+    """
+    Keeps one frame buffer for the board and repaints only what changed.
+
+    The frame is split into tiles of one board cell.  Every call to
+    `render` compares each piece's sprite and pixel position with the
+    previous frame; the tiles under the old and the new rectangle of a
+    changed piece are restored from the background and every piece that
+    overlaps them is composited again, clipped to the tile.  The first
+    frame, a new background, or too many dirty tiles fall back to a full
+    redraw.
+
+    The renderer's board may use another cell size than the pieces' own
+    board (thumbnails, video export); sprites and positions are then taken
+    at the renderer's resolution.
+    """
+
+    def __init__(self, board: Board, full_redraw_ratio: float = 0.5):
+        self.board = board
+        self.full_redraw_ratio = full_redraw_ratio
+        self._frame: Optional[Board] = None
+        self._background: Optional[np.ndarray] = None
+        self._last: Dict[int, tuple] = {}  # id(piece) -> (piece, img, pixels, rect)
+        self.last_dirty_tiles = 0
+        self.last_full_redraw = False
+
+    def invalidate(self):
+        """Force a full redraw on the next frame."""
+        self._background = None
+
+    def render(self, pieces: List) -> Board:
+        bg = self.board.img.img
+        tile_w, tile_h = self.board.cell_W_pix, self.board.cell_H_pix
+        H, W = bg.shape[:2]
+        n_tx, n_ty = -(-W // tile_w), -(-H // tile_h)
+
+        full = (self._frame is None or self._background is not bg
+                or self._frame.img.img.shape != bg.shape)
+
+        entries: List[Tuple[Img, int, int, Optional[Rect]]] = []
+        current: Dict[int, tuple] = {}
+        dirty: Set[Tuple[int, int]] = set()
+        cell_size = (tile_w, tile_h)
+        for p in pieces:
+            img = p.get_img(cell_size)
+            x, y = p.get_pos_inpixels(self.board)
+            pixels = img.img if img is not None else None
+            rect = None
+            if isinstance(pixels, np.ndarray):
+                rect = (x, y, x + pixels.shape[1], y + pixels.shape[0])
+            entries.append((img, x, y, rect))
+
+            prev = self._last.get(id(p))
+            if prev is None or prev[1] is not img or prev[2] is not pixels or prev[3] != rect:
+                if prev is not None:
+                    self._mark(dirty, prev[3], n_tx, n_ty)
+                self._mark(dirty, rect, n_tx, n_ty)
+            current[id(p)] = (p, img, pixels, rect)
+
+        for key, prev in self._last.items():
+            if key not in current:  # piece was captured / removed
+                self._mark(dirty, prev[3], n_tx, n_ty)
+        self._last = current
+
+        if not full and len(dirty) > self.full_redraw_ratio * n_tx * n_ty:
+            full = True
+
+        if full:
+            self._redraw_all(bg, entries)
+            self.last_dirty_tiles = n_tx * n_ty
+        else:
+            self._redraw_tiles(bg, entries, dirty)
+            self.last_dirty_tiles = len(dirty)
+        self.last_full_redraw = full
+        SpriteAtlas.trim_all()  # only now – frames fetched above must survive until drawn
+        return self._frame
+
+    def _mark(self, dirty: Set[Tuple[int, int]], rect: Optional[Rect], n_tx: int, n_ty: int):
+        if rect is None:
+            return
+        tile_w, tile_h = self.board.cell_W_pix, self.board.cell_H_pix
+        x0, y0, x1, y1 = rect
+        tx0, ty0 = max(x0 // tile_w, 0), max(y0 // tile_h, 0)
+        tx1, ty1 = min((x1 - 1) // tile_w, n_tx - 1), min((y1 - 1) // tile_h, n_ty - 1)
+        for ty in range(ty0, ty1 + 1):
+            for tx in range(tx0, tx1 + 1):
+                dirty.add((tx, ty))
+
+    def _redraw_all(self, bg: np.ndarray, entries):
+        if self._frame is None or self._frame.img.img.shape != bg.shape:
+            self._frame = self.board.clone()
+        else:
+            np.copyto(self._frame.img.img, bg)
+        self._background = bg
+        for img, x, y, rect in entries:
+            if rect is not None:
+                img.draw_on(self._frame.img, x, y)
+
+    def _redraw_tiles(self, bg: np.ndarray, entries, dirty: Set[Tuple[int, int]]):
+        if not dirty:
+            return
+        tile_w, tile_h = self.board.cell_W_pix, self.board.cell_H_pix
+        frame = self._frame.img.img
+        H, W = frame.shape[:2]
+
+        # which pieces touch each dirty tile, in draw order
+        per_tile: Dict[Tuple[int, int], list] = {t: [] for t in dirty}
+        for img, x, y, rect in entries:
+            if rect is None:
+                continue
+            x0, y0, x1, y1 = rect
+            for ty in range(max(y0 // tile_h, 0), (y1 - 1) // tile_h + 1):
+                for tx in range(max(x0 // tile_w, 0), (x1 - 1) // tile_w + 1):
+                    if (tx, ty) in per_tile:
+                        per_tile[(tx, ty)].append((img, x, y))
+
+        view = Img()
+        for (tx, ty), items in per_tile.items():
+            x0, y0 = tx * tile_w, ty * tile_h
+            x1, y1 = min(x0 + tile_w, W), min(y0 + tile_h, H)
+            frame[y0:y1, x0:x1] = bg[y0:y1, x0:x1]
+            view.img = frame[y0:y1, x0:x1]
+            for img, x, y in items:
+                img.draw_on(view, x - x0, y - y0)
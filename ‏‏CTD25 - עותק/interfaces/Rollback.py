@@ -0,0 +1,168 @@
+
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Deque, Dict, List, Optional
+from .Command import Command
+from .Snapshot import decode, encode
+
+
+@dataclass
+class _Tick:
+    now: int
+    events: int                 # len(game.events) before the tick ran
+    inputs: List[Command]       # commands handed to the game on this tick
+    undo: bytes                 # packed: the previous tick's header and the pieces that changed since
+    added: tuple = ()           # slots present now but not before (never, short of a restore)
+
+
+@dataclass
+class RollbackReport:
+    """What one late command cost."""
+    command: Command
+    tick_ms: int                # tick the command was applied on
+    now_ms: int                 # tick the game was at (and is back at)
+    depth_ticks: int            # ticks re-simulated
+    restore_ms: float           # rewinding the history and restoring the game
+    resim_ms: float             # re-running the ticks
+    budget_ms: float
+    clamped: bool = False       # older than the history: applied on the oldest tick it still has
+
+    @property
+    def depth_ms(self) -> int:
+        return self.now_ms - self.tick_ms
+
+    @property
+    def cost_ms(self) -> float:
+        return self.restore_ms + self.resim_ms
+
+    @property
+    def within_budget(self) -> bool:
+        return self.cost_ms <= self.budget_ms
+
+
+@dataclass
+class RollbackStats:
+    """Running totals over every rollback so far."""
+    rollbacks: int = 0
+    on_time: int = 0            # late commands that still made the next tick
+    clamped: int = 0
+    over_budget: int = 0
+    total_depth: int = 0
+    max_depth: int = 0
+    total_cost_ms: float = 0.0
+    max_cost_ms: float = 0.0
+    reports: List[RollbackReport] = field(default_factory=list)
+
+    def add(self, report: RollbackReport):
+        self.reports.append(report)
+        if report.depth_ticks == 0:
+            self.on_time += 1
+            return
+        self.rollbacks += 1
+        self.clamped += report.clamped
+        self.over_budget += not report.within_budget
+        self.total_depth += report.depth_ticks
+        self.max_depth = max(self.max_depth, report.depth_ticks)
+        self.total_cost_ms += report.cost_ms
+        self.max_cost_ms = max(self.max_cost_ms, report.cost_ms)
+
+    @property
+    def mean_depth(self) -> float:
+        return self.total_depth / self.rollbacks if self.rollbacks else 0.0
+
+    @property
+    def mean_cost_ms(self) -> float:
+        return self.total_cost_ms / self.rollbacks if self.rollbacks else 0.0
+
+    def report(self) -> str:
+        return (f"rollback: {self.rollbacks} rollbacks ({self.on_time} on time, {self.clamped} clamped), "
+                f"depth mean {self.mean_depth:.1f} / max {self.max_depth} ticks, "
+                f"cost mean {self.mean_cost_ms:.2f} / max {self.max_cost_ms:.2f} ms, "
+                f"{self.over_budget} over budget")
+
+
+class StateHistory:
+    """
+    Ring buffer of the last `depth` ticks of a game, for rolling back to
+    any of them when a command arrives late.  Set as `game.history`; the
+    game calls `record` after every tick.
+
+    Only the newest state is kept whole.  Each tick stores the reverse
+    delta that takes it back to the tick before – that tick's time, hash
+    and unmoved flags, plus the pieces (packed as in Snapshot.encode) that
+    differ between the two – and the commands the tick was handed.  On a
+    quiet board a tick costs a few dozen bytes; rewinding n ticks applies
+    n deltas, so shallow rollbacks, the common case, are the cheapest.
+    `budget_ms` (default one 60 Hz frame) is what a rollback is measured
+    against.
+    """
+
+    def __init__(self, depth: int = 128, budget_ms: float = 1000 / 60):
+        self.depth = depth
+        self.budget_ms = budget_ms
+        self.stats = RollbackStats()
+        self._ticks: Deque[_Tick] = deque(maxlen=depth)
+        self._state: Optional[dict] = None       # snapshot at the newest tick
+        self._pieces: Dict[int, dict] = {}       # slot -> entry of the same
+
+    def __len__(self) -> int:
+        return len(self._ticks)
+
+    @property
+    def nbytes(self) -> int:
+        """Size of the stored deltas."""
+        return sum(len(t.undo) for t in self._ticks)
+
+    @property
+    def oldest_ms(self) -> Optional[int]:
+        return self._ticks[0].now if self._ticks else None
+
+    def clear(self):
+        """Forget everything; the next recorded tick is the new starting point."""
+        self._ticks.clear()
+        self._state, self._pieces = None, {}
+
+    def record(self, game, now: int, inputs: List[Command], events: int):
+        snap = game.snapshot()
+        if self._state is None:
+            self._set_state(snap)
+            return
+        prev, pieces = self._state, {e["slot"]: e for e in snap["pieces"]}
+        changed = [e for slot, e in self._pieces.items() if pieces.get(slot) != e]
+        added = tuple(slot for slot in pieces if slot not in self._pieces)
+        undo = encode({"now": prev["now"], "hash": prev["hash"], "unmoved": prev["unmoved"],
+                       "pieces": changed})
+        self._ticks.append(_Tick(now, events, inputs, undo, added))
+        self._state, self._pieces = snap, pieces
+
+    def ticks_since(self, time_ms: int) -> List[_Tick]:
+        """The stored ticks at or after `time_ms`, oldest first."""
+        ticks = []
+        for t in reversed(self._ticks):
+            if t.now < time_ms:
+                break
+            ticks.append(t)
+        ticks.reverse()
+        return ticks
+
+    def rewind(self, n: int) -> dict:
+        """Drop the newest `n` ticks and return the snapshot from just before them."""
+        if not 0 < n <= len(self._ticks):
+            raise ValueError(f"Can rewind 1..{len(self._ticks)} ticks, not {n}")
+        pieces = dict(self._pieces)
+        for _ in range(n):
+            t = self._ticks.pop()
+            undo = decode(t.undo)
+            for slot in t.added:
+                del pieces[slot]
+            pieces.update((e["slot"], e) for e in undo["pieces"])
+            header = undo
+        snap = {"now": header["now"], "unmoved": header["unmoved"], "hash": header["hash"],
+                "pieces": [pieces[slot] for slot in sorted(pieces)]}  # הכלים תמיד לפי סדר ה-slot
+        self._state, self._pieces = snap, pieces
+        return snap
+
+    def _set_state(self, snap: dict):
+        self._state = snap
+        self._pieces = {e["slot"]: e for e in snap["pieces"]}
+
@@ -0,0 +1,72 @@
+
+import heapq
+import itertools
+import math
+from typing import Dict, List
+from .Physics import IdlePhysics
+
+
+class Scheduler:
+    """
+    Min-heap of the next time each piece needs an update.
+
+    A piece is due when its physics will finish (a rest ending, a move
+    arriving), when its animation flips to the next frame, or on every
+    tick while it travels (its drawn position changes continuously).
+    Idle pieces with a finished animation are never due.  Rescheduling a
+    piece leaves its old heap entry behind; stale entries are recognized
+    by a per-piece version and skipped.
+    """
+
+    def __init__(self):
+        self._heap: List[tuple] = []
+        self._version: Dict[int, int] = {}
+        self._pieces: Dict[int, object] = {}
+        self._seq = itertools.count()
+
+    def __len__(self) -> int:
+        return len(self._pieces)
+
+    def schedule(self, piece, due: float):
+        key = id(piece)
+        version = self._version.get(key, 0) + 1
+        self._version[key] = version
+        self._pieces[key] = piece
+        if due != math.inf:
+            heapq.heappush(self._heap, (due, next(self._seq), key, version))
+
+    def remove(self, piece):
+        key = id(piece)
+        self._pieces.pop(key, None)
+        self._version[key] = self._version.get(key, 0) + 1
+
+    def pop_due(self, now_ms: int) -> List:
+        """All pieces due at or before `now_ms`, earliest first; they are
+        unscheduled until `schedule` is called for them again."""
+        due = []
+        heap = self._heap
+        while heap and heap[0][0] <= now_ms:
+            _, _, key, version = heapq.heappop(heap)
+            if self._version.get(key) == version and key in self._pieces:
+                self._version[key] = version + 1
+                due.append(self._pieces[key])
+        return due
+
+    @staticmethod
+    def next_due(piece, now_ms: int) -> float:
+        """When `piece` next needs an update, given it was just updated at `now_ms`."""
+        state = piece._state
+        physics, graphics = state._physics, state._graphics
+        if not isinstance(physics, IdlePhysics):
+            if physics.start_time is None or physics.target_cell != physics.cell:
+                return now_ms + 1  # בתנועה – המיקום משתנה בכל טיק
+            if "finished" in state.transitions:
+                return now_ms + 1  # מנוחה שמסתיימת בעדכון הבא
+
+        if graphics.total_frames == 0 or not hasattr(graphics, "_start_time"):
+            return now_ms + 1
+        frame_ms = 1000 / graphics.fps
+        frame = int((now_ms - graphics._start_time) // frame_ms)
+        if not graphics.loop and frame + 1 >= graphics.total_frames:
+            return math.inf
+        return max(now_ms + 1, math.ceil(graphics._start_time + (frame + 1) * frame_ms))
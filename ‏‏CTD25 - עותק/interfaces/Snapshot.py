@@ -0,0 +1,114 @@
+
+import struct
+from typing import Dict, List
+
+MAGIC = b"CTDS"
+VERSION = 1
+HEADER = struct.Struct("<4sBiQBB")      # magic, version, now, hash, names, unmoved bytes
+PIECE = struct.Struct("<HHBBbbh")       # slot, square, state, flags, cell x, y, frame
+NONE16 = 0xFFFF
+
+# optional fields after the fixed part, in this order
+HAS_TARGET = 1       # target cell ≠ cell: 2 x int8
+HAS_START = 2        # physics start time: int32
+HAS_FRAME_START = 4  # graphics start time: int32
+HAS_POS = 8          # position off its cell: 2 x int32
+HAS_CMD = 16         # type of the command being carried out: name index
+
+TARGET = struct.Struct("<bb")
+TIME = struct.Struct("<i")
+POS = struct.Struct("<ii")
+NAME = struct.Struct("<B")
+
+
+def encode(snap: dict) -> bytes:
+    """
+    Pack a `Game.snapshot` into its binary form.
+
+    Only dynamic state is stored; everything else (sprites, moves, board,
+    the state machines themselves) comes from the assets the game is
+    restored against.  State and command names are listed once up front
+    and referred to by index.  Each piece is a fixed 10-byte record –
+    slot, square in the position, state, a flags byte, cell, animation
+    frame – followed by only those of target cell, start times, exact
+    position and pending command that differ from their resting
+    defaults.  A full 32-piece board at rest packs into ~500 bytes.
+    """
+    names: Dict[str, int] = {}
+    for e in snap["pieces"]:
+        names.setdefault(e["state"], len(names))
+        if e["cmd"] is not None:
+            names.setdefault(e["cmd"], len(names))
+    unmoved = snap["unmoved"].to_bytes((snap["unmoved"].bit_length() + 7) // 8, "little")
+    out = [HEADER.pack(MAGIC, VERSION, snap["now"], snap["hash"], len(names), len(unmoved)), unmoved]
+    for name in names:
+        raw = name.encode()
+        out.append(NAME.pack(len(raw)) + raw)
+    out.append(struct.pack("<H", len(snap["pieces"])))
+
+    for e in snap["pieces"]:
+        (x, y), target = e["cell"], e["target"]
+        flags = 0
+        extra = []
+        if target != [x, y]:
+            flags |= HAS_TARGET
+            extra.append(TARGET.pack(*target))
+        if e["start"] is not None:
+            flags |= HAS_START
+            extra.append(TIME.pack(e["start"]))
+        if e["frame_start"] is not None:
+            flags |= HAS_FRAME_START
+            extra.append(TIME.pack(e["frame_start"]))
+        if e["pos"] is not None:
+            flags |= HAS_POS
+            extra.append(POS.pack(*e["pos"]))
+        if e["cmd"] is not None:
+            flags |= HAS_CMD
+            extra.append(NAME.pack(names[e["cmd"]]))
+        square = NONE16 if e["square"] is None else e["square"]
+        frame = -1 if e["frame"] is None else e["frame"]
+        out.append(PIECE.pack(e["slot"], square, names[e["state"]], flags, x, y, frame))
+        out.extend(extra)
+    return b"".join(out)
+
+
+def decode(raw: bytes) -> dict:
+    """The `Game.snapshot` dict back from `encode`'s bytes."""
+    magic, version, now, pos_hash, n_names, n_unmoved = HEADER.unpack_from(raw)
+    if magic != MAGIC or version != VERSION:
+        raise ValueError(f"Not a version {VERSION} game snapshot")
+    off = HEADER.size
+    unmoved = int.from_bytes(raw[off:off + n_unmoved], "little")
+    off += n_unmoved
+    names: List[str] = []
+    for _ in range(n_names):
+        length = raw[off]
+        names.append(raw[off + 1:off + 1 + length].decode())
+        off += 1 + length
+    count, = struct.unpack_from("<H", raw, off)
+    off += 2
+
+    pieces = []
+    for _ in range(count):
+        slot, square, state, flags, x, y, frame = PIECE.unpack_from(raw, off)
+        off += PIECE.size
+        e = {"slot": slot, "state": names[state], "square": None if square == NONE16 else square,
+             "cell": [x, y], "target": [x, y], "start": None, "frame_start": None,
+             "pos": None, "cmd": None, "frame": None if frame == -1 else frame}
+        if flags & HAS_TARGET:
+            e["target"] = list(TARGET.unpack_from(raw, off))
+            off += TARGET.size
+        if flags & HAS_START:
+            e["start"], = TIME.unpack_from(raw, off)
+            off += TIME.size
+        if flags & HAS_FRAME_START:
+            e["frame_start"], = TIME.unpack_from(raw, off)
+            off += TIME.size
+        if flags & HAS_POS:
+            e["pos"] = list(POS.unpack_from(raw, off))
+            off += POS.size
+        if flags & HAS_CMD:
+            e["cmd"] = names[raw[off]]
+            off += NAME.size
+        pieces.append(e)
+    return {"now": now, "unmoved": unmoved, "hash": pos_hash, "pieces": pieces}
@@ -0,0 +1,347 @@
+
+import pathlib
+import threading
+import time
+import weakref
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Tuple
+import cv2
+import numpy as np
+from .img import Img
+
+AtlasKey = Tuple[str, Tuple[int, int], int]  # folder, cell size, interpolation
+
+
+@dataclass
+class LoadTimings:
+    """Startup time per loading stage, in seconds.
+
+    The stage times are summed over all worker threads, so with parallel
+    loading they can add up to more than `wall`.
+    """
+    io: float = 0.0
+    decode: float = 0.0
+    resize: float = 0.0
+    wiring: float = 0.0
+    wall: float = 0.0
+    frames: int = 0
+
+    def __post_init__(self):
+        self._lock = threading.Lock()
+
+    def add(self, io: float = 0.0, decode: float = 0.0, resize: float = 0.0, frames: int = 0):
+        with self._lock:
+            self.io += io
+            self.decode += decode
+            self.resize += resize
+            self.frames += frames
+
+    def report(self) -> str:
+        return (f"startup: {self.wall * 1000:.1f} ms wall, {self.frames} sprites | "
+                f"file I/O {self.io * 1000:.1f} ms, decode {self.decode * 1000:.1f} ms, "
+                f"resize {self.resize * 1000:.1f} ms, state wiring {self.wiring * 1000:.1f} ms")
+
+
+class SpriteAtlas:
+    """
+    Decoded sprite frames shared by every Graphics in the process.
+
+    Frames are normalized to BGRA and packed into read-only pages of shape
+    (frames, h, w, 4), one variant per (folder, cell size, interpolation).
+    A whole set of sprite folders loaded through `preload` lands in a
+    single page; a folder first requested on its own gets a page of its
+    own.  Each frame is handed out as one Img wrapping a view of its page,
+    so all pieces of a type draw from the same pixels (and the same blend
+    planes).
+
+    The full-size decoded PNGs of variants built on demand are cached as
+    well, so another cell size or interpolation of the same folder is only
+    a resize away; `preload` drops them once resized (they are tens of
+    times the size of the frames) unless asked to `keep_sources`.  Pages from
+    `preload`/`add_page` stay resident.  Sources and the variants created
+    on demand by `frames` are kept in an LRU: once they take more than
+    `max_bytes` – counting the blend planes their frames build when first
+    drawn, up to twice the size of the frames – the least recently
+    used ones are dropped by `trim` and rebuilt the next time they are
+    asked for.  A dropped frame lets go of its pixels even if a Graphics
+    still holds it, so nothing is dropped while frames are being fetched
+    and drawn: the renderer calls `trim_all` once its pass is done.
+    """
+
+    _shared: Optional["SpriteAtlas"] = None
+    _resolved: Dict[str, str] = {}  # folder as given -> resolved path
+    _instances: "weakref.WeakSet[SpriteAtlas]" = weakref.WeakSet()
+    DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+
+    def __init__(self, max_bytes: Optional[int] = DEFAULT_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self._pages: List[np.ndarray] = []
+        self._index: Dict[AtlasKey, Tuple[Img, ...]] = {}
+        self._sources: Dict[str, List[np.ndarray]] = {}
+        # LRU over on-demand variants (AtlasKey -> page) and sources (folder -> frames)
+        self._lru: "OrderedDict[object, object]" = OrderedDict()
+        self._plane_bytes: Dict[AtlasKey, int] = {}  # blend planes built so far, per variant
+        self.lru_bytes = 0
+        self.evictions = 0
+        self.source_decodes = 0
+        SpriteAtlas._instances.add(self)
+
+    @classmethod
+    def shared(cls) -> "SpriteAtlas":
+        """The process-wide atlas used when a Graphics is not given one."""
+        if cls._shared is None:
+            cls._shared = cls()
+        return cls._shared
+
+    @classmethod
+    def key(cls, folder: pathlib.Path, cell_size: Tuple[int, int],
+            interpolation: int = cv2.INTER_AREA) -> AtlasKey:
+        # resolve() hits the file system – done once per folder, not per frame
+        name = str(folder)
+        resolved = cls._resolved.get(name)
+        if resolved is None:
+            resolved = cls._resolved[name] = str(pathlib.Path(folder).resolve())
+        return (resolved, (int(cell_size[0]), int(cell_size[1])), int(interpolation))
+
+    @property
+    def nbytes(self) -> int:
+        return (sum(page.nbytes for page in self._pages)
+                + sum(f.nbytes for frames in self._sources.values() for f in frames)
+                + sum(self._plane_bytes.values()))
+
+    def __contains__(self, key: AtlasKey) -> bool:
+        return key in self._index
+
+    def frames(self, folder: pathlib.Path, cell_size: Tuple[int, int],
+               interpolation: int = cv2.INTER_AREA) -> Tuple[Img, ...]:
+        """All frames of a sprites folder at `cell_size`, built on first use
+        from the cached source images (decoded only if not cached)."""
+        key = self.key(folder, cell_size, interpolation)
+        frames = self._index.get(key)
+        if frames is not None:
+            if key in self._lru:
+                self._lru.move_to_end(key)
+            return frames
+
+        sources = self._source_frames(key[0])
+        resized = [_resize(src, key[1], interpolation) for src in sources]
+        self._add_page([(key, resized)])
+        self._remember(key, self._pages[-1])
+        return self._index[key]
+
+    def _source_frames(self, folder: str) -> List[np.ndarray]:
+        sources = self._sources.get(folder)
+        if sources is not None:
+            self._lru.move_to_end(folder)
+            return sources
+        files = _sprite_files(pathlib.Path(folder))
+        sources = [_read_source(f) for f in files]
+        self.source_decodes += 1
+        self._sources[folder] = sources
+        self._remember(folder, sources)
+        return sources
+
+    def _remember(self, lru_key, owner):
+        nbytes = owner.nbytes if isinstance(owner, np.ndarray) else sum(f.nbytes for f in owner)
+        self._lru[lru_key] = owner
+        self.lru_bytes += nbytes
+
+    def set_memory_limit(self, max_bytes: Optional[int]):
+        """Change the cap on lazily loaded frames (None = unbounded)."""
+        self.max_bytes = max_bytes
+        self._evict()
+
+    def trim(self):
+        """Drop least recently used entries until the LRU is back under the cap."""
+        self._evict()
+
+    @classmethod
+    def trim_all(cls):
+        """`trim` every atlas in the process (after a render pass)."""
+        for atlas in list(cls._instances):
+            atlas._evict()
+
+    def _charge(self, key: AtlasKey, nbytes: int):
+        """A frame of `key` just built its blend planes; they count toward the cap too."""
+        self._plane_bytes[key] = self._plane_bytes.get(key, 0) + nbytes
+        if key in self._lru:
+            self._lru.move_to_end(key)
+            self.lru_bytes += nbytes
+
+    def _evict(self):
+        # the most recent entry always stays, even if it alone is over the cap
+        while self.max_bytes is not None and self.lru_bytes > self.max_bytes and len(self._lru) > 1:
+            lru_key, owner = self._lru.popitem(last=False)
+            if isinstance(owner, np.ndarray):
+                for img in self._index.pop(lru_key):
+                    img.release()  # גם Graphics שמחזיק את הפריים כבר לא מחזיק את הדף
+                self._pages = [p for p in self._pages if p is not owner]
+                self.lru_bytes -= owner.nbytes + self._plane_bytes.pop(lru_key, 0)
+            else:
+                del self._sources[lru_key]
+                self.lru_bytes -= sum(f.nbytes for f in owner)
+            self.evictions += 1
+
+    def preload(self, folders: Iterable[pathlib.Path], cell_size: Tuple[int, int],
+                workers: Optional[int] = 1, timings: Optional[LoadTimings] = None,
+                interpolation: int = cv2.INTER_AREA, keep_sources: bool = False):
+        """Decode every folder not loaded yet and pack them into one page.
+
+        With `workers` other than 1 the PNGs are read, decoded and resized on
+        a thread pool (None = the executor's default size); OpenCV releases
+        the GIL for the heavy parts.  Folders whose sources are already
+        cached are only resized.  With `keep_sources` the decoded sources
+        go into the LRU for later variants.
+        """
+        todo: Dict[AtlasKey, pathlib.Path] = {}
+        for folder in folders:
+            key = self.key(folder, cell_size, interpolation)
+            if key not in self._index:
+                todo.setdefault(key, pathlib.Path(folder))
+        if not todo:
+            return
+
+        decoded = []
+        for key, (sources, resized) in zip(todo, _decode_all(
+                [self._sources.get(key[0]) or _sprite_files(folder) for key, folder in todo.items()],
+                next(iter(todo))[1], interpolation, workers, timings)):
+            if keep_sources and key[0] not in self._sources:
+                self._sources[key[0]] = sources
+                self._remember(key[0], sources)
+            decoded.append((key, resized))
+        self._add_page(decoded)
+        self._evict()
+
+    def _add_page(self, decoded: List[Tuple[AtlasKey, List[np.ndarray]]]):
+        page = np.stack([frame for _, frames in decoded for frame in frames])
+        page.flags.writeable = False
+        self.add_page(page, [(key, len(frames)) for key, frames in decoded])
+
+    def add_page(self, page: np.ndarray, layout: List[Tuple[AtlasKey, int]]):
+        """
+        Register an already packed page (e.g. a memory-mapped bundle).
+        `layout` lists the key and frame count of each folder, in page order.
+        """
+        self._pages.append(page)
+        i = 0
+        for key, count in layout:
+            imgs = []
+            for _ in range(count):
+                img = _AtlasImg(self, key)
+                img.img = page[i]
+                imgs.append(img)
+                i += 1
+            self._index[key] = tuple(imgs)
+
+    @staticmethod
+    def decode_folders(folders: List[pathlib.Path], cell_size: Tuple[int, int],
+                       workers: Optional[int] = 1,
+                       timings: Optional[LoadTimings] = None,
+                       interpolation: int = cv2.INTER_AREA) -> List[List[np.ndarray]]:
+        """Decode and resize the sprites of each folder, optionally on a thread pool."""
+        jobs = [_sprite_files(pathlib.Path(folder)) for folder in folders]
+        return [resized for _, resized in _decode_all(jobs, cell_size, interpolation, workers, timings)]
+
+    @staticmethod
+    def _decode_folder(folder: pathlib.Path, cell_size: Tuple[int, int]) -> List[np.ndarray]:
+        return SpriteAtlas.decode_folders([folder], cell_size)[0]
+
+
+class _AtlasImg(Img):
+    """
+    A frame handed out by the atlas.  The blend planes it builds on its
+    first draw are reported to the atlas, and `release` (on eviction)
+    drops both them and the view of the page, so whoever still holds the
+    frame no longer keeps the page alive; Graphics fetches it again.
+    """
+
+    def __init__(self, atlas: SpriteAtlas, key: AtlasKey):
+        super().__init__()
+        self._atlas = atlas
+        self._key = key
+
+    def _blend_planes(self):
+        fresh = getattr(self, "_planes_src", None) is not self.img
+        planes = super()._blend_planes()
+        if fresh and self._atlas is not None:
+            self._atlas._charge(self._key, sum(p.nbytes for p in planes if p is not None))
+        return planes
+
+    def release(self):
+        self.img = None
+        self._atlas = None
+        self.__dict__.pop("_planes", None)
+        self.__dict__.pop("_planes_src", None)
+
+
+def _sprite_files(folder: pathlib.Path) -> List[pathlib.Path]:
+    files = sorted(folder.glob("*.png"))
+    if not files:
+        raise ValueError(f"No sprites found in: {folder}")
+    return files
+
+
+def _decode_all(jobs: List[list], cell_size: Tuple[int, int], interpolation: int,
+                workers: Optional[int], timings: Optional[LoadTimings]):
+    """
+    For each job – a list of sprite files, or of already decoded sources –
+    return (sources, resized frames).  Work is spread per sprite over a
+    thread pool unless `workers` is 1.
+    """
+    def one(item):
+        if isinstance(item, np.ndarray):
+            src = item
+        else:
+            src = _read_source(item, timings)
+        t0 = time.perf_counter()
+        out = _resize(src, cell_size, interpolation, getattr(item, "name", "sprite"))
+        if timings is not None:
+            timings.add(resize=time.perf_counter() - t0)
+        return src, out
+
+    flat = [item for items in jobs for item in items]
+    if workers == 1:
+        results = [one(item) for item in flat]
+    else:
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(one, flat))
+
+    out, i = [], 0
+    for items in jobs:
+        chunk = results[i:i + len(items)]
+        out.append(([src for src, _ in chunk], [frame for _, frame in chunk]))
+        i += len(items)
+    return out
+
+
+def _read_source(file: pathlib.Path, timings: Optional[LoadTimings] = None) -> np.ndarray:
+    """Read and decode one sprite at its original size, as BGRA."""
+    t0 = time.perf_counter()
+    data = np.fromfile(str(file), dtype=np.uint8)
+    t1 = time.perf_counter()
+    pixels = cv2.imdecode(data, cv2.IMREAD_UNCHANGED)
+    if pixels is None:
+        raise FileNotFoundError(f"Cannot load image: {file}")
+    pixels = _to_bgra(pixels)
+    t2 = time.perf_counter()
+    if timings is not None:
+        timings.add(io=t1 - t0, decode=t2 - t1, frames=1)
+    return pixels
+
+
+def _resize(src: np.ndarray, cell_size: Tuple[int, int], interpolation: int,
+            name: str = "sprite") -> np.ndarray:
+    pixels = cv2.resize(src, tuple(cell_size), interpolation=interpolation)
+    if pixels.shape[1] > cell_size[0] or pixels.shape[0] > cell_size[1]:
+        raise ValueError(f"Sprite {name} size {pixels.shape[1]}x{pixels.shape[0]} too big for cell {cell_size}")
+    return pixels
+
+
+def _to_bgra(pixels: np.ndarray) -> np.ndarray:
+    if pixels.ndim == 2:
+        return cv2.cvtColor(pixels, cv2.COLOR_GRAY2BGRA)
+    if pixels.shape[2] == 3:
+        return cv2.cvtColor(pixels, cv2.COLOR_BGR2BGRA)
+    return pixels
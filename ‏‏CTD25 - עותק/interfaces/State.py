@@ -8,8 +8,9 @@ from typing import Dict, Optional
 
 
 class State:
-    def __init__(self, moves: Moves, graphics: Graphics, physics: Physics):
+    def __init__(self, moves: Moves, graphics: Graphics, physics: Physics, name: str = ""):
         """Initialize state with moves, graphics, and physics."""
+        self.name = name  # שם הסטייט כמו בתיקיית states (idle, move, ...)
         self.moves = moves
         self._graphics = graphics
         self._physics = physics
@@ -29,6 +30,11 @@ class State:
         completed_cmd = self._physics.update(now_ms)
 
         if completed_cmd is not None:
+            if "finished" in self.transitions:
+                # סיום תנועה/מנוחה – עוברים לסטייט הבא בתא היעד
+                end = self._physics.target_cell
+                done = Command(now_ms, completed_cmd.piece_id, "finished", [end, end])
+                return self.process_command(done, now_ms)
             return self.process_command(completed_cmd, now_ms)
 
         return self
@@ -48,4 +54,23 @@ class State:
     
     def copy(self) -> "State":
         """Return a deep copy of this state (excluding command state)."""
-        return State(self.moves, self._graphics.copy(), self._physics.copy())
+        return State(self.moves, self._graphics.copy(), self._physics.copy(), self.name)
+
+    def copy_machine(self) -> "State":
+        """Copy this state and every state reachable from it, re-wiring the
+        transitions between the copies.  Graphics copies share sprite frames."""
+        copies: Dict[int, State] = {}
+        originals = []
+        pending = [self]
+        while pending:
+            state = pending.pop()
+            if id(state) in copies:
+                continue
+            copies[id(state)] = state.copy()
+            originals.append(state)
+            pending.extend(state.transitions.values())
+
+        for state in originals:
+            for event, target in state.transitions.items():
+                copies[id(state)].set_transition(event, copies[id(target)])
+        return copies[id(self)]
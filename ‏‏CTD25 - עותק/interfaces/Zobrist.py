@@ -0,0 +1,83 @@
+
+import hashlib
+from collections import OrderedDict
+from typing import Callable, Dict, Hashable, List, Optional, Tuple
+
+
+class ZobristKeys:
+    """
+    64-bit random keys for Zobrist hashing: one per (piece id, state,
+    square), plus one per square for "this piece has not moved yet".
+
+    Keys are derived from a hash of their name instead of a random
+    generator, so every process (and every run) gets the same keys no
+    matter in which order they are first asked for – hashes can be
+    compared across processes and saved games.
+    """
+
+    def __init__(self, squares: int, seed: str = "ctd25"):
+        self.squares = squares
+        self.seed = seed
+        self._keys: Dict[Tuple[str, str], List[int]] = {}
+        self.unmoved = self._derive("unmoved")
+
+    def _derive(self, name: str) -> List[int]:
+        return [int.from_bytes(hashlib.blake2b(f"{self.seed}:{name}:{sq}".encode(),
+                                               digest_size=8).digest(), "little")
+                for sq in range(self.squares)]
+
+    def piece(self, piece_id: str, state: str, sq: int) -> int:
+        keys = self._keys.get((piece_id, state))
+        if keys is None:
+            keys = self._keys[(piece_id, state)] = self._derive(f"{piece_id}/{state}")
+        return keys[sq]
+
+
+class TranspositionCache:
+    """
+    Bounded memo of data derived from a position (legal moves, attack
+    maps, evaluations), keyed by (Zobrist hash, kind).  When full, the
+    least recently used entry is dropped.
+    """
+
+    def __init__(self, max_entries: int = 4096):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Tuple[int, Hashable], object]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def get(self, pos_hash: int, kind: Hashable) -> Optional[object]:
+        key = (pos_hash, kind)
+        value = self._entries.get(key)
+        if value is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def put(self, pos_hash: int, kind: Hashable, value: object):
+        key = (pos_hash, kind)
+        self._entries[key] = value
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def get_or_compute(self, pos_hash: int, kind: Hashable, compute: Callable[[], object]) -> object:
+        value = self.get(pos_hash, kind)
+        if value is None:
+            value = compute()
+            self.put(pos_hash, kind, value)
+        return value
+
+    def clear(self):
+        self._entries.clear()
+        self.hits = self.misses = 0
@@ -53,38 +53,68 @@ class Img:
 
         return self
 
-    def draw_on(self, other_img, x, y):
-        if self.img is None or other_img.img is None:
-            raise ValueError("Both images must be loaded before drawing.")
-
-        if self.img.shape[2] != other_img.img.shape[2]:
-            if self.img.shape[2] == 3 and other_img.img.shape[2] == 4:
-                self.img = cv2.cvtColor(self.img, cv2.COLOR_BGR2BGRA)
-            elif self.img.shape[2] == 4 and other_img.img.shape[2] == 3:
-                self.img = cv2.cvtColor(self.img, cv2.COLOR_BGRA2BGR)
-
-        h, w = self.img.shape[:2]
-        H, W = other_img.img.shape[:2]
+    def _blend_planes(self) -> tuple[np.ndarray, np.ndarray | None]:
+        """
+        Return the sprite in compositing form, computed once per pixel buffer.
 
+        For a BGRA sprite this is ``(color * alpha, 255 - alpha)`` as uint16,
+        i.e. the premultiplied colour and the inverse coverage that the
+        destination is scaled by.  Opaque sprites return ``(bgr, None)`` and
+        are copied straight into the destination.
+        """
+        if getattr(self, "_planes_src", None) is self.img:
+            return self._planes
 
+        src = self.img
+        if src.ndim == 2:
+            src = cv2.cvtColor(src, cv2.COLOR_GRAY2BGR)
 
-        if y + h > H or x + w > W:
-            raise ValueError("Logo does not fit at the specified position.")
+        if src.shape[2] == 4 and src[..., 3].min() < 255:
+            alpha = src[..., 3:4].astype(np.uint16)
+            premul = src[..., :3].astype(np.uint16) * alpha
+            planes = (premul, 255 - alpha)
+        else:
+            planes = (np.ascontiguousarray(src[..., :3]), None)
 
-        roi = other_img.img[ y:y + h, x:x + w]
+        self._planes_src = self.img
+        self._planes = planes
+        return planes
 
-        if self.img.shape[2] == 4:
-            b, g, r, a = cv2.split(self.img)
-            mask = a / 255.0
-            for c in range(3):
-                roi[..., c] = (1 - mask) * roi[..., c] + mask * self.img[..., c]
-            # other_img.img[y:y + h, x:x + w] = roi
+    def draw_on(self, other_img, x, y):
+        """
+        Alpha-blend this image onto `other_img` with its top-left at (x, y).
 
-        else:
-            other_img.img[y:y + h, x:x + w] = self.img
+        Only the colour channels of the destination are written; a BGRA
+        destination keeps its own alpha.  Parts that fall outside
+        `other_img` are clipped away.
+        """
+        if self.img is None or other_img.img is None:
+            raise ValueError("Both images must be loaded before drawing.")
 
+        h, w = self.img.shape[:2]
+        H, W = other_img.img.shape[:2]
 
- 
+        # clip the sprite rectangle against the destination
+        x0, y0 = max(x, 0), max(y, 0)
+        x1, y1 = min(x + w, W), min(y + h, H)
+        if x0 >= x1 or y0 >= y1:
+            return
+
+        color, inv_alpha = self._blend_planes()
+        sy, sx = slice(y0 - y, y1 - y), slice(x0 - x, x1 - x)
+        roi = other_img.img[y0:y1, x0:x1, :3]
+
+        if inv_alpha is None:
+            roi[...] = color[sy, sx]
+            return
+
+        # single integer pass: (src*a + dst*(255-a)) / 255, rounded
+        acc = roi * inv_alpha[sy, sx]
+        acc += color[sy, sx]
+        acc += 128
+        acc += acc >> 8
+        acc >>= 8
+        roi[...] = acc
 
     def put_text(self, txt, x, y, font_size, color=(255, 255, 255, 255), thickness=1):
         if self.img is None:
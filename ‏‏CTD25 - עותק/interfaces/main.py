@@ -9,46 +9,45 @@ from .PhysicsFactory import PhysicsFactory
 from .Command import Command
 from .PieceFactory import PieceFactory
 from .img import Img  # ייבוא הכרחי
+from .AssetBundle import AssetBundle
+from .BoardLayout import read_board
+from .SpriteAtlas import LoadTimings, SpriteAtlas
 
 import json
+import time
+from typing import Optional
 
 def read_config(path):
     with open(path, "r") as f:
         return json.load(f)
 
-def read_board(path: pathlib.Path) -> list[tuple[str, tuple[int, int]]]:
-    with open(path) as f:
-        lines = [line.strip().split(",") for line in f if line.strip()]
-
-    board_data = []
-    for row_idx, row in enumerate(lines):
-        for col_idx, cell in enumerate(row):
-            if cell:
-                board_data.append((cell.strip(), (col_idx, row_idx))) 
-    return board_data
-
-def create_piece(piece_id: str, location: tuple[int, int], root_folder: pathlib.Path, board: Board) -> Piece:
+def create_piece(piece_id: str, location: tuple[int, int], root_folder: pathlib.Path, board: Board,
+                 bundle: Optional[AssetBundle] = None) -> Piece:
     folder = root_folder / piece_id
-    moves = Moves(folder / "moves.txt", (board.H_cells, board.W_cells))
-    states = {}
     states_folder = folder / "states"
-    for subfolder in states_folder.iterdir():
-        state_name = subfolder.name
-        cfg_path = subfolder / "config.json"
-        cfg = read_config(cfg_path)
+    if bundle is not None:
+        moves = bundle.moves(piece_id, (board.H_cells, board.W_cells))
+        configs = bundle.state_configs(piece_id)
+    else:
+        moves = Moves(folder / "moves.txt", (board.H_cells, board.W_cells))
+        configs = {sub.name: read_config(sub / "config.json") for sub in states_folder.iterdir()}
+
+    states = {}
+    for state_name, cfg in configs.items():
+        subfolder = states_folder / state_name
 
-        physics = PhysicsFactory(board).create(location, cfg["physics"])
+        physics = PhysicsFactory(board).create(location, cfg["physics"], state_name)
         graphics = GraphicsFactory().load(subfolder / "sprites", cfg["graphics"], (board.cell_W_pix, board.cell_H_pix))
 
-        states[state_name] = State(moves, graphics, physics)
+        states[state_name] = State(moves, graphics, physics, state_name)
 
-    # Transitions
+    # Transitions – פקודות מ-idle, וסיום כל סטייט לפי next_state_when_finished
     states["idle"].set_transition("move", states["move"])
     states["idle"].set_transition("jump", states["jump"])
-    states["move"].set_transition("long_rest", states["long_rest"])
-    states["jump"].set_transition("short_rest", states["short_rest"])
-    states["long_rest"].set_transition("idle", states["idle"])
-    states["short_rest"].set_transition("idle", states["idle"])
+    for state_name, cfg in configs.items():
+        next_state = cfg.get("physics", {}).get("next_state_when_finished")
+        if state_name != "idle" and next_state in states:
+            states[state_name].set_transition("finished", states[next_state])
 
     cmd = Command(piece_id=piece_id, type="idle", params=[location, location], timestamp=0)
     states["idle"].reset(cmd)
@@ -56,37 +55,79 @@ def create_piece(piece_id: str, location: tuple[int, int], root_folder: pathlib.
     return Piece(piece_id, states["idle"])
 
 def clone_piece(template_piece: Piece, location: tuple[int, int]) -> Piece:
-        state_copy = template_piece._state.copy()  # יצירת עותק של ה־State
+        state_copy = template_piece._state.copy_machine()  # עותק של כל מכונת המצבים
         cmd = Command(piece_id=template_piece._piece_id, type="idle", params=[location, location], timestamp=0)
         state_copy.reset(cmd)
         state_copy.update(0)
         return Piece(template_piece._piece_id, state_copy)
 
-def create_game(board_txt_path: pathlib.Path, root_folder: pathlib.Path) -> Game:
-    img = Img().read("board.png", size=(64 * 8, 64 * 8))  # קריאת תמונת הלוח
-    board = Board(64, 64, 1, 1, 8, 8, img)  # יצירת לוח עם התמונה
-    board_data = read_board(board_txt_path)
+def create_game(board_txt_path: pathlib.Path, root_folder: pathlib.Path, use_bundle: bool = True,
+                workers: Optional[int] = None, report: bool = False, cell_size: int = 64,
+                batch_physics: bool = False, headless: bool = False,
+                bundle_path: Optional[pathlib.Path] = None) -> Game:
+    """
+    Build the game from a board layout and the pieces folder.
+
+    With `use_bundle` the compiled asset bundle is memory-mapped (and
+    rebuilt first if missing or stale); it lives at `bundle_path`, by
+    default `assets.bundle` inside `root_folder`.  Without it, all
+    sprites of the piece types on the board are decoded on a thread pool
+    of `workers` threads before the state machines are wired.  `report` prints the
+    startup time per stage.  `cell_size` is the cell size in pixels.
+    `batch_physics` selects the vectorized PhysicsBatch backend.
+    A `headless` game never opens a window (see `Game.run_script`).
+    The board image `board.png` is read from the folder that holds
+    `root_folder`.
+    """
+    root_folder = pathlib.Path(root_folder)
+    timings = LoadTimings()
+    t_start = time.perf_counter()
+    # קריאת רקע הלוח מהתמונה
+    board_img = Img().read(root_folder.resolve().parent / "board.png", size=(cell_size * 8, cell_size * 8))
+    # יצירת לוח עם רקע
+    board = Board(cell_size, cell_size, 1, 1, 8, 8, board_img)
+
+    # bundle מקומפל נטען ב-memmap; נבנה מחדש אוטומטית אם קבצי המקור השתנו
+    bundle = None
+    if use_bundle:
+        bundle = AssetBundle.open(root_folder, (board.cell_W_pix, board.cell_H_pix),
+                                  path=bundle_path, workers=workers, timings=timings)
+        bundle.install(SpriteAtlas.shared(), root_folder)
+
+    if bundle is not None and bundle.board is not None \
+            and pathlib.Path(board_txt_path).resolve() == (root_folder / "board.csv").resolve():
+        board_data = bundle.board
+    else:
+        board_data = read_board(board_txt_path)
     pieces_templates = {}
     game_pieces = []
 
-    # קריאת רקע הלוח מהתמונה
-    board_img = Img().read("board.png", size=(64 * 8, 64 * 8))
-    # יצירת לוח עם רקע
-    board = Board(64, 64, 1, 1, 8, 8, board_img)
+    if bundle is None:
+        folders = [state_dir / "sprites"
+                   for piece_id in dict.fromkeys(p for p, _ in board_data)
+                   for state_dir in (root_folder / piece_id / "states").iterdir()]
+        SpriteAtlas.shared().preload(folders, (board.cell_W_pix, board.cell_H_pix),
+                                     workers=workers, timings=timings)
 
+    t_wiring = time.perf_counter()
     for piece_id, location in board_data:
         if piece_id not in pieces_templates:
-            pieces_templates[piece_id] = create_piece(piece_id, location, root_folder, board)
+            pieces_templates[piece_id] = create_piece(piece_id, location, root_folder, board, bundle)
 
         p = clone_piece(pieces_templates[piece_id], location)
         game_pieces.append(p)
+    timings.wiring = time.perf_counter() - t_wiring
 
-    return Game(game_pieces, board)
+    game = Game(game_pieces, board, batch_physics=batch_physics, headless=headless)
+    timings.wall = time.perf_counter() - t_start
+    if report:
+        print(timings.report())
+    return game
 
 
 def main():
-    game = create_game(pathlib.Path("pieces/board.csv"), pathlib.Path("pieces/"))
-    game.run()
+    game = create_game(pathlib.Path("pieces/board.csv"), pathlib.Path("pieces/"), report=True)
+    game.run(report=True)
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,7 @@
+import pytest
+
+
+@pytest.fixture(scope="session")
+def bundle_path(tmp_path_factory):
+    """One compiled asset bundle for the whole run, kept out of the source tree."""
+    return tmp_path_factory.mktemp("assets") / "assets.bundle"
@@ -0,0 +1,82 @@
+import os
+import pathlib
+import shutil
+import numpy as np
+from interfaces.AssetBundle import AssetBundle, compile_assets
+from interfaces.Board import Board
+from interfaces.mock_img import MockImg
+from interfaces.PieceFactory import PieceFactory
+from interfaces.Piece import Piece
+from interfaces.SpriteAtlas import SpriteAtlas
+
+PIECES = pathlib.Path(__file__).resolve().parent.parent / "pieces"
+
+
+def _pieces_copy(tmp_path, types=("PW", "RB")):
+    root = tmp_path / "pieces"
+    for t in types:
+        shutil.copytree(PIECES / t, root / t)
+    (root / "board.csv").write_text("RB,,PW\n")
+    return root
+
+
+def test_bundle_round_trip(tmp_path):
+    root = _pieces_copy(tmp_path)
+    path = compile_assets(root, (32, 32))
+    bundle = AssetBundle.load(path)
+
+    assert isinstance(bundle.pixels, np.memmap)
+    assert bundle.board == [("RB", (0, 0)), ("PW", (2, 0))]
+    assert bundle.state_configs("PW")["jump"]["physics"]["speed_m_per_sec"] == 3.0
+    assert (-2, 0, "1st") in [tuple(r) for r in bundle.manifest["pieces"]["PW"]["moves"]]
+
+    atlas = SpriteAtlas()
+    bundle.install(atlas, root)
+    folder = root / "RB" / "states" / "jump" / "sprites"
+    expected = SpriteAtlas._decode_folder(folder, (32, 32))
+    frames = atlas.frames(folder, (32, 32))
+    assert len(frames) == len(expected)
+    assert all(np.array_equal(f.img, e) for f, e in zip(frames, expected))
+
+
+def test_bundle_recompiles_when_sources_change(tmp_path):
+    root = _pieces_copy(tmp_path)
+    first = AssetBundle.open(root, (32, 32))
+    assert AssetBundle.open(root, (32, 32)).manifest["fingerprint"] == first.manifest["fingerprint"]
+
+    cfg = root / "PW" / "states" / "idle" / "config.json"
+    st = cfg.stat()
+    os.utime(cfg, ns=(st.st_atime_ns, st.st_mtime_ns + 10**9))
+    assert not first.is_fresh(root, (32, 32))
+    second = AssetBundle.open(root, (32, 32))
+    assert second.is_fresh(root, (32, 32))
+
+    # גודל תא אחר מחייב קומפילציה מחדש
+    assert AssetBundle.open(root, (16, 16)).pixels.shape[1:3] == (16, 16)
+
+
+def test_piece_factory_uses_bundle(tmp_path):
+    root = _pieces_copy(tmp_path)
+    board = Board(32, 32, 1, 1, 8, 8, MockImg())
+    bundle = AssetBundle.open(root, (32, 32))
+    factory = PieceFactory(board, root, bundle=bundle)
+    piece = factory.create_piece("RB", (1, 1))
+    assert isinstance(piece, Piece)
+    assert np.shares_memory(piece._state._graphics.sprites[0].img, bundle.pixels)
+
+
+def test_install_completes_a_partially_loaded_atlas(tmp_path):
+    root = _pieces_copy(tmp_path)
+    bundle = AssetBundle.open(root, (32, 32))
+    atlas = SpriteAtlas()
+    loaded = root / "PW" / "states" / "idle" / "sprites"
+    from_disk = atlas.frames(loaded, (32, 32))
+    bundle.install(atlas, root)
+
+    assert atlas.frames(loaded, (32, 32)) is from_disk
+    for t in ("PW", "RB"):
+        for state in (root / t / "states").iterdir():
+            folder = state / "sprites"
+            assert SpriteAtlas.key(folder, (32, 32)) in atlas
+            if folder != loaded:
+                assert np.shares_memory(atlas.frames(folder, (32, 32))[0].img, bundle.pixels)
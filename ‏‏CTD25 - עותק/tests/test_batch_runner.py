@@ -0,0 +1,62 @@
+import pathlib
+from interfaces.BatchRunner import BatchStats, GameJob, RandomPolicy, run_batch
+from interfaces.Command import Command
+
+PIECES = pathlib.Path(__file__).resolve().parent.parent / "pieces"
+
+
+def jobs(bundle_path, n, seconds=10):
+    return [GameJob(PIECES / "board.csv", PIECES, policy="random", seed=i, until_ms=seconds * 1000,
+                    bundle_path=bundle_path)
+            for i in range(n)]
+
+
+def test_self_play_is_deterministic_per_seed(bundle_path):
+    first = {r.job: r for r, _ in run_batch(jobs(bundle_path, 2), workers=1)}
+    again = {r.job: r for r, _ in run_batch(jobs(bundle_path, 2), workers=1)}
+    assert first[0].position_hash == again[0].position_hash
+    assert first[0].commands > 10 and first[0].rejected == 0
+    assert first[0].position_hash != first[1].position_hash
+
+
+def test_process_pool_matches_inline_and_streams_aggregates(bundle_path):
+    inline = {r.job: r.position_hash for r, _ in run_batch(jobs(bundle_path, 3, 5), workers=1)}
+    seen = []
+    for result, stats in run_batch(jobs(bundle_path, 3, 5), workers=2):
+        seen.append(result.job)
+        assert stats.games == len(seen)
+        assert inline[result.job] == result.position_hash
+    assert sorted(seen) == [0, 1, 2]
+    assert stats.commands > 0 and 0 < stats.mean_length_ms <= 5000
+    util = stats.utilization()
+    assert set(util) == {"P", "R", "N", "B", "Q", "K"}
+    assert all(0.0 <= u <= 1.0 for u in util.values())
+    assert "games in" in stats.report()
+
+
+def test_scripted_job_and_stats_totals(bundle_path):
+    script = [Command(0, "NW", "move", [(1, 7), (2, 5)]),
+              Command(4000, "NW", "move", [(2, 5), (3, 3)]),
+              Command(7000, "NW", "move", [(3, 3), (2, 1)])]
+    job = GameJob(PIECES / "board.csv", PIECES, commands=script, bundle_path=bundle_path)
+    (result, stats), = run_batch([job], workers=1)
+    assert result.commands == 3
+    assert result.captures == {"N": 1} and result.lost == {"P": 1}
+    assert 7000 < result.length_ms < 12000 and result.end_ms == 12000
+
+    total = BatchStats()
+    for r in (result, result):
+        total.add(r)
+    assert total.games == 2 and total.captures["N"] == 2
+    assert total.mean_length_ms == result.length_ms
+
+
+def test_random_policy_only_moves_idle_pieces_of_its_side(bundle_path):
+    from interfaces.main import create_game
+    game = create_game(PIECES / "board.csv", PIECES, headless=True, bundle_path=bundle_path)
+    policy = RandomPolicy(seed=3)
+    cmd, = policy(game, 0)
+    assert cmd.piece_id[1] == "W"
+    assert policy(game, 100) == []          # עדיין חושב
+    cmd, = policy(game, 250)
+    assert cmd.piece_id[1] == "B"
@@ -0,0 +1,69 @@
+import pathlib
+from types import SimpleNamespace
+import pytest
+from interfaces.Bitboard import BitboardPosition, iter_bits
+from interfaces.Moves import Moves
+
+PIECES = pathlib.Path(__file__).resolve().parent.parent / "pieces"
+
+
+def make_piece(piece_id, dims=(8, 8)):
+    moves = Moves(PIECES / piece_id / "moves.txt", dims)
+    return SimpleNamespace(piece_id=piece_id, _state=SimpleNamespace(moves=moves))
+
+
+def test_place_and_query():
+    pos = BitboardPosition()
+    king = make_piece("KW")
+    pos.place(king, (7, 4))
+    assert pos.is_occupied((7, 4))
+    assert not pos.is_occupied((0, 0))
+    assert pos.piece_at((7, 4)) is king
+    assert pos.color_at((7, 4)) == "W"
+    assert pos.color_at((0, 0)) is None
+    assert pos.type_mask("K", "W") == 1 << (7 * 8 + 4)
+    with pytest.raises(ValueError):
+        pos.place(make_piece("QB"), (7, 4))
+
+
+def test_move_with_capture_keeps_masks_in_sync():
+    pos = BitboardPosition()
+    rook, pawn = make_piece("RW"), make_piece("PB")
+    pos.place(rook, (7, 0))
+    pos.place(pawn, (1, 0))
+    captured = pos.move((7, 0), (1, 0))
+    assert captured is pawn
+    assert pos.occupied == pos.color_mask("W") == 1 << 8
+    assert pos.color_mask("B") == 0
+    assert pos.type_mask("P") == 0
+    assert pos.piece_at((7, 0)) is None
+
+
+def test_attacks_skip_pawn_pushes():
+    pos = BitboardPosition()
+    pos.place(make_piece("PW"), (6, 4))
+    attacked = {pos.cell(sq) for sq in iter_bits(pos.attacks("W"))}
+    assert attacked == {(5, 3), (5, 5)}
+    assert pos.is_attacked((5, 3), "W")
+    assert not pos.is_attacked((5, 4), "W")
+
+
+def test_large_board_uses_wide_masks():
+    pos = BitboardPosition(12, 12)
+    pos.place(make_piece("NB", (12, 12)), (11, 11))
+    assert pos.occupied == 1 << 143
+    assert pos.is_attacked((9, 10), "B")
+
+
+def test_legal_moves_respect_blockers_and_colors():
+    pos = BitboardPosition()
+    pos.place(make_piece("BW"), (7, 2))
+    pos.place(make_piece("PW"), (6, 3))
+    pos.place(make_piece("PB"), (6, 1))
+    assert not pos.is_legal((7, 2), (5, 4))   # חסום ע"י רגלי לבן
+    assert not pos.is_legal((7, 2), (6, 3))   # לא תופסים כלי מאותו צבע
+    assert pos.is_legal((7, 2), (6, 1))
+    assert pos.is_legal((6, 3), (4, 3))       # צעד פתיחה כפול
+    pos.move((6, 3), (5, 3))
+    assert not pos.is_legal((5, 3), (3, 3))
+    assert pos.is_legal((7, 2), (4, 5))
@@ -0,0 +1,142 @@
+import pathlib
+from types import SimpleNamespace
+from interfaces.Board import Board
+from interfaces.Collisions import CollisionDetector, CollisionPredictor
+from interfaces.Command import Command
+from interfaces.Physics import IdlePhysics, Physics
+
+PIECES = pathlib.Path(__file__).resolve().parent.parent / "pieces"
+
+
+def board():
+    return Board(64, 64, 1, 1, 8, 8, None)
+
+
+def make_piece(piece_id, cell, target=None, speed=1.0, start_time=None):
+    if target is None:
+        physics = IdlePhysics(cell, board(), speed)
+    else:
+        physics = Physics(cell, board(), speed)
+        physics.reset(Command(0, piece_id, "move", [cell, target]))
+        physics.start_time = start_time
+    return SimpleNamespace(piece_id=piece_id, _state=SimpleNamespace(_physics=physics))
+
+
+def test_fast_mover_captures_piece_it_passes_between_ticks():
+    pawn = make_piece("PB", (4, 0))
+    rook = make_piece("RW", (0, 0), target=(7, 0), speed=70.0, start_time=0)  # 100 ms לכל הדרך
+    pred = CollisionPredictor(board())
+    pred.track(pawn, 0, predict=False)
+    pred.track(rook, 0)
+    assert pred.pop_due(40) == []
+    # נוגע כשהמרחק קטן מחצי תא: x = 3.5 בזמן 50 ms
+    events = pred.pop_due(1000)
+    assert [(c, v) for _, c, v in events] == [(rook, pawn)]
+    assert abs(events[0][0] - 50.0) < 1e-6
+
+
+def test_friends_and_missed_paths_give_no_event():
+    friend = make_piece("PW", (3, 0))
+    aside = make_piece("PB", (3, 1))
+    rook = make_piece("RW", (0, 0), target=(7, 0), start_time=0)
+    pred = CollisionPredictor(board())
+    for p in (friend, aside):
+        pred.track(p, 0, predict=False)
+    pred.track(rook, 0)
+    assert pred.pop_due(10 ** 6) == []
+
+
+def test_new_movement_invalidates_pending_event():
+    pawn = make_piece("PB", (4, 0))
+    rook = make_piece("RW", (0, 0), target=(7, 0), start_time=0)
+    pred = CollisionPredictor(board())
+    pred.track(pawn, 0, predict=False)
+    pred.track(rook, 0)
+    pawn._state._physics = Physics((4, 0), board())
+    pawn._state._physics.reset(Command(0, "PB", "move", [(4, 0), (4, 2)]))
+    pawn._state._physics.start_time = 100
+    pred.track(pawn, 100)  # יוצא מהדרך לפני שהצריח מגיע
+    assert pred.pop_due(10 ** 6) == []
+
+
+class Shielded(IdlePhysics):
+    def can_be_captured(self):
+        return False
+
+
+class Harmless(Physics):
+    def can_capture(self):
+        return False
+
+
+def test_capture_flags_of_the_physics_are_honored():
+    shielded = make_piece("PB", (4, 0))
+    shielded._state._physics = Shielded((4, 0), board())
+    rook = make_piece("RW", (0, 0), target=(7, 0), start_time=0)
+    pred = CollisionPredictor(board())
+    pred.track(shielded, 0, predict=False)
+    pred.track(rook, 0)
+    assert pred.pop_due(10 ** 6) == []
+
+    pawn = make_piece("PB", (4, 0))
+    harmless = make_piece("RW", (0, 0))
+    harmless._state._physics = Harmless((0, 0), board())
+    harmless._state._physics.reset(Command(0, "RW", "move", [(0, 0), (7, 0)]))
+    harmless._state._physics.start_time = 0
+    pred = CollisionPredictor(board())
+    pred.track(pawn, 0, predict=False)
+    pred.track(harmless, 0)
+    assert pred.pop_due(10 ** 6) == []
+
+
+def test_victim_that_became_uncapturable_is_spared():
+    pawn = make_piece("PB", (4, 0))
+    rook = make_piece("RW", (0, 0), target=(7, 0), start_time=0)
+    pred = CollisionPredictor(board())
+    pred.track(pawn, 0, predict=False)
+    pred.track(rook, 0)
+    pawn._state._physics = Shielded((4, 0), board())   # מצב מוגן בלי תנועה חדשה
+    assert pred.pop_due(10 ** 6) == []
+
+
+def test_two_movers_earlier_start_wins():
+    early = make_piece("QW", (0, 0), target=(6, 0), start_time=0)
+    late = make_piece("QB", (6, 0), target=(0, 0), start_time=500)
+    pred = CollisionPredictor(board())
+    pred.track(early, 0)
+    pred.track(late, 500)
+    (t, capturer, victim), = pred.pop_due(10 ** 6)
+    assert (capturer, victim) == (early, late)
+    assert 500 < t < 6000
+
+
+def test_game_applies_predicted_capture_on_sparse_ticks(bundle_path):
+    from interfaces.main import create_game
+    game = create_game(PIECES / "board.csv", PIECES, bundle_path=bundle_path)
+    script = {0: [(1, 7), (2, 5)], 5000: [(2, 5), (3, 3)], 10000: [(3, 3), (2, 1)]}
+    victim = game.position.piece_at((1, 2))
+    for now in range(0, 16000, 1000):
+        if now in script:
+            game._process_input(Command(now, "NW", "move", script[now]), now)
+        game._update_pieces(now)
+        game._resolve_collisions()
+    assert victim not in game.pieces
+    assert len(game.pieces) == 31
+
+
+def test_game_takes_only_predicted_captures(bundle_path):
+    from interfaces.main import create_game
+    game = create_game(PIECES / "board.csv", PIECES, bundle_path=bundle_path)
+    per_frame = CollisionDetector(game.board)
+    script = {0: [(1, 7), (2, 5)], 4000: [(2, 5), (3, 3)], 8000: [(3, 3), (4, 1)]}
+    passed = game.position.piece_at((1, 3))     # הרגלי ב-(3, 1), ליד המסלול של הסוס
+    frames_on_it = 0
+    for now in range(0, 12000, 20):
+        if now in script:
+            game._process_input(Command(now, "NW", "move", script[now]), now)
+        game._update_pieces(now)
+        frames_on_it += any(v is passed for _, v in per_frame.find_captures(game.pieces))
+        game._resolve_collisions(now)
+    assert frames_on_it > 0                     # pos_m המעוגל "נוגע" בו
+    assert passed in game.pieces
+    assert [(e.piece_id, e.data) for e in game.events if e.kind == "capture"] == [("NW", ("PB", (4, 1)))]
@@ -0,0 +1,81 @@
+from types import SimpleNamespace
+from interfaces.Board import Board
+from interfaces.Collisions import CollisionDetector, SpatialHash
+from interfaces.Command import Command
+from interfaces.Physics import IdlePhysics, Physics
+
+
+class FakePhysics:
+    def __init__(self, pos, moving=False, start_time=None):
+        self.pos_m = pos
+        self.moving = moving
+        self.start_time = start_time
+
+    def can_capture(self):
+        return self.moving
+
+    def can_be_captured(self):
+        return True
+
+
+def make_piece(piece_id, pos, moving=False, start_time=None, physics=None):
+    physics = physics or FakePhysics(pos, moving, start_time)
+    return SimpleNamespace(piece_id=piece_id, _state=SimpleNamespace(_physics=physics))
+
+
+def board():
+    return Board(64, 64, 1, 1, 8, 8, None)
+
+
+def test_spatial_hash_pairs_only_neighbours():
+    grid = SpatialHash(1, 1)
+    grid.insert(0, 0, 0, 1, 1)
+    grid.insert(1, 0.5, 0, 1.5, 1)   # חוצה לתא הבא
+    grid.insert(2, 5, 5, 6, 6)
+    assert grid.pairs() == [(0, 1)]
+
+
+def test_mover_captures_idle_enemy():
+    rook = make_piece("RW", (2.8, 3), moving=True, start_time=0)
+    pawn = make_piece("PB", (3, 3))
+    captures = CollisionDetector(board()).find_captures([pawn, rook])
+    assert captures == [(rook, pawn)]
+
+
+def test_no_capture_between_friends_or_far_pieces():
+    a = make_piece("RW", (3, 3), moving=True, start_time=0)
+    b = make_piece("PW", (3.2, 3))
+    c = make_piece("PB", (4, 3))
+    assert CollisionDetector(board()).find_captures([a, b, c]) == []
+
+
+def test_two_movers_earlier_start_wins_and_each_piece_dies_once():
+    early = make_piece("QW", (4, 4), moving=True, start_time=100)
+    late = make_piece("QB", (4.1, 4), moving=True, start_time=200)
+    other = make_piece("NB", (4, 4.2), moving=True, start_time=300)
+    captures = CollisionDetector(board()).find_captures([late, early, other])
+    assert captures == [(early, late), (early, other)]
+
+
+def test_pairs_scale_with_contacts_not_pieces():
+    pieces = [make_piece("PW" if i % 2 else "PB", (i % 32, i // 32)) for i in range(32 * 32)]
+    det = CollisionDetector(Board(64, 64, 1, 1, 32, 32, None))
+    assert det.find_captures(pieces) == []
+    assert det.last_pairs_tested == 0
+
+
+def test_diagonal_move_does_not_take_the_piece_it_passes():
+    b = board()
+    physics = Physics((2, 7), b, speed_m_s=1.0)
+    physics.reset(Command(0, "BW", "move", [(2, 7), (5, 4)]))
+    physics.update(0)
+    physics.update(1500)
+    assert physics.pos_m == (3, 5)              # מעוגל למטרים שלמים – בדיוק על הרגלי
+    bishop = make_piece("BW", None, physics=physics)
+    pawn = make_piece("PB", None, physics=IdlePhysics((3, 5), b))
+    det = CollisionDetector(b)
+    assert det.find_captures([pawn, bishop], now_ms=1500) == []
+    assert det.find_captures([pawn, bishop], now_ms=3500) == []
+    # on the same diagonal the pawn is taken
+    pawn = make_piece("PB", None, physics=IdlePhysics((3, 6), b))
+    assert det.find_captures([pawn, bishop], now_ms=1500) == [(bishop, pawn)]
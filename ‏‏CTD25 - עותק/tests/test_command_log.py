@@ -0,0 +1,184 @@
+import pathlib
+import struct
+from interfaces.BatchRunner import RandomPolicy
+from interfaces.Command import Command
+from interfaces.CommandLog import (CMD_REC, FOOTER, FOOTER_REC, PIECE_NAME, CommandRecorder, ReplayReader,
+                                   read_log, replay, seek)
+from interfaces.GameLoop import ScaledClock, VirtualClock
+
+PIECES = pathlib.Path(__file__).resolve().parent.parent / "pieces"
+
+
+def new_game(bundle_path, **kwargs):
+    from interfaces.main import create_game
+    return create_game(PIECES / "board.csv", PIECES, headless=True, bundle_path=bundle_path, **kwargs)
+
+
+def test_log_round_trip_with_interned_ids(tmp_path):
+    path = tmp_path / "game.ctdl"
+    rec = CommandRecorder(path)
+    rec.start(None, 500, 100.0)
+    rec.command(Command(510, "NW", "move", [(1, 7), (2, 5)]), 510)
+    rec.command(Command(900, "NW", "move", [(2, 5), (3, 3)]), 900)
+    rec.command(Command(900, "PB", "jump", [(4, 1), (4, 1)]), 900)
+    rec.frame(900, 42)
+    rec.frame(910, 42)   # אותו hash – לא נכתב שוב
+    rec.close()
+    log = read_log(path)
+    assert log.tick_hz == 100.0
+    assert [(c.timestamp, c.piece_id, c.type, c.params) for c in log.commands] == [
+        (10, "NW", "move", [(1, 7), (2, 5)]), (400, "NW", "move", [(2, 5), (3, 3)]),
+        (400, "PB", "jump", [(4, 1), (4, 1)])]
+    assert log.frames == [(400, 42)] and log.end_ms == 410
+    names = len("NW") + len("move") + len("PB") + len("jump") + 4 * 4
+    index = 9 + len("NWPBmovejump") + 4 + 9
+    assert path.stat().st_size == 16 + 3 * CMD_REC.size + names + 13 + 5 + index
+
+
+def test_replay_of_self_play_matches_every_frame(tmp_path, bundle_path):
+    path = tmp_path / "bot.ctdl"
+    live = new_game(bundle_path)
+    with CommandRecorder(path) as rec:
+        live.recorder = rec
+        recorded = live.run_script([], until_ms=20000, policy=RandomPolicy(seed=7))
+    log = read_log(path)
+    assert len(log.commands) > 50 and log.end_ms == 20000
+
+    game = new_game(bundle_path)
+    replayed = replay(game, path)
+    assert isinstance(game.clock, VirtualClock)   # בלי לחכות לזמן אמת
+    assert replayed.result.stats.ticks == 2001 and replayed.result.stats.slept >= 20.0
+    assert replayed.ok and replayed.frames_checked == len(log.frames)
+    assert replayed.result.position == recorded.position
+    assert replayed.result.position_hash == recorded.position_hash
+
+
+def test_replay_of_live_loop_and_speed_multiplier(tmp_path, bundle_path):
+    path = tmp_path / "live.ctdl"
+    live = new_game(bundle_path)
+    live.clock, live._start_time = VirtualClock(3.25), 3.0   # הלולאה מתחילה ב-250 ms
+    for cmd in (Command(0, "NW", "move", [(1, 7), (2, 5)]), Command(0, "PB", "move", [(4, 1), (4, 3)])):
+        live.user_input_queue.put(cmd)
+    live._is_win = lambda: live._now >= 4250
+    live._announce_win = lambda: None
+    with CommandRecorder(path) as rec:
+        live.recorder = rec
+        live.run()
+    log = read_log(path)
+    assert [c.timestamp for c in log.commands] == [0, 0]
+
+    game = new_game(bundle_path)
+    replayed = replay(game, path, speed=20.0)
+    assert replayed.ok
+    assert isinstance(game.clock, ScaledClock) and game.clock.speed == 20.0   # ארבע שניות משחק פי 20
+    assert replayed.result.end_ms == log.end_ms
+    assert replayed.result.position_hash == live.position.hash
+
+
+def recorded_bot_game(bundle_path, path, seconds=40, keyframe_ms=5000):
+    game = new_game(bundle_path)
+    with CommandRecorder(path, keyframe_ms=keyframe_ms) as rec:
+        game.recorder = rec
+        game.run_script([], until_ms=seconds * 1000, policy=RandomPolicy(seed=11))
+    return read_log(path)
+
+
+def hash_at(log, t):
+    return [h for ft, h in log.frames if ft <= t][-1]
+
+
+def test_seek_restores_keyframe_and_matches_full_replay(tmp_path, bundle_path):
+    path = tmp_path / "keys.ctdl"
+    log = recorded_bot_game(bundle_path, path)
+    with ReplayReader(path) as reader:
+        assert [t for t, _ in reader.keyframes] == list(range(0, 40001, 5000))
+        assert reader.seek_keyframe(12340)[0] == 10000
+        assert reader.seek_keyframe(-1) is None
+        assert reader.end_ms == 40000
+        assert len(reader.commands()) == len(log.commands)
+
+    for t in (0, 4990, 12340, 25000, 39990):
+        result = seek(new_game(bundle_path), path, t)
+        assert result.end_ms == t
+        assert result.position_hash == hash_at(log, t), t
+    full = new_game(bundle_path).run_script([c for c in log.commands if c.timestamp <= 39990], until_ms=39990)
+    assert seek(new_game(bundle_path), path, 39990).position == full.position
+
+
+def test_keyframe_covers_piece_state_physics_and_graphics(tmp_path, bundle_path):
+    path = tmp_path / "keys.ctdl"
+    recorded_bot_game(bundle_path, path, seconds=12)
+    with ReplayReader(path) as reader:
+        _, pos_hash, snap = reader.keyframe(reader.seek_keyframe(10000)[1])
+    game = new_game(bundle_path)
+    game.restore(snap)
+    assert game.position.hash == pos_hash == snap["hash"]
+    assert game.snapshot() == snap
+    states = {e["state"] for e in snap["pieces"]}
+    assert "idle" in states and len(states) > 1
+
+
+def test_seek_is_faster_than_replaying_from_the_start(tmp_path, bundle_path):
+    path = tmp_path / "long.ctdl"
+    recorded_bot_game(bundle_path, path, seconds=60, keyframe_ms=2000)
+    replay_result = replay(new_game(bundle_path), path)
+    seeked = seek(new_game(bundle_path), path, 59000)
+    assert replay_result.ok and replay_result.result.stats.ticks == 6001
+    assert seeked.end_ms == 59000 and seeked.stats.ticks == 100   # רק מה-keyframe של 58000
+
+
+def test_log_without_index_is_scanned(tmp_path, bundle_path):
+    path = tmp_path / "crash.ctdl"
+    recorded_bot_game(bundle_path, path, seconds=12)
+    with ReplayReader(path) as reader:
+        keys, names = reader.keyframes, dict(reader.names)
+    raw = path.read_bytes()
+    index_at = struct.unpack_from("<Q", raw, len(raw) - 8)[0]
+    path.write_bytes(raw[:index_at - 5])   # בלי END, אינדקס וסיומת
+    with ReplayReader(path) as reader:
+        assert reader.keyframes == keys
+        assert sorted(reader.names[PIECE_NAME]) == sorted(names[PIECE_NAME])
+    assert seek(new_game(bundle_path), path, 11000).end_ms == 11000
+
+
+def test_log_cut_mid_record_is_read_up_to_the_last_whole_record(tmp_path, bundle_path):
+    path = tmp_path / "crash.ctdl"
+    full = recorded_bot_game(bundle_path, path, seconds=12)
+    with ReplayReader(path) as reader:
+        keys = reader.keyframes
+    raw = path.read_bytes()
+    last_key = keys[-1][1]
+    # חיתוך שבו הבייט התשיעי מהסוף נראה כמו סיומת
+    fake_footer = next(c for c in range(last_key - 1, keys[-2][1], -1) if raw[c - FOOTER_REC.size] == FOOTER)
+    for cut in (last_key + 7, last_key - 3, fake_footer):
+        path.write_bytes(raw[:cut])
+        log = read_log(path)
+        assert log.commands == full.commands[:len(log.commands)] and log.end_ms <= 10000
+        with ReplayReader(path) as reader:
+            assert reader.keyframes == keys[:-1]
+            assert len(reader.commands()) == len(log.commands)
+        assert seek(new_game(bundle_path), path, 9000).end_ms == 9000
+
+
+def test_rolled_back_command_is_logged_and_replayed(tmp_path, bundle_path):
+    from interfaces.Rollback import StateHistory
+    path = tmp_path / "late.ctdl"
+    script = [Command(0, "NW", "move", [(1, 7), (2, 5)]), Command(4000, "NW", "move", [(2, 5), (3, 3)]),
+              Command(5000, "NW", "move", [(3, 3), (2, 1)]), Command(7000, "NW", "move", [(3, 3), (2, 1)])]
+    live = new_game(bundle_path)
+    live.history = StateHistory(256)
+    with CommandRecorder(path, keyframe_ms=1000) as rec:
+        live.recorder = rec
+        live.run_script([script[0], script[2]], until_ms=5500)
+        live.rollback(script[1])                   # הגיעה באיחור של שנייה וחצי
+        result = live.run_script(script[3:], until_ms=12000, resume=True)
+    log = read_log(path)
+    assert len(log.commands) == 3
+    assert [(at, c.timestamp, c.params) for at, c in log.rollbacks] == [(5500, 4000, [(2, 5), (3, 3)])]
+
+    replayed = replay(new_game(bundle_path), path)
+    assert replayed.ok and replayed.frames_checked == len(log.frames)
+    assert replayed.result.position_hash == result.position_hash
+    assert any(e.kind == "capture" for e in replayed.result.events)
+    for t in (5000, 5510, 6000, 11000):            # keyframe לפני / אחרי הרולבק
+        assert seek(new_game(bundle_path), path, t).position_hash == hash_at(log, t), t
@@ -0,0 +1,130 @@
+import asyncio
+import pathlib
+from interfaces.Command import Command
+from interfaces.GameHost import (STATS_HEAD, STATS_MATCH, STATE, STATE_HEAD, GameClient, GameHost,
+                                 read_message)
+from interfaces.Rollback import StateHistory
+from interfaces.Snapshot import decode
+
+PIECES = pathlib.Path(__file__).resolve().parent.parent / "pieces"
+
+
+def new_game(bundle_path):
+    from interfaces.main import create_game
+    return create_game(PIECES / "board.csv", PIECES, headless=True, bundle_path=bundle_path)
+
+
+def test_matches_tick_on_their_own_grid_and_finish(bundle_path):
+    host = GameHost(lambda: new_game(bundle_path), tick_hz=100, match_ms=2000)
+    first = host.new_match()
+    first.submit(Command(500, "NW", "move", [(1, 7), (2, 5)]))
+    for _ in range(100):
+        host.step_all()
+    second = host.new_match()
+    for _ in range(102):
+        host.step_all()
+
+    assert first.id not in host.matches        # נגמר אחרי 2000ms
+    assert second.now == 1010 and second.tick == 102
+    command, = [e for e in first.game.events if e.kind == "command"]
+    assert command.time_ms == 500
+    assert first.game.position.piece_at((5, 2)).piece_id == "NW"
+    assert second.latency.ticks == 102 and second.latency.p99_us > 0
+    assert host.capacity() > 1 and "capacity" in host.report()
+
+
+def test_late_command_is_rolled_back_in(bundle_path):
+    def with_history():
+        game = new_game(bundle_path)
+        game.history = StateHistory(100)
+        return game
+
+    host = GameHost(with_history, tick_hz=100)
+    match = host.new_match()
+    for _ in range(60):
+        host.step_all()
+    match.submit(Command(450, "NW", "move", [(1, 7), (2, 5)]))
+    match.submit(Command(0, "PW", "move", [(4, 6), (4, 4)]))    # עמוק מדי – נדחה ל-390
+    assert match.game.history.stats.rollbacks == 0 and len(match.late) == 2
+    host.step_all()
+    assert match.game.history.stats.rollbacks == 2 and host.stats.rollbacks == 2
+    assert match.capped == 1 and match.now == 600
+    assert [e.time_ms for e in match.game.events if e.kind == "command"] == [390, 450]
+
+
+def test_rollbacks_past_the_budget_wait_for_the_next_tick(bundle_path):
+    def with_history():
+        game = new_game(bundle_path)
+        game.history = StateHistory(100)
+        return game
+
+    host = GameHost(with_history, tick_hz=100, rollback_share=0)
+    a, b = host.new_match(), host.new_match()
+    for _ in range(60):
+        host.step_all()
+    a.submit(Command(500, "NW", "move", [(1, 7), (2, 5)]))
+    a.submit(Command(520, "PW", "move", [(4, 6), (4, 4)]))
+    b.submit(Command(540, "NW", "move", [(1, 7), (2, 5)]))
+    host.step_all()                             # רק אחת לכל טיק כשאין תקציב
+    assert (len(a.late), len(b.late), host.stats.deferred_rollbacks) == (1, 1, 2)
+    host.step_all()
+    host.step_all()
+    assert not a.late and not b.late and host.stats.rollbacks == 3
+    assert "3 rollbacks" in host.report()
+
+
+def test_opening_a_match_does_not_stall_the_others(bundle_path):
+    async def scenario():
+        host = GameHost(lambda: new_game(bundle_path), tick_hz=100)
+        host.new_match()
+        ticker = asyncio.create_task(host.run_ticks())
+        try:
+            opened = asyncio.create_task(host.open_match())
+            await asyncio.sleep(0)
+            ticks = host.stats.ticks
+            match = await opened
+            assert host.stats.ticks > ticks     # הטיקים המשיכו בזמן בניית המשחק
+            assert host.matches[match.id] is match
+        finally:
+            ticker.cancel()
+            await asyncio.gather(ticker, return_exceptions=True)
+
+    asyncio.run(asyncio.wait_for(scenario(), 20))
+
+
+def test_clients_join_command_and_receive_state(bundle_path):
+    async def scenario():
+        host = GameHost(lambda: new_game(bundle_path), tick_hz=100, broadcast_hz=50)
+        port = await host.start()
+        try:
+            a = await GameClient.connect("127.0.0.1", port)
+            b = await GameClient.connect("127.0.0.1", port)
+            match_id = await a.join()
+            assert await b.join(match_id) == match_id and len(b.ids) == 32
+
+            _, body = await a.expect(STATE)
+            snap = decode(body[STATE_HEAD.size:])
+            slot = next(e["slot"] for e in snap["pieces"]
+                        if a.ids[e["slot"]] == "NW" and e["cell"] == [1, 7])
+            a.send(Command(snap["now"] + 20, "NW", "move", [(1, 7), (2, 5)]), slot)
+
+            while True:  # גם הלקוח השני רואה את הסוס מגיע
+                kind, body = await read_message(b.reader)
+                if kind != STATE:
+                    continue
+                knight = decode(body[STATE_HEAD.size:])["pieces"][slot]
+                if knight["cell"] == [2, 5]:
+                    break
+
+            raw = await a.stats()
+            matches, clients, ticks, late, load = STATS_HEAD.unpack_from(raw)
+            assert (matches, clients) == (1, 2) and ticks > 0
+            mid, now, mticks, mean_us, p99_us, n = STATS_MATCH.unpack_from(raw, STATS_HEAD.size)
+            assert mid == match_id and n == 2 and 0 < mean_us <= p99_us
+            await a.close()
+            await b.close()
+        finally:
+            await host.stop()
+        assert host.stats.broadcasts > 0 and host.stats.elapsed_s > 0
+
+    asyncio.run(asyncio.wait_for(scenario(), 20))
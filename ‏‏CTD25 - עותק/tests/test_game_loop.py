@@ -0,0 +1,89 @@
+from interfaces.GameLoop import FixedStepLoop
+
+
+class FakeClock:
+    def __init__(self):
+        self.t = 0.0
+
+    def __call__(self):
+        return self.t
+
+    def sleep(self, s):
+        self.t += s
+
+
+def test_ticks_are_fixed_and_frames_capped():
+    clock = FakeClock()
+    loop = FixedStepLoop(tick_hz=100, render_hz=25, clock=clock, sleep=clock.sleep, spin_s=0)
+    ticks, frames = [], []
+    stats = loop.run(1000, ticks.append, lambda: frames.append(clock.t) or True,
+                     done=lambda: clock.t >= 1.0)
+    assert ticks[:3] == [1000, 1010, 1020]
+    assert all(b - a == 10 for a, b in zip(ticks, ticks[1:]))
+    assert len(ticks) == 100 and stats.ticks == 100
+    assert len(frames) == 25
+    assert stats.slept > 0.99
+
+
+def test_catches_up_when_behind_and_drops_beyond_limit():
+    clock = FakeClock()
+    loop = FixedStepLoop(tick_hz=100, render_hz=10, max_catch_up=5, clock=clock,
+                         sleep=clock.sleep, spin_s=0)
+    ticks = []
+
+    def slow_render():
+        clock.t += 0.03  # ציור איטי – שלושה טיקים בפיגור
+        return True
+
+    loop.run(0, ticks.append, slow_render, max_ticks=40)
+    assert ticks == [10 * i for i in range(40)]  # זמן הסימולציה לא מדלג
+    assert loop.stats.dropped_ticks == 0
+
+    clock.t = 0.0
+    stalled = FixedStepLoop(tick_hz=100, render_hz=10, max_catch_up=5, clock=clock,
+                            sleep=clock.sleep, spin_s=0)
+    stalled.run(0, lambda now: None, lambda: setattr(clock, "t", clock.t + 0.2) or True,
+                max_ticks=20)
+    assert stalled.stats.dropped_ticks > 0
+
+
+def test_render_false_stops_the_loop():
+    clock = FakeClock()
+    loop = FixedStepLoop(clock=clock, sleep=clock.sleep, spin_s=0)
+    stats = loop.run(0, lambda now: None, lambda: False)
+    assert stats.frames == 1 and stats.ticks == 1
+
+
+class SpinningClock(FakeClock):
+    """Every read costs 0.1 ms, like a busy loop polling perf_counter."""
+
+    def __init__(self):
+        super().__init__()
+        self.reads = 0
+        self.sleeps = []
+
+    def __call__(self):
+        self.reads += 1
+        self.t += 0.0001
+        return self.t
+
+    def sleep(self, s):
+        self.sleeps.append(s)
+        super().sleep(s)
+
+
+def test_waits_sleep_and_only_spin_the_last_moment():
+    clock = SpinningClock()
+    loop = FixedStepLoop(tick_hz=200, render_hz=30, clock=clock, sleep=clock.sleep, spin_s=0.001)
+    stats = loop.run(0, lambda now: None, lambda: True, max_ticks=40)
+    assert stats.ticks == 40
+    assert len(clock.sleeps) >= 39 and all(0 < s < 0.005 for s in clock.sleeps)
+    assert sum(clock.sleeps) > 0.6 * stats.elapsed  # the rest is the 1 ms spin
+    assert clock.reads < 40 * 20                 # ספין של מילישנייה לכל המתנה, לא יותר
+
+
+def test_real_clock_runs_the_requested_ticks():
+    stats = FixedStepLoop(tick_hz=200, render_hz=30).run(0, lambda now: None, lambda: True, max_ticks=40)
+    assert stats.ticks == 40 and stats.frames >= 1
+    assert stats.elapsed > 0 and stats.slept > 0
+    assert "ticks/s" in stats.report()
@@ -0,0 +1,72 @@
+import numpy as np
+import pytest
+from interfaces.img import Img
+
+
+def _make_img(arr):
+    img = Img()
+    img.img = arr
+    return img
+
+
+def _reference_blend(sprite, canvas, x, y):
+    """The float blend Img.draw_on used before the integer path."""
+    out = canvas.copy()
+    h, w = sprite.shape[:2]
+    roi = out[y:y + h, x:x + w]
+    mask = sprite[..., 3] / 255.0
+    for c in range(3):
+        roi[..., c] = (1 - mask) * roi[..., c] + mask * sprite[..., c]
+    return out
+
+
+def test_alpha_blend_matches_float_path():
+    rng = np.random.default_rng(0)
+    sprite = rng.integers(0, 256, (16, 20, 4), dtype=np.uint8)
+    canvas = rng.integers(0, 256, (64, 64, 4), dtype=np.uint8)
+
+    expected = _reference_blend(sprite, canvas, 5, 7)
+    target = _make_img(canvas.copy())
+    _make_img(sprite).draw_on(target, 5, 7)
+
+    diff = np.abs(target.img.astype(int) - expected.astype(int))
+    assert diff.max() <= 1
+    # ערוץ האלפא של היעד לא משתנה
+    assert np.array_equal(target.img[..., 3], canvas[..., 3])
+
+
+def test_opaque_sprite_is_copied():
+    sprite = np.full((8, 8, 3), 200, dtype=np.uint8)
+    target = _make_img(np.zeros((32, 32, 4), dtype=np.uint8))
+    _make_img(sprite).draw_on(target, 4, 4)
+    assert (target.img[4:12, 4:12, :3] == 200).all()
+    assert (target.img[:4, :, :3] == 0).all()
+
+
+def test_partial_clipping_at_edges():
+    sprite = np.full((10, 10, 3), 50, dtype=np.uint8)
+    target = _make_img(np.zeros((20, 20, 3), dtype=np.uint8))
+    _make_img(sprite).draw_on(target, 15, -5)
+    assert (target.img[0:5, 15:20] == 50).all()
+    assert target.img.sum() == 5 * 5 * 3 * 50
+
+
+def test_fully_outside_is_noop():
+    sprite = np.full((10, 10, 3), 50, dtype=np.uint8)
+    target = _make_img(np.zeros((20, 20, 3), dtype=np.uint8))
+    _make_img(sprite).draw_on(target, 30, 30)
+    assert target.img.sum() == 0
+
+
+def test_planes_refresh_when_pixels_replaced():
+    sprite = _make_img(np.full((4, 4, 3), 10, dtype=np.uint8))
+    target = _make_img(np.zeros((4, 4, 3), dtype=np.uint8))
+    sprite.draw_on(target, 0, 0)
+    sprite.img = np.full((4, 4, 3), 99, dtype=np.uint8)
+    sprite.draw_on(target, 0, 0)
+    assert (target.img == 99).all()
+
+
+def test_draw_requires_loaded_images():
+    with pytest.raises(ValueError):
+        Img().draw_on(_make_img(np.zeros((4, 4, 3), dtype=np.uint8)), 0, 0)
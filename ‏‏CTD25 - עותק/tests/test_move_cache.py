@@ -0,0 +1,58 @@
+import pathlib
+import random
+from types import SimpleNamespace
+import pytest
+from interfaces.Bitboard import BitboardPosition
+from interfaces.MoveCache import MoveCache, StaleMoveCache
+from interfaces.Moves import Moves
+
+PIECES = pathlib.Path(__file__).resolve().parent.parent / "pieces"
+TYPES = ["PW", "PB", "RW", "RB", "NW", "NB", "BW", "BB", "QW", "QB", "KW", "KB"]
+
+
+def make_piece(piece_id):
+    moves = Moves(PIECES / piece_id / "moves.txt", (8, 8))
+    return SimpleNamespace(piece_id=piece_id, _state=SimpleNamespace(moves=moves))
+
+
+def test_cache_stays_exact_under_random_play():
+    rng = random.Random(11)
+    pos = BitboardPosition()
+    for sq in rng.sample(range(64), 24):
+        pos.place(make_piece(rng.choice(TYPES)), divmod(sq, 8))
+    cache = MoveCache(pos, verify=True)
+    for _ in range(300):
+        for sq in list(pos.pieces):
+            cache.legal_moves(pos.cell(sq))  # verify=True בודק כל פגיעה במטמון
+        src = rng.choice(sorted(pos.pieces))
+        pos.move(pos.cell(src), pos.cell(rng.randrange(64)))
+    assert cache.hits > cache.misses
+
+
+def test_only_watchers_are_invalidated():
+    pos = BitboardPosition()
+    pos.place(make_piece("RW"), (7, 0))
+    pos.place(make_piece("NB"), (0, 6))
+    pos.place(make_piece("KB"), (0, 4))
+    cache = MoveCache(pos)
+    for cell in [(7, 0), (0, 6), (0, 4)]:
+        cache.legal_moves(cell)
+    pos.move((0, 6), (2, 5))   # הפרש לא על הקרניים של הצריח ולא ליד המלך
+    assert len(cache) == 2
+    pos.move((0, 4), (0, 3))   # (0,3) לא על הקרניים של הצריח
+    assert len(cache) == 1
+    pos.move((0, 3), (7, 3))   # נוחת על השורה של הצריח
+    assert len(cache) == 0
+    quiet, _ = cache.legal_moves((7, 0))
+    assert not quiet >> (7 * 8 + 4) & 1
+
+
+def test_verify_detects_stale_entries():
+    pos = BitboardPosition()
+    pos.place(make_piece("RW"), (7, 0))
+    cache = MoveCache(pos, verify=True)
+    cache.legal_moves((7, 0))
+    pos.listeners.remove(cache._square_changed)  # מדמה באג: שינוי שלא דווח
+    pos.place(make_piece("PB"), (7, 3))
+    with pytest.raises(StaleMoveCache):
+        cache.legal_moves((7, 0))
@@ -0,0 +1,63 @@
+import pathlib
+import random
+from types import SimpleNamespace
+from interfaces.Bitboard import BitboardPosition
+from interfaces.MoveGen import MoveGen
+from interfaces.Moves import Moves
+from interfaces.main import read_board
+
+PIECES = pathlib.Path(__file__).resolve().parent.parent / "pieces"
+TYPES = ["PW", "PB", "RW", "RB", "NW", "NB", "BW", "BB", "QW", "QB", "KW", "KB"]
+
+
+def make_piece(piece_id):
+    moves = Moves(PIECES / piece_id / "moves.txt", (8, 8))
+    return SimpleNamespace(piece_id=piece_id, _state=SimpleNamespace(moves=moves))
+
+
+def assert_matches_per_piece(pos):
+    result = MoveGen().generate(pos)
+    assert len(result.pieces) == len(pos.pieces)
+    for i, sq in enumerate(result.squares):
+        quiet, captures = pos.legal_moves(pos.cell(int(sq)))
+        assert sum(1 << int(j) for j in result.quiet[i].nonzero()[0]) == quiet
+        assert sum(1 << int(j) for j in result.captures[i].nonzero()[0]) == captures
+
+
+def test_start_position_matches_per_piece():
+    pos = BitboardPosition()
+    for piece_id, (x, y) in read_board(PIECES / "board.csv"):
+        pos.place(make_piece(piece_id), (y, x))
+    assert_matches_per_piece(pos)
+    # 16 רגלים * 2 + 4 פרשים * 2 מהלכים שקטים
+    assert int(MoveGen().generate(pos).quiet.sum()) == 40
+
+
+def test_random_positions_match_per_piece():
+    rng = random.Random(3)
+    for _ in range(20):
+        pos = BitboardPosition()
+        for sq in rng.sample(range(64), rng.randint(1, 30)):
+            pos.place(make_piece(rng.choice(TYPES)), divmod(sq, 8))
+        for sq in rng.sample(sorted(pos.pieces), len(pos.pieces) // 2):
+            pos.unmoved &= ~(1 << sq)
+        assert_matches_per_piece(pos)
+
+
+def test_empty_position():
+    result = MoveGen().generate(BitboardPosition())
+    assert result.quiet.shape == (0, 64)
+    assert result.count() == 0
+
+
+def test_row_cache_holds_one_entry_per_table():
+    rng = random.Random(5)
+    tables = {id(make_piece(t)._state.moves.table) for t in TYPES}
+    for _ in range(30):   # כל פריסה אחרת – אבל אותן טבלאות
+        pos = BitboardPosition()
+        for sq in rng.sample(range(64), rng.randint(1, 30)):
+            pos.place(make_piece(rng.choice(TYPES)), divmod(sq, 8))
+        MoveGen().generate(pos)
+    stack = MoveGen._stacks[(8, 8)]
+    assert tables <= set(stack.index)
+    assert len(stack.tables) == len(stack.index) <= len(Moves._tables)
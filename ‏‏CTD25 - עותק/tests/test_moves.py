@@ -44,3 +44,85 @@ def test_moves_bounds_check():
             for nr, nc in moves.get_moves(r, c):
                 assert 0 <= nr < 8
                 assert 0 <= nc < 8
+
+
+PIECES = pathlib.Path(__file__).resolve().parent.parent / "pieces"
+
+
+def test_moves_tables_shared_by_type():
+    a = Moves(PIECES / "QW" / "moves.txt", dims=(8, 8))
+    b = Moves(PIECES / "QW" / "moves.txt", dims=(8, 8))
+    c = Moves(PIECES / "QW" / "moves.txt", dims=(10, 10))
+    assert a.table is b.table
+    assert a.table is not c.table
+    # אותו אובייקט בכל קריאה – אין בנייה מחדש
+    assert a.get_moves(3, 3) is b.get_moves(3, 3)
+
+
+def test_moves_table_matches_delta_scan():
+    moves = Moves(PIECES / "QB" / "moves.txt", dims=(8, 8))
+    for r in range(8):
+        for c in range(8):
+            expected = [(r + dr, c + dc) for dr, dc in moves.deltas
+                        if 0 <= r + dr < 8 and 0 <= c + dc < 8]
+            assert list(moves.get_moves(r, c)) == expected
+
+
+def test_moves_keep_pawn_tags():
+    moves = Moves(PIECES / "PW" / "moves.txt", dims=(8, 8))
+    tags = {tag for _, tag in moves.get_tagged_moves(6, 4)}
+    assert {"capture", "non_capture"} <= tags
+    assert [cell for cell, _ in moves.get_tagged_moves(6, 4)] == list(moves.get_moves(6, 4))
+
+
+def _bits(*cells, cols=8):
+    mask = 0
+    for r, c in cells:
+        mask |= 1 << (r * cols + c)
+    return mask
+
+
+def test_rook_rays_stop_at_first_blocker():
+    moves = Moves(PIECES / "RW" / "moves.txt", dims=(8, 8))
+    assert len(moves.table.ray_dirs) == 4
+    occupied = _bits((4, 4), (4, 6), (1, 4), (4, 0))
+    enemy = _bits((4, 6), (4, 0))
+    quiet, captures = moves.get_destinations(4, 4, occupied, enemy)
+    assert captures == _bits((4, 6), (4, 0))
+    assert quiet == _bits((4, 5), (4, 3), (4, 2), (4, 1), (3, 4), (2, 4),
+                          (5, 4), (6, 4), (7, 4))
+
+
+def test_slides_match_ray_walk_on_random_boards():
+    import random
+    rng = random.Random(7)
+    moves = Moves(PIECES / "QB" / "moves.txt", dims=(8, 8))
+    dirs = [(1, 0), (-1, 0), (0, 1), (0, -1), (1, 1), (1, -1), (-1, 1), (-1, -1)]
+    for _ in range(50):
+        occupied = rng.getrandbits(64) & rng.getrandbits(64)
+        sq = rng.randrange(64)
+        occupied &= ~(1 << sq)
+        r, c = divmod(sq, 8)
+        expected = 0
+        for dr, dc in dirs:
+            r2, c2 = r + dr, c + dc
+            while 0 <= r2 < 8 and 0 <= c2 < 8:
+                expected |= 1 << (r2 * 8 + c2)
+                if occupied >> (r2 * 8 + c2) & 1:
+                    break
+                r2, c2 = r2 + dr, c2 + dc
+        assert moves.table.slide_attacks(sq, occupied) == expected
+
+
+def test_pawn_tags_and_first_move():
+    moves = Moves(PIECES / "PW" / "moves.txt", dims=(8, 8))
+    assert moves.table.ray_dirs == []
+    enemy = _bits((5, 3))
+    quiet, captures = moves.get_destinations(6, 4, enemy | _bits((6, 4)), enemy, first_move=True)
+    assert quiet == _bits((5, 4), (4, 4))
+    assert captures == _bits((5, 3))
+    # חסימה של המשבצת שבאמצע חוסמת גם את צעד הפתיחה הכפול
+    quiet, _ = moves.get_destinations(6, 4, _bits((5, 4)), _bits((5, 4)), first_move=True)
+    assert quiet == 0
+    quiet, _ = moves.get_destinations(6, 4, 0, 0, first_move=False)
+    assert quiet == _bits((5, 4))
@@ -0,0 +1,71 @@
+import pathlib
+import random
+from types import SimpleNamespace
+from interfaces.Board import Board
+from interfaces.Command import Command
+from interfaces.Physics import IdlePhysics, Physics
+from interfaces.PhysicsBatch import PhysicsBatch
+
+PIECES = pathlib.Path(__file__).resolve().parent.parent / "pieces"
+
+
+def wrap(physics):
+    return SimpleNamespace(_state=SimpleNamespace(_physics=physics))
+
+
+def test_step_matches_scalar_physics():
+    rng = random.Random(1)
+    board = Board(64, 64, 1, 1, 8, 8, None)
+    batch_side, scalar_side = [], []
+    for _ in range(20):
+        src = (rng.randrange(8), rng.randrange(8))
+        dst = (rng.randrange(8), rng.randrange(8))
+        speed = rng.choice([0.5, 1.5, 3.0])
+        cmd = Command(0, "QW", "move", [src, dst])
+        for side in (batch_side, scalar_side):
+            ph = Physics(src, board, speed)
+            ph.reset(cmd)
+            side.append(ph)
+    batch = PhysicsBatch(board)
+    batch.bind([wrap(ph) for ph in batch_side])
+    for now in range(0, 12000, 250):
+        finished = set(batch.step(now).tolist())
+        for i, ph in enumerate(scalar_side):
+            done = ph.update(now) is not None
+            assert batch_side[i].pos_m == ph.pos_m
+            assert (i in finished) == done
+
+
+def test_idle_pieces_never_finish_and_marked_slots_reload():
+    board = Board(64, 64, 1, 1, 8, 8, None)
+    idle = IdlePhysics((1, 1), board)
+    mover = Physics((0, 0), board, 1.0)
+    mover.reset(Command(0, "RW", "idle", [(0, 0), (0, 0)]))
+    pieces = [wrap(idle), wrap(mover)]
+    batch = PhysicsBatch(board)
+    batch.bind(pieces)
+    assert batch.step(0).tolist() == [1]   # מצב בלי מרחק מסתיים מיד
+
+    mover.reset(Command(100, "RW", "move", [(0, 0), (0, 2)]))
+    batch.mark(pieces[1])
+    assert batch.step(100).tolist() == []
+    assert batch.step(1100).tolist() == []
+    assert mover.pos_m == (0, 1)
+    assert batch.step(2100).tolist() == [1]
+
+
+def test_game_with_batch_physics_matches_scalar_game(bundle_path):
+    from interfaces.main import create_game
+    games = [create_game(PIECES / "board.csv", PIECES, batch_physics=flag, bundle_path=bundle_path) for flag in (False, True)]
+    script = [(0, "NW", [(1, 7), (2, 5)]), (3000, "PW", [(4, 6), (4, 4)]), (6000, "NW", [(2, 5), (3, 3)])]
+    for now in range(0, 10000, 40):
+        for game in games:
+            for t, piece_id, params in script:
+                if t == now:
+                    game._process_input(Command(t, piece_id, "move", params), now)
+            game._update_pieces(now)
+            game._resolve_collisions()
+        a, b = games
+        assert [p._state._physics.pos_m for p in a.pieces] == [p._state._physics.pos_m for p in b.pieces]
+        assert [p._state.name for p in a.pieces] == [p._state.name for p in b.pieces]
+        assert a.position.hash == b.position.hash
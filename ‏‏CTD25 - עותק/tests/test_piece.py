@@ -25,11 +25,21 @@ def test_command_not_for_this_piece(dummy_state):
     dummy_state.process_command.assert_not_called()
 
 def test_command_for_this_piece(dummy_state):
+    dummy_state._physics.cell = (2, 3)
+    dummy_state.moves.get_moves.return_value = {(4, 2)}
     piece = Piece("p1", dummy_state)
-    cmd = Command(timestamp=0, piece_id="p1", type="move", params=[])
+    cmd = Command(timestamp=0, piece_id="p1", type="move", params=[(2, 3), (2, 4)])
     piece.on_command(cmd, now_ms=1000)
     dummy_state.process_command.assert_called_once_with(cmd, 1000)
 
+def test_command_without_target_is_rejected(dummy_state):
+    dummy_state._physics.cell = (2, 3)
+    piece = Piece("p1", dummy_state)
+    for params in ([], [(2, 3)]):
+        assert not piece.is_command_possible(Command(0, "p1", "move", params))
+    assert piece.is_command_possible(Command(0, "p1", "jump", [(2, 3), (2, 3)]))
+    dummy_state.process_command.assert_not_called()
+
 def test_piece_reset(dummy_state):
     piece = Piece("p1", dummy_state)
     piece.reset(start_ms=500)
@@ -0,0 +1,87 @@
+import numpy as np
+from interfaces.Board import Board
+from interfaces.img import Img
+from interfaces.Renderer import DirtyRectRenderer
+
+
+def _img(arr):
+    img = Img()
+    img.img = arr
+    return img
+
+
+class FakePiece:
+    def __init__(self, img, pos):
+        self.img = img
+        self.pos = pos
+
+    def get_img(self, cell_size=None):
+        return self.img
+
+    def get_pos_inpixels(self, board=None):
+        return self.pos
+
+
+def _board(rng):
+    bg = rng.integers(0, 256, (80, 80, 4), dtype=np.uint8)
+    return Board(16, 16, 1, 1, 5, 5, _img(bg))
+
+
+def _full_frame(board, pieces):
+    frame = board.clone()
+    for p in pieces:
+        p.get_img().draw_on(frame.img, *p.get_pos_inpixels())
+    return frame.img.img
+
+
+def _sprites(rng, n):
+    return [_img(rng.integers(0, 256, (16, 16, 4), dtype=np.uint8)) for _ in range(n)]
+
+
+def test_render_matches_full_redraw_over_frames():
+    rng = np.random.default_rng(1)
+    board = _board(rng)
+    frames = _sprites(rng, 3)
+    pieces = [FakePiece(frames[0], (0, 0)), FakePiece(frames[1], (32, 16)),
+              FakePiece(frames[2], (64, 64))]
+    renderer = DirtyRectRenderer(board)
+
+    steps = [
+        lambda: None,
+        lambda: setattr(pieces[0], "pos", (5, 3)),        # תזוזה בין תאים
+        lambda: setattr(pieces[1], "img", frames[0]),     # החלפת פריים
+        lambda: setattr(pieces[2], "pos", (70, 72)),      # חצי מחוץ ללוח
+        lambda: pieces.pop(1),                            # אכילה
+        lambda: setattr(pieces[0], "pos", (60, 60)),      # חפיפה עם כלי אחר
+    ]
+    for step in steps:
+        step()
+        out = renderer.render(pieces)
+        assert np.array_equal(out.img.img, _full_frame(board, pieces))
+
+
+def test_idle_frame_repaints_nothing():
+    rng = np.random.default_rng(2)
+    board = _board(rng)
+    pieces = [FakePiece(s, (16 * i, 0)) for i, s in enumerate(_sprites(rng, 4))]
+    renderer = DirtyRectRenderer(board)
+    renderer.render(pieces)
+    assert renderer.last_full_redraw
+
+    renderer.render(pieces)
+    assert not renderer.last_full_redraw
+    assert renderer.last_dirty_tiles == 0
+
+
+def test_many_changes_fall_back_to_full_redraw():
+    rng = np.random.default_rng(3)
+    board = _board(rng)
+    sprites = _sprites(rng, 25)
+    pieces = [FakePiece(s, (16 * (i % 5), 16 * (i // 5))) for i, s in enumerate(sprites)]
+    renderer = DirtyRectRenderer(board)
+    renderer.render(pieces)
+    for p in pieces:
+        p.pos = (p.pos[0] + 1, p.pos[1])
+    out = renderer.render(pieces)
+    assert renderer.last_full_redraw
+    assert np.array_equal(out.img.img, _full_frame(board, pieces))
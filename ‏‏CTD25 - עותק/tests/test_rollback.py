@@ -0,0 +1,66 @@
+import pathlib
+from interfaces.Command import Command
+from interfaces.Rollback import StateHistory
+
+PIECES = pathlib.Path(__file__).resolve().parent.parent / "pieces"
+
+SCRIPT = [Command(0, "NW", "move", [(1, 7), (2, 5)]),
+          Command(4000, "NW", "move", [(2, 5), (3, 3)]),
+          Command(5000, "NW", "move", [(3, 3), (2, 1)]),    # עדיין בתנועה – נדחה
+          Command(7000, "NW", "move", [(3, 3), (2, 1)])]
+
+
+def new_game(bundle_path, depth=256):
+    from interfaces.main import create_game
+    game = create_game(PIECES / "board.csv", PIECES, headless=True, bundle_path=bundle_path)
+    game.history = StateHistory(depth)
+    return game
+
+
+def test_late_command_matches_playing_it_on_time(bundle_path):
+    expected = new_game(bundle_path).run_script(SCRIPT, until_ms=12000)
+
+    game = new_game(bundle_path)
+    game.run_script([SCRIPT[0], SCRIPT[2]], until_ms=5500)
+    report = game.rollback(SCRIPT[1])          # הגיע באיחור של שנייה וחצי
+    assert (report.tick_ms, report.now_ms, report.depth_ticks) == (4000, 5500, 151)
+    assert report.depth_ms == 1500 and not report.clamped
+    assert game._now == 5500
+    result = game.run_script(SCRIPT[3:], until_ms=12000, resume=True)
+
+    assert result.events == expected.events    # כולל הפקודה שנדחתה ב-5000 והאכילה
+    assert result.position == expected.position
+    assert result.position_hash == expected.position_hash
+
+
+def test_rollback_undoes_a_capture(bundle_path):
+    game = new_game(bundle_path, depth=600)
+    game.run_script(SCRIPT, until_ms=12000)
+    assert any(e.kind == "capture" for e in game.events)
+    # חמש שניות אחורה: הסוס נשלח לתא אחר רגע לפני הפקודה של 7000
+    report = game.rollback(Command(6990, "NW", "move", [(3, 3), (4, 5)]))
+    assert report.depth_ticks == 502 and not report.clamped
+    assert not any(e.kind == "capture" for e in game.events)
+    assert game.position.piece_at((5, 4)).piece_id == "NW"
+    assert game._now == 12000
+
+
+def test_on_time_command_is_just_queued_and_stats_add_up(bundle_path):
+    game = new_game(bundle_path, depth=50)
+    game.run_script(SCRIPT[:1], until_ms=3000)
+    history = game.history
+    assert len(history) == 50 and history.oldest_ms == 2510
+    assert history.nbytes < 50 * 200           # רק מה שהשתנה בכל טיק
+
+    queued = game.rollback(Command(3005, "NW", "move", [(2, 5), (3, 3)]))
+    assert queued.depth_ticks == 0 and game.user_input_queue.qsize() == 1
+    game.user_input_queue.get()
+
+    late = game.rollback(Command(2950, "NW", "move", [(2, 5), (3, 3)]))
+    assert late.depth_ticks == 6 and late.within_budget
+    assert game.events[-1].kind == "command" and game.events[-1].time_ms == 2950
+    assert game.rollback(Command(2000, "PW", "move", [(0, 6), (0, 5)])).clamped
+
+    stats = history.stats
+    assert (stats.on_time, stats.rollbacks, stats.clamped, stats.max_depth) == (1, 2, 1, 50)
+    assert stats.mean_cost_ms > 0 and "rollback" in stats.report()
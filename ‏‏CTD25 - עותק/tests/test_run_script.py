@@ -0,0 +1,74 @@
+import pathlib
+import time
+from interfaces.Command import Command
+from interfaces.GameLoop import VirtualClock
+
+PIECES = pathlib.Path(__file__).resolve().parent.parent / "pieces"
+
+SCRIPT = [Command(0, "NW", "move", [(1, 7), (2, 5)]),
+          Command(4000, "NW", "move", [(2, 5), (3, 3)]),
+          Command(5000, "NW", "move", [(3, 3), (2, 1)]),    # עדיין בתנועה – נדחה
+          Command(7000, "NW", "move", [(3, 3), (2, 1)])]
+
+
+def play(bundle_path, **kwargs):
+    from interfaces.main import create_game
+    game = create_game(PIECES / "board.csv", PIECES, headless=True, bundle_path=bundle_path)
+    return game, game.run_script(SCRIPT, **kwargs)
+
+
+def test_script_runs_faster_than_real_time_and_logs_events(bundle_path):
+    start = time.perf_counter()
+    game, result = play(bundle_path)
+    assert time.perf_counter() - start < 5.0   # 12 שניות משחק
+    assert isinstance(game.clock, VirtualClock)
+    assert result.end_ms == 12000
+    kinds = [(e.time_ms, e.kind) for e in result.events]
+    assert kinds[:4] == [(0, "command"), (4000, "command"), (5000, "rejected"), (7000, "command")]
+    capture, = [e for e in result.events if e.kind == "capture"]
+    assert capture.piece_id == "NW" and capture.data[0] == "PB"
+    assert 7000 < capture.time_ms < 12000
+    assert result.stats.ticks == 1201
+
+
+def test_final_position_and_determinism(bundle_path):
+    _, first = play(bundle_path)
+    _, second = play(bundle_path)
+    assert first.position[(1, 2)] == "NW"
+    assert (7, 1) not in first.position
+    assert len(first.position) == 31
+    assert first.position_hash == second.position_hash
+    assert first.events == second.events
+
+
+def test_until_ms_cuts_the_game_short(bundle_path):
+    _, result = play(bundle_path, until_ms=3000)
+    assert result.end_ms == 3000
+    assert not any(e.kind == "capture" for e in result.events)
+
+
+def test_command_without_target_cell_is_rejected(bundle_path):
+    from interfaces.main import create_game
+    game = create_game(PIECES / "board.csv", PIECES, headless=True, bundle_path=bundle_path)
+    result = game.run_script([Command(0, "KW", "jump", [(4, 7)]), Command(10, "KW", "jump", [])] + SCRIPT[:1],
+                             until_ms=3000)
+    assert [(e.time_ms, e.kind, e.data) for e in result.events] == [
+        (0, "rejected", ((4, 7),)), (0, "command", ((1, 7), (2, 5))), (10, "rejected", ())]
+    assert result.end_ms == 3000
+
+
+def test_capturer_keeps_its_square_when_an_enemy_heads_for_the_same_cell(bundle_path):
+    from interfaces.main import create_game
+    game = create_game(PIECES / "board.csv", PIECES, headless=True, bundle_path=bundle_path)
+    script = [Command(0, "NW", "move", [(1, 7), (2, 5)]),
+              Command(4000, "NW", "move", [(2, 5), (3, 3)]),
+              Command(8000, "NW", "move", [(3, 3), (2, 1)]),
+              Command(8500, "QB", "move", [(3, 0), (2, 1)])]   # המלכה נכנסת לתא לפני שהסוס מגיע
+    result = game.run_script(script, until_ms=14000)
+    captures = [(e.piece_id, e.data[0]) for e in result.events if e.kind == "capture"]
+    assert captures == [("NW", "PB"), ("NW", "QB")]
+    knight = game.position.piece_at((1, 2))
+    assert knight.piece_id == "NW" and knight in game.pieces
+    assert len(game.pieces) == len(game.position.pieces) == 30
+    assert game.position.hash == game.position.compute_hash()
+    assert game.move_cache.is_legal((1, 2), (3, 3))             # אפשר לשלוח אותו שוב
@@ -0,0 +1,61 @@
+import math
+import pathlib
+from types import SimpleNamespace
+from interfaces.Command import Command
+from interfaces.Scheduler import Scheduler
+
+PIECES = pathlib.Path(__file__).resolve().parent.parent / "pieces"
+
+
+def test_pop_due_in_time_order_and_skips_stale_entries():
+    s = Scheduler()
+    a, b, c = SimpleNamespace(), SimpleNamespace(), SimpleNamespace()
+    s.schedule(a, 30)
+    s.schedule(b, 10)
+    s.schedule(c, 20)
+    s.schedule(a, 5)      # מחליף את הרשומה הקודמת של a
+    s.remove(c)
+    assert s.pop_due(25) == [a, b]
+    assert s.pop_due(100) == []
+    s.schedule(b, math.inf)
+    assert s.pop_due(10 ** 9) == []
+
+
+def snapshot(game):
+    return [(p._state.name, p._state._physics.pos_m, id(p._state._graphics.get_img()))
+            for p in game.pieces]
+
+
+def test_scheduled_updates_match_updating_every_piece(bundle_path):
+    from interfaces.main import create_game
+    scheduled = create_game(PIECES / "board.csv", PIECES, bundle_path=bundle_path)
+    everyone = create_game(PIECES / "board.csv", PIECES, bundle_path=bundle_path)
+    script = {0: ("NW", [(1, 7), (2, 5)]), 2000: ("PW", [(4, 6), (4, 4)]),
+              4000: ("NW", [(2, 5), (3, 3)]), 5000: ("NW", [(3, 3), (2, 1)]),
+              7000: ("NW", [(3, 3), (2, 1)])}  # 5000 – עדיין בתנועה, הפקודה נדחית
+    touched = []
+    pop_due = scheduled._scheduler.pop_due
+
+    def counting_pop_due(now_ms):
+        due = pop_due(now_ms)
+        touched.append(len(due))
+        return due
+
+    scheduled._scheduler.pop_due = counting_pop_due
+    for now in range(0, 10000, 20):
+        for game in (scheduled, everyone):
+            if now in script:
+                piece_id, params = script[now]
+                game._process_input(Command(now, piece_id, "move", params), now)
+        scheduled._update_pieces(now)
+        for p in everyone.pieces:
+            p.update(now)
+        everyone._sync_states()
+        for game in (scheduled, everyone):
+            game._resolve_collisions(now)
+        assert snapshot(scheduled) == snapshot(everyone)
+        assert scheduled.position.hash == everyone.position.hash
+    assert len(scheduled.pieces) == 31
+    # רוב הטיקים נוגעים רק במעט כלים
+    assert len(touched) == 500 and touched[0] == 32
+    assert sorted(touched)[len(touched) // 2] <= 4
@@ -0,0 +1,58 @@
+import pathlib
+import pickle
+from interfaces.BatchRunner import RandomPolicy
+from interfaces.Snapshot import decode, encode
+
+PIECES = pathlib.Path(__file__).resolve().parent.parent / "pieces"
+
+
+def new_game(bundle_path):
+    from interfaces.main import create_game
+    return create_game(PIECES / "board.csv", PIECES, headless=True, bundle_path=bundle_path)
+
+
+def played_game(bundle_path, ms=10000, seed=3):
+    game = new_game(bundle_path)
+    game.run_script([], until_ms=ms, policy=RandomPolicy(seed))
+    return game
+
+
+def test_round_trip_and_size(bundle_path):
+    fresh = new_game(bundle_path).snapshot()
+    assert decode(encode(fresh)) == fresh
+    assert len(encode(fresh)) < 600
+
+    snap = played_game(bundle_path).snapshot()
+    assert any(e["start"] is not None for e in snap["pieces"])   # יש כלים בתנועה / במנוחה
+    raw = encode(snap)
+    assert decode(raw) == snap
+    assert len(raw) < 600
+
+
+def test_restored_game_continues_identically(bundle_path):
+    game = played_game(bundle_path)
+    raw = encode(game.snapshot())
+    copy = new_game(bundle_path)
+    copy.restore(decode(raw))
+    assert copy.position.hash == game.position.hash
+    assert copy.snapshot() == game.snapshot()
+
+    a = game.run_script([], until_ms=20000, policy=RandomPolicy(9), resume=True)
+    b = copy.run_script([], until_ms=20000, policy=RandomPolicy(9), resume=True)
+    assert a.position == b.position and a.position_hash == b.position_hash
+    assert [e for e in a.events if e.time_ms > 10000] == b.events
+
+
+def test_restore_reuses_pieces_and_is_far_smaller_than_pickling_pieces(bundle_path):
+    from interfaces.SpriteAtlas import SpriteAtlas
+    game = played_game(bundle_path)
+    raw = encode(game.snapshot())
+    target = new_game(bundle_path)
+    slots, atlas = list(target._slots), SpriteAtlas.shared()
+    pages, decodes = len(atlas._pages), atlas.source_decodes
+    for _ in range(3):
+        target.restore(decode(raw))
+        assert target.snapshot() == game.snapshot()
+    assert target._slots == slots and all(p in slots for p in target.pieces)   # אותם אובייקטים
+    assert (len(atlas._pages), atlas.source_decodes) == (pages, decodes)    # בלי טעינת ספרייטים
+    assert len(pickle.dumps(game.pieces[0])) > 10 * len(raw) / len(game.pieces)
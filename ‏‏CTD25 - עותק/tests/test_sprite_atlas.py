@@ -0,0 +1,190 @@
+import pathlib
+import numpy as np
+import pytest
+from interfaces.Board import Board
+from interfaces.Graphics import Graphics
+from interfaces.img import Img
+from interfaces.mock_img import MockImg
+from interfaces.SpriteAtlas import LoadTimings, SpriteAtlas
+
+PIECES = pathlib.Path(__file__).resolve().parent.parent / "pieces"
+
+
+def _board(cell=32):
+    return Board(cell, cell, 1, 1, 8, 8, MockImg())
+
+
+def test_preload_packs_folders_into_one_page():
+    atlas = SpriteAtlas()
+    folders = [PIECES / "PW" / "states" / s / "sprites" for s in ("idle", "move")]
+    atlas.preload(folders, (32, 32))
+    assert len(atlas._pages) == 1
+    page = atlas._pages[0]
+    assert page.shape[1:] == (32, 32, 4)
+    assert not page.flags.writeable
+
+    idle = atlas.frames(folders[0], (32, 32))
+    assert idle[0].img.base is page or np.shares_memory(idle[0].img, page)
+
+
+def test_frames_are_decoded_once():
+    atlas = SpriteAtlas()
+    folder = PIECES / "RB" / "states" / "idle" / "sprites"
+    first = atlas.frames(folder, (32, 32))
+    second = atlas.frames(folder, (32, 32))
+    assert first is second
+    assert len(atlas._pages) == 1
+
+
+def test_graphics_copy_shares_frames():
+    atlas = SpriteAtlas()
+    folder = PIECES / "PB" / "states" / "idle" / "sprites"
+    graphics = Graphics(folder, _board(), atlas=atlas)
+    pages_before = atlas.nbytes
+
+    copies = [graphics.copy() for _ in range(16)]
+    assert atlas.nbytes == pages_before
+    for c in copies:
+        assert c.sprites is graphics.sprites
+    copies[0].update(500)
+    assert not hasattr(graphics, "_start_time")
+
+
+def test_empty_folder_raises(tmp_path):
+    with pytest.raises(ValueError):
+        SpriteAtlas().frames(tmp_path, (32, 32))
+
+
+def test_parallel_preload_matches_serial_and_times_stages():
+    folders = [PIECES / "QW" / "states" / s / "sprites" for s in ("idle", "move", "jump")]
+    serial, parallel = SpriteAtlas(), SpriteAtlas()
+    timings = LoadTimings()
+    serial.preload(folders, (32, 32))
+    parallel.preload(folders, (32, 32), workers=4, timings=timings)
+
+    for folder in folders:
+        a, b = serial.frames(folder, (32, 32)), parallel.frames(folder, (32, 32))
+        assert all(np.array_equal(x.img, y.img) for x, y in zip(a, b))
+    assert timings.frames == sum(len(serial.frames(f, (32, 32))) for f in folders)
+    assert timings.decode > 0
+    assert "decode" in timings.report()
+
+
+def test_lazy_graphics_decodes_on_first_update():
+    atlas = SpriteAtlas()
+    folder = PIECES / "NB" / "states" / "long_rest" / "sprites"
+    graphics = Graphics(folder, _board(), atlas=atlas, lazy=True)
+    assert atlas.nbytes == 0
+
+    graphics.update(0)
+    assert atlas.nbytes > 0
+    assert graphics.get_img() is graphics.sprites[0]
+
+
+def test_lru_evicts_least_recently_used_entries():
+    idle, move = [PIECES / "KW" / "states" / s / "sprites" for s in ("idle", "move")]
+    atlas = SpriteAtlas(max_bytes=None)
+    atlas.frames(idle, (32, 32))
+    atlas.frames(move, (32, 32))
+    atlas.frames(idle, (32, 32))   # idle נהיה הכי עדכני
+
+    limit = atlas.lru_bytes - 1
+    atlas.set_memory_limit(limit)
+    assert atlas.evictions >= 1
+    assert atlas.lru_bytes <= limit
+    assert atlas.key(idle, (32, 32)) in atlas
+
+
+
+def test_blend_planes_count_toward_the_cap():
+    folder = PIECES / "KW" / "states" / "idle" / "sprites"
+    atlas = SpriteAtlas(max_bytes=None)
+    frame = atlas.frames(folder, (32, 32))[0]
+    before, total = atlas.lru_bytes, atlas.nbytes
+    canvas = Img()
+    canvas.img = np.zeros((64, 64, 3), np.uint8)
+    frame.draw_on(canvas, 0, 0)
+    planes = sum(p.nbytes for p in frame._blend_planes() if p is not None)
+    assert planes > 0
+    assert atlas.lru_bytes == before + planes and atlas.nbytes == total + planes
+    frame.draw_on(canvas, 8, 8)           # כבר מחושב – לא נספר שוב
+    assert atlas.lru_bytes == before + planes
+
+
+def test_evicted_frames_are_released_from_graphics():
+    idle, move = [PIECES / "KW" / "states" / s / "sprites" for s in ("idle", "move")]
+    atlas = SpriteAtlas(max_bytes=None)
+    graphics = Graphics(idle, _board(), atlas=atlas, lazy=True)
+    graphics.update(0)
+    held = graphics.get_img()
+    page = held.img.base
+    atlas.frames(move, (32, 32))
+    atlas.set_memory_limit(1)             # נשאר רק move
+
+    assert held.img is None and not hasattr(held, "_planes")
+    assert all(p is not page for p in atlas._pages)
+    fresh = graphics.get_img()
+    assert fresh is not held and fresh.img is not None
+
+def test_drawing_does_not_evict_until_trim():
+    idle, move = [PIECES / "KW" / "states" / s / "sprites" for s in ("idle", "move")]
+    atlas = SpriteAtlas(max_bytes=None)
+    fa, fb = atlas.frames(idle, (32, 32)), atlas.frames(move, (32, 32))
+    atlas.set_memory_limit(atlas.lru_bytes + 1)
+    canvas = Img()
+    canvas.img = np.zeros((64, 64, 3), np.uint8)
+    fa[0].draw_on(canvas, 0, 0)           # כמו ב-render: כל הפריימים נשלפו לפני הציור
+    fb[0].draw_on(canvas, 0, 0)
+    assert fa[0].img is not None and atlas.evictions == 0
+    atlas.trim()
+    assert atlas.evictions >= 1 and atlas.lru_bytes <= atlas.max_bytes
+
+
+def test_preloaded_pages_are_never_evicted():
+    folders = [PIECES / "KB" / "states" / s / "sprites" for s in ("idle", "move")]
+    atlas = SpriteAtlas(max_bytes=1)
+    atlas.preload(folders, (32, 32))
+    atlas.frames(PIECES / "KB" / "states" / "jump" / "sprites", (32, 32))
+    atlas.frames(PIECES / "KB" / "states" / "long_rest" / "sprites", (32, 32))
+    assert all(atlas.key(f, (32, 32)) in atlas for f in folders)
+
+
+def test_preload_keeps_sources_only_when_asked():
+    folders = [PIECES / "QB" / "states" / s / "sprites" for s in ("idle", "move")]
+    atlas = SpriteAtlas(max_bytes=None)
+    atlas.preload(folders, (32, 32))
+    assert atlas.lru_bytes == 0 and atlas.nbytes == atlas._pages[0].nbytes
+    atlas.frames(folders[0], (16, 16))            # מפענח מחדש לגודל אחר
+    assert atlas.source_decodes == 1
+
+    keeping = SpriteAtlas(max_bytes=None)
+    keeping.preload(folders, (32, 32), keep_sources=True)
+    assert keeping.lru_bytes > 10 * keeping._pages[0].nbytes
+    keeping.frames(folders[0], (16, 16))
+    assert keeping.source_decodes == 0
+
+
+def test_new_cell_size_reuses_decoded_sources():
+    import cv2
+    folder = PIECES / "BW" / "states" / "move" / "sprites"
+    atlas = SpriteAtlas(max_bytes=None)
+    big = atlas.frames(folder, (64, 64))
+    small = atlas.frames(folder, (16, 16))
+    nearest = atlas.frames(folder, (16, 16), cv2.INTER_NEAREST)
+    assert atlas.source_decodes == 1
+    assert big[0].img.shape == (64, 64, 4)
+    assert small[0].img.shape == (16, 16, 4)
+    assert nearest is not small
+    assert atlas.frames(folder, (16, 16)) is small
+
+
+def test_graphics_frame_at_other_resolution():
+    atlas = SpriteAtlas(max_bytes=None)
+    folder = PIECES / "BW" / "states" / "idle" / "sprites"
+    graphics = Graphics(folder, _board(32), atlas=atlas)
+    graphics.update(0)
+    graphics.update(400)
+    thumb = graphics.get_img_at((8, 8))
+    index = graphics.sprites.index(graphics.get_img())
+    assert thumb is atlas.frames(folder, (8, 8))[index]
+    assert graphics.get_img_at((32, 32)) is graphics.get_img()
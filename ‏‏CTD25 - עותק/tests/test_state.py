@@ -152,3 +152,20 @@ def test_get_command_returns_last_command(dummy_state):
     dummy_state.reset(cmd)
     assert dummy_state.get_command().type == "idle"
 
+
+
+class _CopyablePart:
+    def copy(self):
+        return _CopyablePart()
+
+
+def test_copy_machine_rewires_transitions():
+    idle = State(None, _CopyablePart(), _CopyablePart())
+    move = State(None, _CopyablePart(), _CopyablePart())
+    idle.set_transition("move", move)
+    move.set_transition("idle", idle)
+
+    idle_copy = idle.copy_machine()
+    move_copy = idle_copy.transitions["move"]
+    assert idle_copy is not idle and move_copy is not move
+    assert move_copy.transitions["idle"] is idle_copy
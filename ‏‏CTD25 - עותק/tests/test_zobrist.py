@@ -0,0 +1,59 @@
+import random
+from types import SimpleNamespace
+from interfaces.Bitboard import BitboardPosition
+from interfaces.Zobrist import TranspositionCache, ZobristKeys
+
+TYPES = ["PW", "PB", "RW", "RB", "NW", "NB", "BW", "BB", "QW", "QB", "KW", "KB"]
+
+
+def make_piece(piece_id):
+    return SimpleNamespace(piece_id=piece_id)
+
+
+def test_keys_are_deterministic():
+    a, b = ZobristKeys(64), ZobristKeys(64)
+    b.piece("KB", "idle", 3)  # סדר יצירה שונה – אותם מפתחות
+    assert a.piece("QW", "move", 10) == b.piece("QW", "move", 10)
+    assert a.piece("QW", "move", 10) != a.piece("QW", "idle", 10)
+
+
+def test_incremental_hash_matches_recompute():
+    rng = random.Random(5)
+    pos = BitboardPosition()
+    for sq in rng.sample(range(64), 20):
+        pos.place(make_piece(rng.choice(TYPES)), divmod(sq, 8))
+    for _ in range(200):
+        src = rng.choice(sorted(pos.pieces))
+        if rng.random() < 0.3:
+            pos.set_state(pos.cell(src), rng.choice(["idle", "move", "jump", "long_rest"]))
+        else:
+            pos.move(pos.cell(src), pos.cell(rng.randrange(64) if rng.random() < 0.5 else src ^ 1))
+        assert pos.hash == pos.compute_hash()
+
+
+def test_same_arrangement_same_hash():
+    pos = BitboardPosition()
+    pos.place(make_piece("RW"), (7, 0))
+    pos.place(make_piece("KB"), (0, 4))
+    pos.move((7, 0), (5, 0))
+    h = pos.hash
+    pos.move((5, 0), (5, 3))
+    pos.set_state((5, 3), "move")
+    assert pos.hash != h
+    pos.set_state((5, 3), "idle")
+    pos.move((5, 3), (5, 0))
+    assert pos.hash == h
+
+
+def test_transposition_cache_counts_and_evicts():
+    tt = TranspositionCache(max_entries=2)
+    calls = []
+    compute = lambda: calls.append(1) or len(calls)
+    assert tt.get_or_compute(1, "moves", compute) == 1
+    assert tt.get_or_compute(1, "moves", compute) == 1
+    assert (tt.hits, tt.misses) == (1, 1)
+    tt.put(2, "moves", "b")
+    tt.put(3, "moves", "c")
+    assert len(tt) == 2
+    assert tt.get(1, "moves") is None
+    assert tt.hit_rate == 1 / 3